@@ -0,0 +1,45 @@
+"""add messages external_id unique index
+
+Revision ID: 8c1d4e7a2b90
+Revises: 405e5c14ef10
+Create Date: 2026-10-19 10:12:41.508214
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8c1d4e7a2b90'
+down_revision: Union[str, Sequence[str], None] = '405e5c14ef10'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Remove duplicates left by earlier webhook retries (keep the oldest row)
+    op.execute("""
+        DELETE FROM messages m
+        USING messages d
+        WHERE m.external_id IS NOT NULL
+          AND m.company_id = d.company_id
+          AND m.channel = d.channel
+          AND m.external_id = d.external_id
+          AND m.id > d.id
+    """)
+
+    op.create_index(
+        'uq_messages_company_channel_external_id',
+        'messages',
+        ['company_id', 'channel', 'external_id'],
+        unique=True,
+        postgresql_where=sa.text('external_id IS NOT NULL'),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('uq_messages_company_channel_external_id', table_name='messages')
@@ -0,0 +1,31 @@
+"""add company response time totals
+
+Revision ID: b3f9a61c27d4
+Revises: 8c1d4e7a2b90
+Create Date: 2026-10-19 12:40:03.117520
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b3f9a61c27d4'
+down_revision: Union[str, Sequence[str], None] = '8c1d4e7a2b90'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('companies', sa.Column('response_count', sa.Integer(), server_default='0', nullable=False))
+    op.add_column('companies', sa.Column('response_time_total', sa.BigInteger(), server_default='0', nullable=False))
+    # Counters are backfilled by `python reconcile_message_counters.py`
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('companies', 'response_time_total')
+    op.drop_column('companies', 'response_count')
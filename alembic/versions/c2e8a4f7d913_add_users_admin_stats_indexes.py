@@ -0,0 +1,42 @@
+"""add users admin stats indexes
+
+Revision ID: c2e8a4f7d913
+Revises: a9d3e7c15f42
+Create Date: 2026-10-19 20:14:09.551370
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c2e8a4f7d913'
+down_revision: Union[str, Sequence[str], None] = 'a9d3e7c15f42'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index(
+        'ix_users_trial_clients_ends_at',
+        'users',
+        ['trial_ends_at', 'id'],
+        unique=False,
+        postgresql_where=sa.text("role = 'CLIENT' AND subscription_tier = 'TRIAL'"),
+    )
+    op.create_index(
+        'ix_users_paid_clients_ends_at',
+        'users',
+        ['subscription_ends_at', 'id'],
+        unique=False,
+        postgresql_where=sa.text("role = 'CLIENT' AND subscription_tier IN ('BASIC', 'PRO', 'ENTERPRISE')"),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_users_paid_clients_ends_at', table_name='users')
+    op.drop_index('ix_users_trial_clients_ends_at', table_name='users')
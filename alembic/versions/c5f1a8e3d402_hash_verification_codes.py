@@ -0,0 +1,39 @@
+"""hash verification codes
+
+Revision ID: c5f1a8e3d402
+Revises: b8e4d2f6a937
+Create Date: 2026-10-19 23:58:17.640213
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c5f1a8e3d402'
+down_revision: Union[str, Sequence[str], None] = 'b8e4d2f6a937'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Codes live for minutes and cannot be hashed without the plaintext: drop outstanding ones
+    op.execute("DELETE FROM verification_codes")
+    op.drop_index(op.f('ix_verification_codes_code'), table_name='verification_codes')
+    op.drop_column('verification_codes', 'code')
+    op.add_column('verification_codes', sa.Column('code_hash', sa.String(length=64), nullable=False))
+    op.create_index(op.f('ix_verification_codes_code_hash'), 'verification_codes', ['code_hash'], unique=False)
+    op.create_index(op.f('ix_verification_codes_expires_at'), 'verification_codes', ['expires_at'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.execute("DELETE FROM verification_codes")
+    op.drop_index(op.f('ix_verification_codes_expires_at'), table_name='verification_codes')
+    op.drop_index(op.f('ix_verification_codes_code_hash'), table_name='verification_codes')
+    op.drop_column('verification_codes', 'code_hash')
+    op.add_column('verification_codes', sa.Column('code', sa.String(), nullable=False))
+    op.create_index(op.f('ix_verification_codes_code'), 'verification_codes', ['code'], unique=False)
@@ -0,0 +1,47 @@
+"""add message dedupe keys
+
+Revision ID: d3a7f4b9e168
+Revises: c5f1a8e3d402
+Create Date: 2026-10-20 10:14:36.508219
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd3a7f4b9e168'
+down_revision: Union[str, Sequence[str], None] = 'c5f1a8e3d402'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('message_keys',
+    sa.Column('company_id', sa.Integer(), nullable=False),
+    sa.Column('channel', sa.String(), nullable=False),
+    sa.Column('external_id', sa.String(), nullable=False),
+    sa.Column('created_at', sa.DateTime(timezone=True), nullable=False),
+    sa.ForeignKeyConstraint(['company_id'], ['companies.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('company_id', 'channel', 'external_id')
+    )
+    op.create_index('ix_message_keys_created_at', 'message_keys', ['created_at'], unique=False)
+
+    # Keys of stored messages; where retries with other timestamps already made
+    # duplicates, the oldest row is the one the key points at
+    op.execute("""
+        INSERT INTO message_keys (company_id, channel, external_id, created_at)
+        SELECT DISTINCT ON (company_id, channel, external_id) company_id, channel, external_id, created_at
+        FROM messages
+        WHERE external_id IS NOT NULL
+        ORDER BY company_id, channel, external_id, created_at, id
+    """)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_message_keys_created_at', table_name='message_keys')
+    op.drop_table('message_keys')
@@ -0,0 +1,62 @@
+"""add message rollup tables
+
+Revision ID: d47e2c9b8f13
+Revises: b3f9a61c27d4
+Create Date: 2026-10-19 14:05:37.662904
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd47e2c9b8f13'
+down_revision: Union[str, Sequence[str], None] = 'b3f9a61c27d4'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def _rollup_columns():
+    return [
+        sa.Column('company_id', sa.Integer(), nullable=False),
+        sa.Column('channel', sa.String(), nullable=False),
+        sa.Column('bucket_start', sa.DateTime(timezone=True), nullable=False),
+        sa.Column('message_count', sa.Integer(), nullable=False),
+        sa.Column('type1_count', sa.Integer(), nullable=False),
+        sa.Column('type2_count', sa.Integer(), nullable=False),
+        sa.Column('type3_count', sa.Integer(), nullable=False),
+        sa.Column('payment_links_sent', sa.Integer(), nullable=False),
+        sa.Column('paid_count', sa.Integer(), nullable=False),
+        sa.Column('response_count', sa.Integer(), nullable=False),
+        sa.Column('response_time_total', sa.BigInteger(), nullable=False),
+        sa.ForeignKeyConstraint(['company_id'], ['companies.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('company_id', 'channel', 'bucket_start'),
+    ]
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('message_rollups_hourly', *_rollup_columns())
+    op.create_table('message_rollups_daily', *_rollup_columns())
+    op.create_table('rollup_watermarks',
+    sa.Column('name', sa.String(), nullable=False),
+    sa.Column('watermark', sa.DateTime(timezone=True), nullable=False),
+    sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+    sa.PrimaryKeyConstraint('name')
+    )
+
+    op.create_index('ix_messages_company_channel_created_at', 'messages', ['company_id', 'channel', 'created_at'], unique=False)
+    op.create_index('ix_messages_updated_at', 'messages', ['updated_at'], unique=False)
+    op.create_index('ix_messages_created_at', 'messages', ['created_at'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_messages_created_at', table_name='messages')
+    op.drop_index('ix_messages_updated_at', table_name='messages')
+    op.drop_index('ix_messages_company_channel_created_at', table_name='messages')
+    op.drop_table('rollup_watermarks')
+    op.drop_table('message_rollups_daily')
+    op.drop_table('message_rollups_hourly')
@@ -0,0 +1,90 @@
+"""add manager portfolio stats
+
+Revision ID: d8b1f5a3c072
+Revises: c2e8a4f7d913
+Create Date: 2026-10-19 21:02:37.184420
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd8b1f5a3c072'
+down_revision: Union[str, Sequence[str], None] = 'c2e8a4f7d913'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('manager_stats',
+    sa.Column('manager_id', sa.Integer(), nullable=False),
+    sa.Column('trial_count', sa.Integer(), nullable=False),
+    sa.Column('basic_count', sa.Integer(), nullable=False),
+    sa.Column('pro_count', sa.Integer(), nullable=False),
+    sa.Column('enterprise_count', sa.Integer(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+    sa.ForeignKeyConstraint(['manager_id'], ['users.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('manager_id')
+    )
+    op.create_table('manager_expiry_buckets',
+    sa.Column('manager_id', sa.Integer(), nullable=False),
+    sa.Column('kind', sa.String(), nullable=False),
+    sa.Column('day', sa.Date(), nullable=False),
+    sa.Column('client_count', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['manager_id'], ['users.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('manager_id', 'kind', 'day')
+    )
+
+    op.create_index(
+        'ix_users_manager_trial_clients_ends_at',
+        'users',
+        ['manager_id', 'trial_ends_at', 'id'],
+        unique=False,
+        postgresql_where=sa.text("role = 'CLIENT' AND subscription_tier = 'TRIAL'"),
+    )
+    op.create_index(
+        'ix_users_manager_paid_clients_ends_at',
+        'users',
+        ['manager_id', 'subscription_ends_at', 'id'],
+        unique=False,
+        postgresql_where=sa.text("role = 'CLIENT' AND subscription_tier IN ('BASIC', 'PRO', 'ENTERPRISE')"),
+    )
+
+    # Backfill (same as app.services.manager_stats.reconcile)
+    op.execute("""
+        INSERT INTO manager_stats (manager_id, trial_count, basic_count, pro_count, enterprise_count)
+        SELECT manager_id,
+               count(*) FILTER (WHERE subscription_tier = 'TRIAL'),
+               count(*) FILTER (WHERE subscription_tier = 'BASIC'),
+               count(*) FILTER (WHERE subscription_tier = 'PRO'),
+               count(*) FILTER (WHERE subscription_tier = 'ENTERPRISE')
+        FROM users
+        WHERE role = 'CLIENT' AND manager_id IS NOT NULL
+        GROUP BY manager_id
+    """)
+    op.execute("""
+        INSERT INTO manager_expiry_buckets (manager_id, kind, day, client_count)
+        SELECT manager_id, 'trial', (trial_ends_at AT TIME ZONE 'UTC')::date, count(*)
+        FROM users
+        WHERE role = 'CLIENT' AND manager_id IS NOT NULL
+          AND subscription_tier = 'TRIAL' AND trial_ends_at IS NOT NULL
+        GROUP BY 1, 3
+        UNION ALL
+        SELECT manager_id, 'renewal', (subscription_ends_at AT TIME ZONE 'UTC')::date, count(*)
+        FROM users
+        WHERE role = 'CLIENT' AND manager_id IS NOT NULL
+          AND subscription_tier IN ('BASIC', 'PRO', 'ENTERPRISE') AND subscription_ends_at IS NOT NULL
+        GROUP BY 1, 3
+    """)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_users_manager_paid_clients_ends_at', table_name='users')
+    op.drop_index('ix_users_manager_trial_clients_ends_at', table_name='users')
+    op.drop_table('manager_expiry_buckets')
+    op.drop_table('manager_stats')
@@ -0,0 +1,34 @@
+"""add users listing indexes
+
+Revision ID: e4f9c6d2a815
+Revises: d8b1f5a3c072
+Create Date: 2026-10-19 21:40:55.302817
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e4f9c6d2a815'
+down_revision: Union[str, Sequence[str], None] = 'd8b1f5a3c072'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index('ix_users_role_manager_id', 'users', ['role', 'manager_id', 'id'], unique=False)
+    op.create_index('ix_users_role_subscription_tier', 'users', ['role', 'subscription_tier', 'id'], unique=False)
+    op.create_index('ix_users_email_lower_prefix', 'users', [sa.text('lower(email) text_pattern_ops')], unique=False)
+    op.create_index('ix_users_full_name_lower_prefix', 'users', [sa.text('lower(full_name) text_pattern_ops')], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_users_full_name_lower_prefix', table_name='users')
+    op.drop_index('ix_users_email_lower_prefix', table_name='users')
+    op.drop_index('ix_users_role_subscription_tier', table_name='users')
+    op.drop_index('ix_users_role_manager_id', table_name='users')
@@ -0,0 +1,161 @@
+"""partition messages by month
+
+Revision ID: e5a8f0d3c621
+Revises: d47e2c9b8f13
+Create Date: 2026-10-19 16:22:48.301877
+
+"""
+from datetime import date, datetime, timezone
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e5a8f0d3c621'
+down_revision: Union[str, Sequence[str], None] = 'd47e2c9b8f13'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Future months created up front (the maintenance job keeps this going)
+PARTITIONS_AHEAD = 3
+
+COLUMNS = (
+    "id, company_id, channel, message_type, status, content, external_id, "
+    "sent_at, received_at, response_time_seconds, created_at, updated_at"
+)
+
+INDEXES = (
+    'ix_messages_id',
+    'uq_messages_company_channel_external_id',
+    'ix_messages_company_channel_created_at',
+    'ix_messages_updated_at',
+    'ix_messages_created_at',
+)
+
+
+def _add_months(month: date, count: int) -> date:
+    index = month.year * 12 + month.month - 1 + count
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def _create_indexes() -> None:
+    op.create_index('ix_messages_id', 'messages', ['id'], unique=False)
+    op.create_index(
+        'uq_messages_company_channel_external_id',
+        'messages',
+        ['company_id', 'channel', 'external_id', 'created_at'],
+        unique=True,
+        postgresql_where=sa.text('external_id IS NOT NULL'),
+    )
+    op.create_index('ix_messages_company_created_at', 'messages', ['company_id', 'created_at'], unique=False)
+    op.create_index('ix_messages_company_channel_created_at', 'messages', ['company_id', 'channel', 'created_at'], unique=False)
+    op.create_index('ix_messages_updated_at', 'messages', ['updated_at'], unique=False)
+    op.create_index('ix_messages_created_at', 'messages', ['created_at'], unique=False)
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    conn = op.get_bind()
+
+    # 1. Move the plain table (and its index names) out of the way
+    op.execute("ALTER TABLE messages RENAME TO messages_legacy")
+    op.execute("ALTER INDEX messages_pkey RENAME TO messages_legacy_pkey")
+    for name in INDEXES:
+        op.execute(f"ALTER INDEX IF EXISTS {name} RENAME TO {name}_legacy")
+
+    # 2. Partitioned parent; the PK must include the partition key
+    op.execute("""
+        CREATE TABLE messages (
+            id INTEGER NOT NULL DEFAULT nextval('messages_id_seq'),
+            company_id INTEGER NOT NULL REFERENCES companies (id),
+            channel VARCHAR NOT NULL,
+            message_type messagetype NOT NULL,
+            status messagestatus,
+            content TEXT,
+            external_id VARCHAR,
+            sent_at TIMESTAMP WITH TIME ZONE,
+            received_at TIMESTAMP WITH TIME ZONE,
+            response_time_seconds INTEGER,
+            created_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT now(),
+            updated_at TIMESTAMP WITH TIME ZONE,
+            PRIMARY KEY (id, created_at)
+        ) PARTITION BY RANGE (created_at)
+    """)
+    op.execute("ALTER SEQUENCE messages_id_seq OWNED BY messages.id")
+    _create_indexes()
+
+    # 3. Monthly partitions from the oldest message up to PARTITIONS_AHEAD months ahead,
+    #    plus a default partition for out-of-range timestamps
+    oldest = conn.execute(sa.text("SELECT min(created_at) FROM messages_legacy")).scalar()
+    now = datetime.now(timezone.utc).date()
+    month = date((oldest or now).year, (oldest or now).month, 1)
+    last = _add_months(date(now.year, now.month, 1), PARTITIONS_AHEAD)
+    while month <= last:
+        op.execute(
+            f"CREATE TABLE messages_y{month.year:04d}m{month.month:02d} PARTITION OF messages "
+            f"FOR VALUES FROM ('{month.isoformat()}') TO ('{_add_months(month, 1).isoformat()}')"
+        )
+        month = _add_months(month, 1)
+    op.execute("CREATE TABLE messages_default PARTITION OF messages DEFAULT")
+
+    # 4. Copy rows over and drop the old table
+    op.execute(f"""
+        INSERT INTO messages ({COLUMNS})
+        SELECT id, company_id, channel, message_type, status, content, external_id,
+               sent_at, received_at, response_time_seconds, coalesce(created_at, now()), updated_at
+        FROM messages_legacy
+    """)
+    op.execute("DROP TABLE messages_legacy")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.execute("ALTER TABLE messages RENAME TO messages_partitioned")
+    op.execute("ALTER INDEX messages_pkey RENAME TO messages_partitioned_pkey")
+    for name in INDEXES + ('ix_messages_company_created_at',):
+        op.execute(f"ALTER INDEX IF EXISTS {name} RENAME TO {name}_partitioned")
+
+    op.execute("""
+        CREATE TABLE messages (
+            id INTEGER NOT NULL DEFAULT nextval('messages_id_seq') PRIMARY KEY,
+            company_id INTEGER NOT NULL REFERENCES companies (id),
+            channel VARCHAR NOT NULL,
+            message_type messagetype NOT NULL,
+            status messagestatus,
+            content TEXT,
+            external_id VARCHAR,
+            sent_at TIMESTAMP WITH TIME ZONE,
+            received_at TIMESTAMP WITH TIME ZONE,
+            response_time_seconds INTEGER,
+            created_at TIMESTAMP WITH TIME ZONE DEFAULT now(),
+            updated_at TIMESTAMP WITH TIME ZONE
+        )
+    """)
+    op.execute("ALTER SEQUENCE messages_id_seq OWNED BY messages.id")
+    op.execute(f"INSERT INTO messages ({COLUMNS}) SELECT {COLUMNS} FROM messages_partitioned")
+    op.execute("DROP TABLE messages_partitioned CASCADE")
+
+    # The old unique index has no created_at; keep the oldest row per external id
+    op.execute("""
+        DELETE FROM messages m
+        USING messages d
+        WHERE m.external_id IS NOT NULL
+          AND m.company_id = d.company_id
+          AND m.channel = d.channel
+          AND m.external_id = d.external_id
+          AND m.id > d.id
+    """)
+
+    op.create_index('ix_messages_id', 'messages', ['id'], unique=False)
+    op.create_index(
+        'uq_messages_company_channel_external_id',
+        'messages',
+        ['company_id', 'channel', 'external_id'],
+        unique=True,
+        postgresql_where=sa.text('external_id IS NOT NULL'),
+    )
+    op.create_index('ix_messages_company_channel_created_at', 'messages', ['company_id', 'channel', 'created_at'], unique=False)
+    op.create_index('ix_messages_updated_at', 'messages', ['updated_at'], unique=False)
+    op.create_index('ix_messages_created_at', 'messages', ['created_at'], unique=False)
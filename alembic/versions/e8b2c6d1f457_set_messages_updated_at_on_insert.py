@@ -0,0 +1,29 @@
+"""set messages updated_at on insert
+
+Revision ID: e8b2c6d1f457
+Revises: d3a7f4b9e168
+Create Date: 2026-10-20 11:02:18.731904
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e8b2c6d1f457'
+down_revision: Union[str, Sequence[str], None] = 'd3a7f4b9e168'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Existing rows keep updated_at NULL; the rollup job falls back to created_at for them
+    op.alter_column('messages', 'updated_at', server_default=sa.text('now()'))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.alter_column('messages', 'updated_at', server_default=None)
@@ -0,0 +1,31 @@
+"""scrub delivered email secrets
+
+Revision ID: f1c4a9d7e302
+Revises: e8b2c6d1f457
+Create Date: 2026-10-20 11:40:52.184467
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f1c4a9d7e302'
+down_revision: Union[str, Sequence[str], None] = 'e8b2c6d1f457'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Sent / failed rows queued before the worker cleared codes and magic links
+    op.execute(
+        "UPDATE email_outbox SET payload = (payload::jsonb - 'code' - 'magic_link_url')::json "
+        "WHERE status <> 'pending' AND (payload::jsonb ? 'code' OR payload::jsonb ? 'magic_link_url')"
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    pass
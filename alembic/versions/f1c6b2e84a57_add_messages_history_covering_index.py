@@ -0,0 +1,45 @@
+"""add messages history covering index
+
+Revision ID: f1c6b2e84a57
+Revises: e5a8f0d3c621
+Create Date: 2026-10-19 17:48:12.905316
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f1c6b2e84a57'
+down_revision: Union[str, Sequence[str], None] = 'e5a8f0d3c621'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Superset of ix_messages_company_created_at, which it replaces
+    op.create_index(
+        'ix_messages_company_history',
+        'messages',
+        ['company_id', sa.text('created_at DESC'), sa.text('id DESC')],
+        unique=False,
+        postgresql_include=[
+            'channel',
+            'message_type',
+            'status',
+            'external_id',
+            'sent_at',
+            'received_at',
+            'response_time_seconds',
+        ],
+    )
+    op.drop_index('ix_messages_company_created_at', table_name='messages')
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.create_index('ix_messages_company_created_at', 'messages', ['company_id', 'created_at'], unique=False)
+    op.drop_index('ix_messages_company_history', table_name='messages')
@@ -0,0 +1,40 @@
+"""add hot lookup indexes
+
+Revision ID: f7a3d9e1b604
+Revises: e4f9c6d2a815
+Create Date: 2026-10-19 22:17:30.664192
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f7a3d9e1b604'
+down_revision: Union[str, Sequence[str], None] = 'e4f9c6d2a815'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index('ix_channels_company_user_platform', 'channels', ['company_id', 'user_id', 'platform'], unique=False)
+    op.create_index('ix_channels_user_status', 'channels', ['user_id', 'status'], unique=False)
+    op.create_index('ix_channels_waha_session_id', 'channels', [sa.text("(config ->> 'session_id')")], unique=False)
+    op.create_index(op.f('ix_companies_user_id'), 'companies', ['user_id'], unique=False)
+    op.create_index('ix_subscriptions_user_created_at', 'subscriptions', ['user_id', sa.text('created_at DESC')], unique=False)
+    op.create_index(op.f('ix_users_stripe_customer_id'), 'users', ['stripe_customer_id'], unique=False)
+    op.create_index(op.f('ix_verification_codes_code'), 'verification_codes', ['code'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_verification_codes_code'), table_name='verification_codes')
+    op.drop_index(op.f('ix_users_stripe_customer_id'), table_name='users')
+    op.drop_index('ix_subscriptions_user_created_at', table_name='subscriptions')
+    op.drop_index(op.f('ix_companies_user_id'), table_name='companies')
+    op.drop_index('ix_channels_waha_session_id', table_name='channels')
+    op.drop_index('ix_channels_user_status', table_name='channels')
+    op.drop_index('ix_channels_company_user_platform', table_name='channels')
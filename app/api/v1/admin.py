@@ -1,108 +1,142 @@
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, Query
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select, func
-from typing import List
-from app.db.session import get_db
-from app.schemas.user import User as UserSchema
+from typing import Optional
+from datetime import datetime
+from app.db.session import get_db, pool_stats
+from app.schemas.user import UserPage
+from app.schemas.admin import TrialClientPage, PaidClientPage, SystemStats
 from app.core.deps import get_current_admin
-from app.models.user import User, UserRole
+from app.models.user import User, UserRole, SubscriptionTier
+from app.services.http_client import http_clients
+from app.services.resilience import upstream_guards
+from app.services.background import background_tasks
+from app.services.waha_sync import waha_session_sync
+from app.services.events import event_hub
+from app.services.entitlements import entitlements
+from app.services.stripe_events import stripe_events
+from app.services.billing import plan_catalog, payment_links
+from app.services.expiry import expiry_scheduler
+from app.services.email_delivery import email_delivery
+from app.services.verification_store import verification_store
+from app.services.client_lists import PAID_TIERS, users_page, trial_clients_page, paid_clients_page
 
 router = APIRouter(prefix="/api/v1/admin", tags=["admin"])
 
-@router.get("/managers", response_model=List[UserSchema])
+# Max clients per page of the admin stats lists
+MAX_STATS_PAGE = 200
+
+# Max users per page of the client/manager listings
+MAX_USERS_PAGE = 200
+
+@router.get("/managers", response_model=UserPage)
 async def get_all_managers(
+    cursor: Optional[str] = None,
+    limit: int = Query(50, ge=1, le=MAX_USERS_PAGE),
+    search: Optional[str] = Query(None, min_length=1, description="Email or name prefix"),
     current_admin: User = Depends(get_current_admin),
     db: AsyncSession = Depends(get_db)
 ):
-    """Get all managers with statistics"""
-    result = await db.execute(
-        select(User).where(User.role == UserRole.MANAGER)
-    )
-    managers = result.scalars().all()
-    return managers
+    """Get managers, one keyset page at a time"""
+    return await users_page(db, UserRole.MANAGER, limit, cursor, search=search)
 
-@router.get("/clients", response_model=List[UserSchema])
+@router.get("/clients", response_model=UserPage)
 async def get_all_clients(
+    cursor: Optional[str] = None,
+    limit: int = Query(50, ge=1, le=MAX_USERS_PAGE),
+    tier: Optional[SubscriptionTier] = None,
+    manager_id: Optional[int] = None,
+    trial_ends_after: Optional[datetime] = None,
+    trial_ends_before: Optional[datetime] = None,
+    search: Optional[str] = Query(None, min_length=1, description="Email or name prefix"),
     current_admin: User = Depends(get_current_admin),
     db: AsyncSession = Depends(get_db)
 ):
-    """Get all clients (non-confidential data)"""
-    result = await db.execute(
-        select(User).where(User.role == UserRole.CLIENT)
+    """Get clients (non-confidential data), filtered and one keyset page at a time"""
+    return await users_page(
+        db,
+        UserRole.CLIENT,
+        limit,
+        cursor,
+        tier=tier,
+        manager_id=manager_id,
+        trial_ends_after=trial_ends_after,
+        trial_ends_before=trial_ends_before,
+        search=search,
     )
-    clients = result.scalars().all()
-    return clients
 
-@router.get("/stats")
+@router.get("/stats", response_model=SystemStats)
 async def get_system_stats(
+    limit: int = Query(50, ge=1, le=MAX_STATS_PAGE, description="Clients per list"),
     current_admin: User = Depends(get_current_admin),
     db: AsyncSession = Depends(get_db)
 ):
-    """Get system-wide statistics with subscription details"""
-    from app.models.user import SubscriptionTier
-    from datetime import datetime, timezone
-
-    # Count managers
-    manager_count = await db.scalar(
-        select(func.count()).select_from(User).where(User.role == UserRole.MANAGER)
+    """
+    Get system-wide statistics with subscription details.
+    Counts come from one aggregate query; the trial/paid client lists are the
+    first page of /stats/trial-clients and /stats/paid-clients.
+    """
+    is_client = User.role == UserRole.CLIENT
+    result = await db.execute(
+        select(
+            func.count().filter(User.role == UserRole.MANAGER).label("total_managers"),
+            func.count().filter(is_client, User.subscription_tier.in_(PAID_TIERS)).label("clients_with_subscription"),
+            func.count().filter(is_client, User.subscription_tier == SubscriptionTier.TRIAL).label("clients_on_trial"),
+        ).select_from(User)
     )
+    counts = result.mappings().one()
 
-    # Count clients with paid subscriptions (not trial)
-    clients_with_subscription = await db.scalar(
-        select(func.count()).select_from(User).where(
-            User.role == UserRole.CLIENT,
-            User.subscription_tier.in_([SubscriptionTier.BASIC, SubscriptionTier.PRO, SubscriptionTier.ENTERPRISE])
-        )
-    )
+    trial = await trial_clients_page(db, limit)
+    paid = await paid_clients_page(db, limit)
 
-    # Get clients on trial
-    trial_clients_result = await db.execute(
-        select(User).where(
-            User.role == UserRole.CLIENT,
-            User.subscription_tier == SubscriptionTier.TRIAL
-        )
+    return SystemStats(
+        **counts,
+        trial_clients=trial.items,
+        trial_clients_next_cursor=trial.next_cursor,
+        paid_clients=paid.items,
+        paid_clients_next_cursor=paid.next_cursor,
     )
-    trial_clients = trial_clients_result.scalars().all()
 
-    # Get clients with paid subscriptions for renewal tracking
-    paid_clients_result = await db.execute(
-        select(User).where(
-            User.role == UserRole.CLIENT,
-            User.subscription_tier.in_([SubscriptionTier.BASIC, SubscriptionTier.PRO, SubscriptionTier.ENTERPRISE])
-        )
-    )
-    paid_clients = paid_clients_result.scalars().all()
 
-    # Calculate trial clients with days remaining
-    trial_clients_list = []
-    for client in trial_clients:
-        if client.trial_ends_at:
-            days_remaining = (client.trial_ends_at - datetime.now(timezone.utc)).days
-            trial_clients_list.append({
-                "id": client.id,
-                "email": client.email,
-                "full_name": client.full_name,
-                "days_remaining": max(0, days_remaining)
-            })
+@router.get("/stats/trial-clients", response_model=TrialClientPage)
+async def get_trial_clients(
+    cursor: Optional[str] = None,
+    limit: int = Query(50, ge=1, le=MAX_STATS_PAGE),
+    current_admin: User = Depends(get_current_admin),
+    db: AsyncSession = Depends(get_db)
+):
+    """Clients on trial with days remaining, trials ending soonest first"""
+    return await trial_clients_page(db, limit, cursor)
 
-    # Calculate paid clients with renewal dates
-    paid_clients_list = []
-    for client in paid_clients:
-        if client.subscription_ends_at:
-            days_until_renewal = (client.subscription_ends_at - datetime.now(timezone.utc)).days
-            paid_clients_list.append({
-                "id": client.id,
-                "email": client.email,
-                "full_name": client.full_name,
-                "subscription_tier": client.subscription_tier,
-                "days_until_renewal": max(0, days_until_renewal),
-                "renewal_date": client.subscription_ends_at.isoformat()
-            })
 
+@router.get("/stats/paid-clients", response_model=PaidClientPage)
+async def get_paid_clients(
+    cursor: Optional[str] = None,
+    limit: int = Query(50, ge=1, le=MAX_STATS_PAGE),
+    current_admin: User = Depends(get_current_admin),
+    db: AsyncSession = Depends(get_db)
+):
+    """Clients with paid subscriptions and their renewal dates, soonest first"""
+    return await paid_clients_page(db, limit, cursor)
+
+
+@router.get("/upstreams")
+async def get_upstream_metrics(
+    current_admin: User = Depends(get_current_admin)
+):
+    """Circuit breaker state per upstream and latency metrics per upstream host"""
     return {
-        "total_managers": manager_count,
-        "clients_with_subscription": clients_with_subscription,
-        "clients_on_trial": len(trial_clients),
-        "trial_clients": trial_clients_list,
-        "paid_clients": paid_clients_list
+        "upstreams": upstream_guards.status(),
+        "hosts": http_clients.metrics(),
+        "db_pool": pool_stats.snapshot(),
+        "background_tasks": background_tasks.status(),
+        "waha_sessions": waha_session_sync.snapshot(),
+        "event_streams": event_hub.snapshot(),
+        "entitlements": entitlements.snapshot(),
+        "stripe_events": stripe_events.snapshot(),
+        "stripe_prices": plan_catalog.snapshot(),
+        "payment_links": payment_links.snapshot(),
+        "subscription_expiry": expiry_scheduler.snapshot(),
+        "email_delivery": email_delivery.snapshot(),
+        "verification_codes": verification_store.snapshot()
     }
@@ -1,4 +1,5 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from typing import Optional
+from fastapi import APIRouter, Depends, Header, HTTPException, status
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
 from app.db.session import get_db
@@ -28,6 +29,7 @@ from app.core.deps import get_current_user
 from app.models.user import User
 from app.core.security import get_password_hash, verify_password
 from app.services.cloudinary import cloudinary_service
+from app.services.email_templates import preferred_locale
 
 router = APIRouter(prefix="/api/v1/auth", tags=["auth"])
 
@@ -35,7 +37,8 @@ router = APIRouter(prefix="/api/v1/auth", tags=["auth"])
 @router.post("/send-verification-code", status_code=status.HTTP_200_OK)
 async def send_verification_code(
     request: SendVerificationCodeRequest,
-    db: AsyncSession = Depends(get_db)
+    db: AsyncSession = Depends(get_db),
+    accept_language: Optional[str] = Header(None)
 ):
     """
     Step 1 of registration: Send verification code to email.
@@ -52,7 +55,7 @@ async def send_verification_code(
 
     # Generate and send verification code
     code = await create_verification_code(db, request.email)
-    await send_verification_email(request.email, code)
+    await send_verification_email(db, request.email, code, preferred_locale(accept_language))
 
     return {
         "message": "Verification code sent to email",
@@ -203,7 +206,8 @@ async def logout(current_user: User = Depends(get_current_user)):
 @router.post("/request-password-reset", status_code=status.HTTP_200_OK)
 async def request_password_reset(
     request: SendVerificationCodeRequest,
-    db: AsyncSession = Depends(get_db)
+    db: AsyncSession = Depends(get_db),
+    accept_language: Optional[str] = Header(None)
 ):
     """
     Step 1 of password reset: Send reset code to email.
@@ -217,7 +221,7 @@ async def request_password_reset(
     if user:
         # Generate and send reset code
         code = await create_verification_code(db, request.email)
-        await send_password_reset_email(request.email, code)
+        await send_password_reset_email(db, request.email, code, preferred_locale(accept_language))
 
     return {
         "message": "If the email exists, a password reset code has been sent",
@@ -288,7 +292,8 @@ async def reset_password(
 @router.post("/request-magic-link", status_code=status.HTTP_200_OK)
 async def request_magic_link(
     request: SendVerificationCodeRequest,
-    db: AsyncSession = Depends(get_db)
+    db: AsyncSession = Depends(get_db),
+    accept_language: Optional[str] = Header(None)
 ):
     """
     Request a magic link to be sent to email for passwordless login.
@@ -302,7 +307,7 @@ async def request_magic_link(
     if user:
         # Generate and send magic link
         token = await create_magic_link_token(db, request.email)
-        await send_magic_link_email(request.email, token)
+        await send_magic_link_email(db, request.email, token, preferred_locale(accept_language))
 
     return {
         "message": "If the email exists, a magic link has been sent",
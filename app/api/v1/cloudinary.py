@@ -1,13 +1,27 @@
 from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Form
+from pydantic import BaseModel, Field
 from typing import List, Optional
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
 from app.core.deps import get_current_user, get_db
 from app.models.user import User
+from app.models.company import Company
 from app.services.cloudinary import cloudinary_service
+from app.services.supabase import supabase_service
 
 router = APIRouter(prefix="/api/v1/cloudinary", tags=["cloudinary"])
 
+# Upper bound for one bulk delete request (split into Admin API chunks by the service)
+MAX_BULK_DELETE = 500
+
+
+class BulkDeleteRequest(BaseModel):
+    """Request model for bulk media deletion"""
+    public_ids: List[str] = Field(..., min_length=1, max_length=MAX_BULK_DELETE)
+    cascade: bool = False  # Also clear image_url/video_url references in the user's KB tables
+
 
 @router.post("/upload")
 async def upload_media(
@@ -173,3 +187,84 @@ async def delete_media(
 
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to delete file: {str(e)}")
+
+
+@router.post("/media/bulk-delete")
+async def bulk_delete_media(
+    request: BulkDeleteRequest,
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Delete many media files from Cloudinary in one request.
+    Every public_id must live in the user's folder (users/{user_id}/...);
+    others are reported as "forbidden" and left untouched.
+    With cascade=true, KB rows referencing the deleted files get their
+    image_url/video_url cleared.
+    """
+    if not cloudinary_service.is_configured():
+        raise HTTPException(status_code=500, detail="Cloudinary is not configured")
+
+    user_folder_prefix = f"users/{current_user.id}/"
+
+    statuses = {}
+    allowed_ids = []
+    for public_id in dict.fromkeys(request.public_ids):
+        if public_id.startswith(user_folder_prefix):
+            allowed_ids.append(public_id)
+        else:
+            statuses[public_id] = "forbidden"
+
+    try:
+        statuses.update(await cloudinary_service.delete_files(allowed_ids))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to delete files: {str(e)}")
+
+    references_cleared = None
+    cascade_errors = []
+
+    if request.cascade and supabase_service.is_configured():
+        # users/{user_id}/{product|service}/... -> ids grouped by KB type
+        ids_by_kb_type = {}
+        for public_id in allowed_ids:
+            if statuses.get(public_id) != "deleted":
+                continue
+            folder = public_id[len(user_folder_prefix):].split("/", 1)[0]
+            kb_type = folder.capitalize()
+            if kb_type in ("Product", "Service"):
+                ids_by_kb_type.setdefault(kb_type, []).append(public_id)
+
+        if ids_by_kb_type:
+            result = await db.execute(
+                select(Company.name).where(Company.user_id == current_user.id)
+            )
+            company_names = result.scalars().all()
+
+            references_cleared = 0
+            for kb_type, public_ids in ids_by_kb_type.items():
+                for company_name in company_names:
+                    table_name = supabase_service.generate_table_name(company_name, kb_type)
+                    try:
+                        references_cleared += await supabase_service.clear_media_references(
+                            table_name=table_name,
+                            public_ids=public_ids
+                        )
+                    except Exception as e:
+                        cascade_errors.append({"table_name": table_name, "error": str(e)})
+
+    results = [
+        {"public_id": public_id, "status": result_status}
+        for public_id, result_status in statuses.items()
+    ]
+    deleted = sum(1 for r in results if r["status"] == "deleted")
+    not_found = sum(1 for r in results if r["status"] == "not_found")
+
+    return {
+        "success": deleted == len(results),
+        "deleted": deleted,
+        "not_found": not_found,
+        "failed": len(results) - deleted - not_found,
+        "results": results,
+        "references_cleared": references_cleared,
+        "cascade_errors": cascade_errors
+    }
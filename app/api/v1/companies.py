@@ -1,20 +1,47 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, status
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
-from typing import List
+from sqlalchemy import select, tuple_
+from typing import List, Optional
+from datetime import datetime, timezone
 from app.db.session import get_db
 from app.schemas.company import Company as CompanySchema, CompanyCreate, CompanyUpdate
+from app.schemas.analytics import TimeseriesResponse, ResponseTimeResponse
+from app.schemas.message import MessageOut, MessagePage
 from app.core.deps import get_current_user
 from app.models.user import User
 from app.models.company import Company
 from app.models.channel import Channel, ChannelPlatform, ChannelStatus
+from app.models.message import Message, MessageType, MessageStatus
+from app.core.pagination import encode_cursor, decode_cursor
 from app.core.config import settings
+from app.services.http_client import http_clients
+from app.services.rollups import message_rollups, GRANULARITIES
+from app.services.sketches import response_time_sketches
 import random
 import string
-import httpx
 
 router = APIRouter(prefix="/api/v1/companies", tags=["companies"])
 
+# Max buckets returned by the analytics time series
+MAX_TIMESERIES_POINTS = 1000
+DEFAULT_TIMESERIES_POINTS = {"hour": 48, "day": 30}
+
+# Message history page size
+MAX_MESSAGES_PAGE = 200
+
+# Columns of a compact message page (all in the covering index ix_messages_company_history)
+COMPACT_MESSAGE_COLUMNS = (
+    Message.id,
+    Message.channel,
+    Message.message_type,
+    Message.status,
+    Message.external_id,
+    Message.sent_at,
+    Message.received_at,
+    Message.response_time_seconds,
+    Message.created_at,
+)
+
 
 def generate_company_id(prefix: str = "COMP") -> str:
     random_num = ''.join(random.choices(string.digits, k=3))
@@ -50,23 +77,24 @@ async def create_supabase_table(company_name: str, product_type: str) -> None:
     # For now, store metadata about the table
     try:
         # Insert a record into a metadata table via Supabase REST API
-        async with httpx.AsyncClient() as client:
-            response = await client.post(
-                f"{settings.SUPABASE_URL}/rest/v1/company_tables",
-                headers={
-                    "apikey": settings.SUPABASE_SERVICE_ROLE_KEY,
-                    "Authorization": f"Bearer {settings.SUPABASE_SERVICE_ROLE_KEY}",
-                    "Content-Type": "application/json",
-                    "Prefer": "return=minimal"
-                },
-                json={
-                    "table_name": table_name,
-                    "company_name": company_name,
-                    "product_type": product_type,
-                    "created_at": "now()"
-                },
-                timeout=10.0
-            )
+        response = await http_clients.request(
+            "supabase",
+            "POST",
+            f"{settings.SUPABASE_URL}/rest/v1/company_tables",
+            headers={
+                "apikey": settings.SUPABASE_SERVICE_ROLE_KEY,
+                "Authorization": f"Bearer {settings.SUPABASE_SERVICE_ROLE_KEY}",
+                "Content-Type": "application/json",
+                "Prefer": "return=minimal"
+            },
+            json={
+                "table_name": table_name,
+                "company_name": company_name,
+                "product_type": product_type,
+                "created_at": "now()"
+            },
+            timeout=10.0
+        )
 
             # If the company_tables metadata table doesn't exist, this will fail silently
             # The table creation can be handled separately via Supabase migrations or manual setup
@@ -420,3 +448,175 @@ async def get_company_channels(
 
     # Return list of platform names
     return [ch.platform.value for ch in channels]
+
+
+@router.get("/{company_id}/analytics/timeseries", response_model=TimeseriesResponse)
+async def get_company_timeseries(
+    company_id: int,
+    granularity: str = Query("day", pattern="^(hour|day)$"),
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    channel: Optional[str] = None,
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Per-channel message trends (types, payment-link conversion, response time).
+    Served from the hourly/daily rollup tables, which lag real time by about a minute.
+    """
+    # Verify company belongs to user
+    result = await db.execute(
+        select(Company.id).where(
+            Company.id == company_id,
+            Company.user_id == current_user.id
+        )
+    )
+    if result.scalar_one_or_none() is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Company not found"
+        )
+
+    _, step = GRANULARITIES[granularity]
+    end = end or datetime.now(timezone.utc)
+    start = start or end - step * DEFAULT_TIMESERIES_POINTS[granularity]
+    if start >= end:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="start must be before end"
+        )
+    if (end - start) / step > MAX_TIMESERIES_POINTS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Range too large: at most {MAX_TIMESERIES_POINTS} {granularity} buckets"
+        )
+
+    series = await message_rollups.timeseries(db, company_id, granularity, start, end, channel)
+
+    return TimeseriesResponse(
+        company_id=company_id,
+        granularity=granularity,
+        start=start,
+        end=end,
+        series=series,
+    )
+
+
+@router.get("/{company_id}/analytics/response-times", response_model=ResponseTimeResponse)
+async def get_company_response_times(
+    company_id: int,
+    granularity: str = Query("day", pattern="^(hour|day)$"),
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    channel: Optional[str] = None,
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Per-channel p50/p90/p99 response time (seconds, within 1%).
+    Merged from hourly quantile sketches, which lag real time by up to a minute.
+    """
+    # Verify company belongs to user
+    result = await db.execute(
+        select(Company.id).where(
+            Company.id == company_id,
+            Company.user_id == current_user.id
+        )
+    )
+    if result.scalar_one_or_none() is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Company not found"
+        )
+
+    _, step = GRANULARITIES[granularity]
+    end = end or datetime.now(timezone.utc)
+    start = start or end - step * DEFAULT_TIMESERIES_POINTS[granularity]
+    if start >= end:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="start must be before end"
+        )
+    if (end - start) / step > MAX_TIMESERIES_POINTS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Range too large: at most {MAX_TIMESERIES_POINTS} {granularity} buckets"
+        )
+
+    series = await response_time_sketches.quantiles(db, company_id, step, start, end, channel)
+
+    return ResponseTimeResponse(
+        company_id=company_id,
+        granularity=granularity,
+        start=start,
+        end=end,
+        series=series,
+    )
+
+
+@router.get(
+    "/{company_id}/messages",
+    response_model=MessagePage,
+    response_model_exclude_unset=True,
+)
+async def list_company_messages(
+    company_id: int,
+    cursor: Optional[str] = None,
+    limit: int = Query(50, ge=1, le=MAX_MESSAGES_PAGE),
+    channel: Optional[str] = None,
+    message_type: Optional[MessageType] = None,
+    message_status: Optional[MessageStatus] = Query(None, alias="status"),
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    compact: bool = Query(False, description="Leave out `content` (list views)"),
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Message history, newest first, with keyset pagination on (created_at, id).
+    Every page is an index range scan on ix_messages_company_history, whatever the depth;
+    compact pages are served from the index alone.
+    """
+    # Verify company belongs to user
+    result = await db.execute(
+        select(Company.id).where(
+            Company.id == company_id,
+            Company.user_id == current_user.id
+        )
+    )
+    if result.scalar_one_or_none() is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Company not found"
+        )
+
+    columns = COMPACT_MESSAGE_COLUMNS if compact else COMPACT_MESSAGE_COLUMNS + (Message.content,)
+    query = select(*columns).where(Message.company_id == company_id)
+
+    if channel:
+        query = query.where(Message.channel == channel)
+    if message_type:
+        query = query.where(Message.message_type == message_type)
+    if message_status:
+        query = query.where(Message.status == message_status)
+    if start:
+        query = query.where(Message.created_at >= start)
+    if end:
+        query = query.where(Message.created_at < end)
+
+    after = decode_cursor(cursor, datetime, int)
+    if after:
+        query = query.where(tuple_(Message.created_at, Message.id) < tuple(after))
+
+    result = await db.execute(
+        query.order_by(Message.created_at.desc(), Message.id.desc()).limit(limit + 1)
+    )
+    rows = result.mappings().all()
+
+    items = [MessageOut(**row) for row in rows[:limit]]
+    next_cursor = None
+    if len(rows) > limit:
+        last = rows[limit - 1]
+        next_cursor = encode_cursor(last["created_at"], last["id"])
+
+    return MessagePage(items=items, next_cursor=next_cursor)
@@ -0,0 +1,83 @@
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, status
+from fastapi.responses import StreamingResponse
+from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Optional
+import asyncio
+
+from app.db.session import get_db, release_connection
+from app.core.deps import get_current_user
+from app.models.user import User
+from app.services.events import event_hub, format_event
+
+router = APIRouter(prefix="/api/v1/events", tags=["events"])
+
+# Seconds between keep-alive comments (proxies close idle connections)
+HEARTBEAT_INTERVAL = 15.0
+
+# Client reconnect delay sent in the stream (milliseconds)
+RETRY_MS = 3000
+
+# Open streams per user (browser tabs)
+MAX_STREAMS_PER_USER = 5
+
+optional_bearer = HTTPBearer(auto_error=False)
+
+
+async def get_stream_user(
+    credentials: Optional[HTTPAuthorizationCredentials] = Depends(optional_bearer),
+    token: Optional[str] = Query(None, description="Access token (EventSource cannot send headers)"),
+    db: AsyncSession = Depends(get_db)
+) -> User:
+    if credentials is None and token:
+        credentials = HTTPAuthorizationCredentials(scheme="Bearer", credentials=token)
+    if credentials is None:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Not authenticated",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    return await get_current_user(credentials, db)
+
+
+@router.get("/stream")
+async def stream_events(
+    request: Request,
+    current_user: User = Depends(get_stream_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Server-Sent Events stream of the user's dashboard updates:
+    `channel.status`, `company.counters`, `kb.import`.
+    """
+    if event_hub.stream_count(current_user.id) >= MAX_STREAMS_PER_USER:
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail=f"At most {MAX_STREAMS_PER_USER} open event streams per user"
+        )
+
+    # The stream stays open for hours: don't hold a pooled connection for it
+    await release_connection(db)
+    user_id = current_user.id
+
+    async def frames():
+        async with event_hub.subscribe(user_id) as queue:
+            yield f"retry: {RETRY_MS}\n\n"
+            yield format_event("ready", {"user_id": user_id})
+            while not await request.is_disconnected():
+                try:
+                    frame = await asyncio.wait_for(queue.get(), HEARTBEAT_INTERVAL)
+                except asyncio.TimeoutError:
+                    frame = ": ping\n\n"
+                if frame is None:
+                    break
+                yield frame
+
+    return StreamingResponse(
+        frames(),
+        media_type="text/event-stream",
+        headers={
+            "Cache-Control": "no-cache",
+            "X-Accel-Buffering": "no",  # nginx: don't buffer the stream
+        },
+    )
@@ -0,0 +1,47 @@
+from fastapi import APIRouter, Depends, HTTPException, Header, status
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Optional
+import hmac
+
+from app.db.session import get_db
+from app.core.config import settings
+from app.schemas.message import MessageIngestRequest, MessageIngestResponse
+from app.services.ingest import message_ingestor
+
+router = APIRouter(prefix="/api/v1/ingest", tags=["ingest"])
+
+
+def verify_ingest_secret(x_webhook_secret: Optional[str] = Header(None)) -> None:
+    """Shared-secret auth for machine-to-machine webhooks (n8n, WAHA)."""
+    secret = settings.INGEST_WEBHOOK_SECRET
+    if not secret:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Message ingestion is not configured",
+        )
+    if not x_webhook_secret or not hmac.compare_digest(x_webhook_secret, secret):
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid webhook secret",
+        )
+
+
+@router.post(
+    "/messages",
+    response_model=MessageIngestResponse,
+    dependencies=[Depends(verify_ingest_secret)],
+)
+async def ingest_messages(
+    request: MessageIngestRequest,
+    db: AsyncSession = Depends(get_db),
+):
+    """
+    Batched message webhook for channel flows.
+
+    Events are deduplicated by (company_id, channel, external_id) through
+    the message_keys table, so a retried batch is safe to resend. With
+    `upsert` set, stored messages get the new status/timestamps instead.
+    Events for unknown companies are counted as rejected.
+    """
+    result = await message_ingestor.ingest(db, request.messages, upsert=request.upsert)
+    return MessageIngestResponse(**result)
@@ -3,10 +3,10 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
 from typing import List
 from app.core.deps import get_current_user, get_db
+from app.db.session import release_connection
 from app.models.user import User
 from app.models.company import Company
 from app.models.channel import Channel, ChannelPlatform, ChannelStatus
-from app.models.subscription import Subscription, SubscriptionPlan
 from app.schemas.integration import (
     AvailableChannels,
     IntegrationListResponse,
@@ -19,9 +19,15 @@ from app.schemas.integration import (
     GoogleCalendarCallbackRequest,
     GoogleCalendarStatusResponse,
 )
-import httpx
 from app.core.config import settings
+from app.services.waha_sync import waha_session_sync, channel_status_event
+from app.services.events import event_hub
+from app.services.entitlements import entitlements
+from app.services.waha_sessions import waha_sessions, LEGACY_SESSION_ID
 from datetime import datetime, timedelta
+import hashlib
+import hmac
+import json
 import secrets
 from google.oauth2.credentials import Credentials
 from google_auth_oauthlib.flow import Flow
@@ -32,89 +38,33 @@ import re
 router = APIRouter(prefix="/api/v1/integrations", tags=["integrations"])
 
 
-# ==================== PLAN CONFIG ====================
-
-PLAN_CHANNELS = {
-    SubscriptionPlan.FREE: {
-        "whatsapp": True,
-        "telegram": True,
-        "instagram": True,
-        "facebook": True,
-        "email": True,
-        "tiktok": True,
-    },
-    SubscriptionPlan.SINGLE: {
-        "whatsapp": True,
-        "telegram": True,
-        "instagram": True,
-        "facebook": True,
-        "email": True,
-        "tiktok": True,
-    },
-    SubscriptionPlan.DOUBLE: {
-        "whatsapp": True,
-        "telegram": True,
-        "instagram": True,
-        "facebook": True,
-        "email": True,
-        "tiktok": True,
-    },
-    SubscriptionPlan.GROWTH: {
-        "whatsapp": True,
-        "telegram": True,
-        "instagram": True,
-        "facebook": True,
-        "email": True,
-        "tiktok": True,
-    },
-    SubscriptionPlan.ENTERPRISE: {
-        "whatsapp": True,
-        "telegram": True,
-        "instagram": True,
-        "facebook": True,
-        "email": True,
-        "tiktok": True,
-    },
-}
-
-PLAN_CHANNEL_LIMITS = {
-    SubscriptionPlan.FREE: 1,
-    SubscriptionPlan.SINGLE: 1,
-    SubscriptionPlan.DOUBLE: 2,
-    SubscriptionPlan.GROWTH: 4,
-    SubscriptionPlan.ENTERPRISE: None,
-}
-
-
-async def get_user_subscription_plan(user_id: int, db: AsyncSession) -> SubscriptionPlan:
-    result = await db.execute(
-        select(Subscription)
-        .where(Subscription.user_id == user_id)
-        .order_by(Subscription.created_at.desc())
-    )
-    subscription = result.scalar_one_or_none()
-    if subscription:
-        return subscription.plan
-    return SubscriptionPlan.FREE
+async def check_channel_limit(user_id: int, db: AsyncSession) -> None:
+    await entitlements.require_channel_slot(db, user_id)
 
 
-async def check_channel_limit(user_id: int, db: AsyncSession) -> None:
-    plan = await get_user_subscription_plan(user_id, db)
-    limit = PLAN_CHANNEL_LIMITS.get(plan)
+async def discard_pending_channel(db: AsyncSession, channel: Channel, created: bool, config: dict) -> None:
+    """
+    Откат после неудачного подключения к WAHA (соединение уже отдавали в пул):
+    созданный в этом запросе канал удаляем вместе с его WAHA-сессией,
+    у существующего возвращаем прежний config — отдельной короткой транзакцией.
+    """
+    pending_config = channel.config
+    try:
+        if created:
+            await db.delete(channel)
+        else:
+            channel.config = config
+        await db.commit()
+    except Exception as e:
+        await db.rollback()
+        print(f"Cleanup of WhatsApp channel {channel.id} failed: {str(e)}")
+        return
 
-    if limit is not None:
-        result = await db.execute(
-            select(Channel).where(
-                Channel.user_id == user_id,
-                Channel.status == ChannelStatus.CONNECTED,
-            )
-        )
-        connected_count = len(result.scalars().all())
-        if connected_count >= limit:
-            raise HTTPException(
-                status_code=status.HTTP_403_FORBIDDEN,
-                detail=f"Channel limit reached. Your {plan.value} plan allows maximum {limit} channels.",
-            )
+    if created:
+        try:
+            await waha_sessions.release(pending_config)
+        except Exception as e:
+            print(f"WAHA session release for channel {channel.id} failed: {str(e)}")
 
 
 @router.get("/available", response_model=IntegrationListResponse)
@@ -122,80 +72,28 @@ async def get_available_integrations(
     current_user: User = Depends(get_current_user),
     db: AsyncSession = Depends(get_db),
 ):
-    plan = await get_user_subscription_plan(current_user.id, db)
+    plan_info = await entitlements.get(db, current_user.id)
 
     result = await db.execute(
         select(Channel).where(Channel.user_id == current_user.id)
     )
-    connected_channels = result.scalars().all()
-
     connected_integrations = [
         ChannelIntegrationResponse.model_validate(channel)
-        for channel in connected_channels
+        for channel in result.scalars().all()
     ]
 
-    connected_count = len(
-        [ch for ch in connected_channels if ch.status == ChannelStatus.CONNECTED]
-    )
-
-    trial_end_date = None
-    days_left = None
-    trial_expired = False
-    is_enterprise = False
-
-    if plan == SubscriptionPlan.FREE:
-        result = await db.execute(
-            select(Subscription)
-            .where(Subscription.user_id == current_user.id)
-            .order_by(Subscription.created_at.desc())
-        )
-        subscription = result.scalar_one_or_none()
-        if subscription and subscription.end_date:
-            trial_end_date = subscription.end_date
-            days_left = (subscription.end_date - datetime.utcnow()).days
-            if days_left < 0:
-                days_left = 0
-                trial_expired = True
-
-        if trial_expired:
-            # триал кончился — вообще ничего нельзя
-            available_channels = AvailableChannels(
-                whatsapp=False,
-                telegram=False,
-                instagram=False,
-                facebook=False,
-                email=False,
-                tiktok=False,
-            )
-        elif plan == SubscriptionPlan.ENTERPRISE:
-            # энтерпрайз настраиваем руками, поэтому тоже не даём стандартный UI
-            is_enterprise = True
-            available_channels = AvailableChannels(
-                whatsapp=False,
-                telegram=False,
-                instagram=False,
-                facebook=False,
-                email=False,
-                tiktok=False,
-            )
-        else:
-            # для всех обычных планов: только тариф решает, какие каналы вообще доступны
-            channels_config = PLAN_CHANNELS.get(
-                plan, PLAN_CHANNELS[SubscriptionPlan.FREE]
-            )
-            available_channels = AvailableChannels(**channels_config)
-
-
-    channel_limit = PLAN_CHANNEL_LIMITS.get(plan)
+    # триал кончился — вообще ничего нельзя; энтерпрайз настраиваем руками,
+    # для остальных планов только тариф решает, какие каналы доступны
+    available_channels = AvailableChannels(**plan_info.available_channels())
 
     return IntegrationListResponse(
         available_channels=available_channels,
         connected_integrations=connected_integrations,
-        current_plan=plan.value,
-        trial_end_date=trial_end_date,
-        days_left=days_left,
-        channel_limit=channel_limit,
-        is_enterprise=is_enterprise,
+        current_plan=plan_info.plan.value,
+        trial_end_date=plan_info.trial_end_date,
+        days_left=plan_info.days_left,
+        channel_limit=plan_info.channel_limit,
+        is_enterprise=plan_info.is_enterprise,
     )
 
 
@@ -208,11 +106,12 @@ async def connect_whatsapp(
     db: AsyncSession = Depends(get_db),
 ):
     """
-    Берём pairing-code у WAHA-сессии 'default'.
+    Берём pairing-code у отдельной WAHA-сессии канала ("channel-{id}").
+    Сессия создаётся/запускается на наименее загруженном WAHA-узле.
     """
     await check_channel_limit(current_user.id, db)
 
-    if not settings.WAHA_API_URL or not settings.WAHA_API_KEY:
+    if not waha_sessions.is_configured():
         raise HTTPException(
             status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
             detail="WAHA service is not configured",
@@ -232,7 +131,6 @@ async def connect_whatsapp(
             detail="Company not found",
         )
 
-    session_id = "default"
     raw_phone = (request.business_number or "").strip()
     phone_digits = re.sub(r"\D", "", raw_phone)
 
@@ -242,85 +140,92 @@ async def connect_whatsapp(
             detail="Invalid phone number",
         )
 
+    # Канал нужен заранее: его id — имя WAHA-сессии
+    result = await db.execute(
+        select(Channel).where(
+            Channel.company_id == request.company_id,
+            Channel.user_id == current_user.id,
+            Channel.platform == ChannelPlatform.WHATSAPP,
+        )
+    )
+    channel = result.scalar_one_or_none()
+    created = channel is None
+    if created:
+        channel = Channel(
+            company_id=request.company_id,
+            user_id=current_user.id,
+            platform=ChannelPlatform.WHATSAPP,
+            status=ChannelStatus.CONNECTING,
+            platform_account_id=request.business_number,
+        )
+        db.add(channel)
+        await db.flush()
+
+    config = channel.config or {}
+    session_id = config.get("session_id")
+    if session_id and session_id != LEGACY_SESSION_ID and config.get("waha_node"):
+        node = waha_sessions.node_for(config)
+    else:
+        session_id = waha_sessions.session_name(channel.id)
+        node = await waha_sessions.pick_node(db)
+
+    channel.config = {**config, "session_id": session_id, "waha_node": node.url}
+
+    # Всё нужное прочитано/записано — отдаём соединение в пул на время запросов к WAHA,
+    # результат сохраняем ниже в новой короткой транзакции
+    await release_connection(db)
+
     try:
-        async with httpx.AsyncClient() as client:
-            # 👉 СЮДА ДОБАВЛЕН json с phoneNumber
-            code_resp = await client.post(
-                f"{settings.WAHA_API_URL}/api/{session_id}/auth/request-code",
-                headers={
-                    "X-Api-Key": settings.WAHA_API_KEY,
-                    "Accept": "application/json",
-                    "Content-Type": "application/json",
-                },
-                json={
-                    "phoneNumber": phone_digits,
-                },
-                timeout=30.0,
-            )
+        await waha_sessions.ensure_started(node, session_id)
 
-            try:
-                code_json = code_resp.json()
-            except Exception:
-                code_json = {}
-
-            if code_resp.status_code >= 400:
-                raise HTTPException(
-                    status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
-                    detail={
-                        "message": "WAHA failed to generate pairing code",
-                        "error": code_json or {"raw": code_resp.text},
-                    },
-                )
-
-            pairing_code = (
-                code_json.get("code")
-                or code_json.get("data")
-                or code_json.get("qr")
-                or code_json.get("pairingCode")
-            )
+        # 👉 СЮДА ДОБАВЛЕН json с phoneNumber
+        code_resp = await waha_sessions.request_pairing_code(node, session_id, phone_digits)
 
-            if not pairing_code:
-                raise HTTPException(
-                    status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
-                    detail={
-                        "message": "WAHA did not return pairing code",
-                        "error": code_json,
-                    },
-                )
+        try:
+            code_json = code_resp.json()
+        except Exception:
+            code_json = {}
 
-        # сохраняем канал
-        result = await db.execute(
-            select(Channel).where(
-                Channel.company_id == request.company_id,
-                Channel.user_id == current_user.id,
-                Channel.platform == ChannelPlatform.WHATSAPP,
+        if code_resp.status_code >= 400:
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail={
+                    "message": "WAHA failed to generate pairing code",
+                    "error": code_json or {"raw": code_resp.text},
+                },
             )
+
+        pairing_code = (
+            code_json.get("code")
+            or code_json.get("data")
+            or code_json.get("qr")
+            or code_json.get("pairingCode")
         )
-        channel = result.scalar_one_or_none()
 
+        if not pairing_code:
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail={
+                    "message": "WAHA did not return pairing code",
+                    "error": code_json,
+                },
+            )
+
+        # сохраняем канал
         expires_at = datetime.utcnow() + timedelta(minutes=5)
 
-        if channel:
-            channel.status = ChannelStatus.CONNECTING
-            channel.qr_code = str(pairing_code)
-            channel.qr_code_expires_at = expires_at
-            channel.config = {**(channel.config or {}), "session_id": session_id}
-            channel.platform_account_id = request.business_number
-        else:
-            channel = Channel(
-                company_id=request.company_id,
-                user_id=current_user.id,
-                platform=ChannelPlatform.WHATSAPP,
-                status=ChannelStatus.CONNECTING,
-                qr_code=str(pairing_code),
-                qr_code_expires_at=expires_at,
-                config={"session_id": session_id},
-                platform_account_id=request.business_number,
-            )
-            db.add(channel)
+        channel.status = ChannelStatus.CONNECTING
+        channel.qr_code = str(pairing_code)
+        channel.qr_code_expires_at = expires_at
+        channel.platform_account_id = request.business_number
 
         await db.commit()
         await db.refresh(channel)
+        entitlements.invalidate(current_user.id)
+
+        await event_hub.publish(current_user.id, "channel.status", channel_status_event(
+            channel.company_id, channel.id, channel.status, channel.platform_account_id
+        ))
 
         return WhatsAppQRResponse(
             qr_code=str(pairing_code),
@@ -328,9 +233,12 @@ async def connect_whatsapp(
             expires_at=expires_at,
         )
 
-    except HTTPException:
-        raise
     except Exception as e:
+        # Канал/сессия уже закоммичены release_connection — без отката остался бы
+        # висящий CONNECTING-канал (виден в /available, учитывается в нагрузке узлов)
+        await discard_pending_channel(db, channel, created, config)
+        if isinstance(e, HTTPException):
+            raise
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Failed to initialize WhatsApp connection: {str(e)}",
@@ -359,75 +267,10 @@ async def get_whatsapp_status(
             connected=False,
         )
 
-    session_id = (channel.config or {}).get("session_id")
+    # Состояние сессий WAHA синхронизирует фоновая задача (app.services.waha_sync)
+    # и вебхук ниже — здесь только читаем канал из БД, без запроса к WAHA
     is_connected = channel.status == ChannelStatus.CONNECTED
 
-    if session_id and settings.WAHA_API_URL and settings.WAHA_API_KEY:
-        try:
-            async with httpx.AsyncClient() as client:
-                resp = await client.get(
-                    f"{settings.WAHA_API_URL}/api/sessions",
-                    params={"all": "true"},
-                    headers={
-                        "X-Api-Key": settings.WAHA_API_KEY,
-                        "Accept": "application/json",
-                    },
-                    timeout=10.0,
-                )
-                resp.raise_for_status()
-                data = resp.json()
-
-            if isinstance(data, dict):
-                sessions = data.get("data") or data.get("sessions") or []
-            else:
-                sessions = data
-
-            session_info = None
-            for s in sessions:
-                sid = (
-                    s.get("id")
-                    or s.get("name")
-                    or s.get("sessionId")
-                    or s.get("session_id")
-                )
-                if sid == session_id:
-                    session_info = s
-                    break
-
-            if session_info is not None:
-                status_str = (session_info.get("status") or "").upper()
-                state_str = (session_info.get("state") or "").upper()
-
-                account = session_info.get("account") or {}
-                phone = (
-                    account.get("phoneNumber")
-                    or session_info.get("phoneNumber")
-                    or session_info.get("phone")
-                )
-
-                # подключен ТОЛЬКО если реально есть номер
-                has_phone = bool(phone)
-                is_connected = has_phone
-
-                new_status = ChannelStatus.CONNECTED if is_connected else ChannelStatus.DISCONNECTED
-
-                if (
-                    channel.status != new_status
-                    or (phone and phone != channel.platform_account_id)
-                ):
-                    channel.status = new_status
-                    if is_connected:
-                        channel.qr_code = None
-                        channel.qr_code_expires_at = None
-                    if phone:
-                        channel.platform_account_id = phone
-
-                    await db.commit()
-                    await db.refresh(channel)
-
-        except Exception as e:
-            pass
-
     return WhatsAppStatusResponse(
         status=channel.status,
         connected=is_connected,
@@ -436,6 +279,36 @@ async def get_whatsapp_status(
     )
 
 
+@router.post("/whatsapp/webhook")
+async def whatsapp_webhook(request: Request):
+    """
+    WAHA webhook (session.status events).
+    WAHA must be configured to sign webhooks with HMAC SHA512 using WAHA_API_KEY as the key.
+    """
+    if not settings.WAHA_API_KEY:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="WAHA service is not configured",
+        )
+
+    body = await request.body()
+    signature = request.headers.get("X-Webhook-Hmac", "")
+    expected = hmac.new(settings.WAHA_API_KEY.encode(), body, hashlib.sha512).hexdigest()
+    if not hmac.compare_digest(signature, expected):
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid webhook signature",
+        )
+
+    try:
+        event = json.loads(body)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid payload")
+
+    updated = await waha_session_sync.handle_webhook(event)
+    return {"status": "success", "updated": updated}
+
+
 @router.delete("/whatsapp/disconnect/{company_id}")
 async def disconnect_whatsapp(
     company_id: int,
@@ -457,23 +330,11 @@ async def disconnect_whatsapp(
             detail="WhatsApp integration not found",
         )
 
-    session_id = (channel.config or {}).get("session_id")
-
-    # 1. Разлогинимся в WAHA (но default-сессию не убиваем)
-    if session_id and settings.WAHA_API_URL and settings.WAHA_API_KEY:
+    # 1. Разлогинимся в WAHA и удалим сессию канала (default-сессию не убиваем)
+    if (channel.config or {}).get("session_id") and waha_sessions.is_configured():
+        await release_connection(db)
         try:
-            async with httpx.AsyncClient() as client:
-                # самый распространённый вариант
-                try:
-                    await client.post(
-                        f"{settings.WAHA_API_URL}/api/{session_id}/logout",
-                        headers={"X-Api-Key": settings.WAHA_API_KEY},
-                        timeout=10.0,
-                    )
-                except Exception:
-                    # если у тебя другой путь (например /api/{id}/auth/logout),
-                    # просто поправь URL и можешь удалить этот except
-                    pass
+            await waha_sessions.release(channel.config)
         except Exception:
             # WAHA недоступен — просто продолжаем и чистим БД
             pass
@@ -481,6 +342,11 @@ async def disconnect_whatsapp(
     # 2. Удаляем канал из БД
     await db.delete(channel)
     await db.commit()
+    entitlements.invalidate(current_user.id)
+
+    await event_hub.publish(current_user.id, "channel.status", channel_status_event(
+        company_id, None, ChannelStatus.DISCONNECTED
+    ))
 
     return {"message": "WhatsApp disconnected successfully"}
 
@@ -603,6 +469,7 @@ async def google_calendar_callback(
             db.add(channel)
 
         await db.commit()
+        entitlements.invalidate(user_id)
 
         return {
             "message": "Google Calendar connected successfully",
@@ -11,8 +11,9 @@ from app.core.deps import get_current_user, get_db
 from app.models.user import User
 from app.services.supabase import supabase_service
 from app.services.cloudinary import cloudinary_service
+from app.services.events import event_hub
 
-from uuid import UUID
+from uuid import UUID, uuid4
 from pprint import pprint
 
 router = APIRouter(prefix="/api/v1/knowledge-base", tags=["knowledge-base"])
@@ -23,12 +24,14 @@ async def upload_csv(
     file: UploadFile = File(...),
     company_name: str = Form(...),
     kb_type: str = Form(...),  # "Product" or "Service"
+    import_id: Optional[str] = Form(None),  # Correlates `kb.import` progress events
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
     """
     Upload a CSV file for Product or Service knowledge base.
     Creates/updates a Supabase table with the data.
+    Progress is pushed to the user's event stream as `kb.import` events.
     """
     if not supabase_service.is_configured():
         raise HTTPException(
@@ -99,19 +102,35 @@ async def upload_csv(
 
         # Create table name
         table_name = supabase_service.generate_table_name(company_name, kb_type)
+        import_id = import_id or uuid4().hex
+
+        async def report_progress(stage: str, details: dict) -> None:
+            await event_hub.publish(current_user.id, "kb.import", {
+                "import_id": import_id,
+                "table_name": table_name,
+                "stage": stage,
+                **details,
+            })
 
         # Process and upload data
-        result = await supabase_service.create_kb_table(
-            table_name=table_name,
-            df=df,
-            kb_type=kb_type,
-            user_id=current_user.id,
-            company_name=company_name
-        )
+        try:
+            result = await supabase_service.create_kb_table(
+                table_name=table_name,
+                df=df,
+                kb_type=kb_type,
+                user_id=current_user.id,
+                company_name=company_name,
+                progress=report_progress
+            )
+        except Exception as e:
+            await report_progress("failed", {"error": str(e)})
+            raise
+        await report_progress("completed", {"rows_imported": result.get("rows_imported", 0)})
 
         return {
             "success": True,
             "message": f"{kb_type} knowledge base created successfully",
+            "import_id": import_id,
             "table_name": table_name,
             "rows_imported": result.get("rows_imported", 0),
             "company_name": company_name,
@@ -122,6 +141,8 @@ async def upload_csv(
         raise HTTPException(status_code=400, detail="The CSV file is empty")
     except pd.errors.ParserError:
         raise HTTPException(status_code=400, detail="Failed to parse CSV file. Please check the format.")
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to upload CSV: {str(e)}")
 
@@ -256,6 +277,8 @@ async def list_knowledge_bases(
             "knowledge_bases": kbs
         }
 
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to retrieve knowledge bases: {str(e)}")
 
@@ -290,6 +313,8 @@ async def get_kb_data(
             "offset": offset
         }
 
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to retrieve data: {str(e)}")
 
@@ -317,6 +342,8 @@ async def delete_kb(
             "message": f"Knowledge base '{table_name}' deleted successfully"
         }
 
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to delete knowledge base: {str(e)}")
 
@@ -347,6 +374,8 @@ async def add_row_to_kb(
             "row": result
         }
 
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to add row: {str(e)}")
 
@@ -379,6 +408,8 @@ async def update_row_in_kb(
             "row": result
         }
 
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to update row: {str(e)}")
 
@@ -408,5 +439,7 @@ async def delete_row_from_kb(
             "message": "Row deleted successfully"
         }
 
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to delete row: {str(e)}")
@@ -1,28 +1,51 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, status
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
-from typing import List
+from typing import Optional
+from datetime import datetime
 from app.db.session import get_db
-from app.schemas.user import User as UserSchema
+from app.schemas.user import User as UserSchema, UserPage
+from app.schemas.admin import TrialClientPage, PaidClientPage
+from app.schemas.manager import ManagerPortfolioStats
 from app.core.deps import get_current_manager, get_current_admin
-from app.models.user import User, UserRole
+from app.models.user import User, UserRole, SubscriptionTier
+from app.services.client_lists import users_page, trial_clients_page, paid_clients_page
+from app.services.manager_stats import portfolio
 
 router = APIRouter(prefix="/api/v1/managers", tags=["managers"])
 
-@router.get("/clients", response_model=List[UserSchema])
+# Max clients per page of the portfolio lists
+MAX_STATS_PAGE = 200
+
+# Max clients per page of the client listing
+MAX_USERS_PAGE = 200
+
+# Max days of upcoming expiries/renewals in the stats
+MAX_HORIZON_DAYS = 366
+
+@router.get("/clients", response_model=UserPage)
 async def get_my_clients(
+    cursor: Optional[str] = None,
+    limit: int = Query(50, ge=1, le=MAX_USERS_PAGE),
+    tier: Optional[SubscriptionTier] = None,
+    trial_ends_after: Optional[datetime] = None,
+    trial_ends_before: Optional[datetime] = None,
+    search: Optional[str] = Query(None, min_length=1, description="Email or name prefix"),
     current_manager: User = Depends(get_current_manager),
     db: AsyncSession = Depends(get_db)
 ):
-    """Get all clients assigned to this manager"""
-    result = await db.execute(
-        select(User).where(
-            User.manager_id == current_manager.id,
-            User.role == UserRole.CLIENT
-        )
+    """Get clients assigned to this manager, filtered and one keyset page at a time"""
+    return await users_page(
+        db,
+        UserRole.CLIENT,
+        limit,
+        cursor,
+        tier=tier,
+        manager_id=current_manager.id,
+        trial_ends_after=trial_ends_after,
+        trial_ends_before=trial_ends_before,
+        search=search,
     )
-    clients = result.scalars().all()
-    return clients
 
 @router.get("/clients/{client_id}", response_model=UserSchema)
 async def get_client_details(
@@ -49,77 +72,52 @@ async def get_client_details(
     return client
 
 
-@router.get("/stats")
+@router.get("/stats", response_model=ManagerPortfolioStats)
 async def get_manager_stats(
+    horizon_days: int = Query(30, ge=1, le=MAX_HORIZON_DAYS, description="Days of upcoming expiries/renewals"),
+    limit: int = Query(50, ge=1, le=MAX_STATS_PAGE, description="Clients per list"),
     current_manager: User = Depends(get_current_manager),
     db: AsyncSession = Depends(get_db)
 ):
-    """Get statistics for manager's assigned clients"""
-    from app.models.user import SubscriptionTier
-    from datetime import datetime, timezone
-    from sqlalchemy import func
-
-    # Count clients with paid subscriptions (not trial) for this manager
-    clients_with_subscription = await db.scalar(
-        select(func.count()).select_from(User).where(
-            User.manager_id == current_manager.id,
-            User.role == UserRole.CLIENT,
-            User.subscription_tier.in_([SubscriptionTier.BASIC, SubscriptionTier.PRO, SubscriptionTier.ENTERPRISE])
-        )
-    )
+    """
+    Statistics for manager's assigned clients.
+    Counts come from the materialized portfolio stats, so the cost does not grow
+    with the portfolio; the trial/paid client lists are the first page of
+    /stats/trial-clients and /stats/paid-clients.
+    """
+    stats = await portfolio(db, current_manager.id, horizon_days)
+    trial = await trial_clients_page(db, limit, manager_id=current_manager.id)
+    paid = await paid_clients_page(db, limit, manager_id=current_manager.id)
 
-    # Get clients on trial for this manager
-    trial_clients_result = await db.execute(
-        select(User).where(
-            User.manager_id == current_manager.id,
-            User.role == UserRole.CLIENT,
-            User.subscription_tier == SubscriptionTier.TRIAL
-        )
+    return ManagerPortfolioStats(
+        **stats,
+        trial_clients=trial.items,
+        trial_clients_next_cursor=trial.next_cursor,
+        paid_clients=paid.items,
+        paid_clients_next_cursor=paid.next_cursor,
     )
-    trial_clients = trial_clients_result.scalars().all()
 
-    # Get clients with paid subscriptions for renewal tracking
-    paid_clients_result = await db.execute(
-        select(User).where(
-            User.manager_id == current_manager.id,
-            User.role == UserRole.CLIENT,
-            User.subscription_tier.in_([SubscriptionTier.BASIC, SubscriptionTier.PRO, SubscriptionTier.ENTERPRISE])
-        )
-    )
-    paid_clients = paid_clients_result.scalars().all()
-
-    # Calculate trial clients with days remaining
-    trial_clients_list = []
-    for client in trial_clients:
-        if client.trial_ends_at:
-            days_remaining = (client.trial_ends_at - datetime.now(timezone.utc)).days
-            trial_clients_list.append({
-                "id": client.id,
-                "email": client.email,
-                "full_name": client.full_name,
-                "days_remaining": max(0, days_remaining)
-            })
-
-    # Calculate paid clients with renewal dates
-    paid_clients_list = []
-    for client in paid_clients:
-        if client.subscription_ends_at:
-            days_until_renewal = (client.subscription_ends_at - datetime.now(timezone.utc)).days
-            paid_clients_list.append({
-                "id": client.id,
-                "email": client.email,
-                "full_name": client.full_name,
-                "subscription_tier": client.subscription_tier,
-                "days_until_renewal": max(0, days_until_renewal),
-                "renewal_date": client.subscription_ends_at.isoformat()
-            })
-
-    return {
-        "clients_with_subscription": clients_with_subscription,
-        "clients_on_trial": len(trial_clients),
-        "trial_clients": trial_clients_list,
-        "paid_clients": paid_clients_list
-    }
+
+@router.get("/stats/trial-clients", response_model=TrialClientPage)
+async def get_my_trial_clients(
+    cursor: Optional[str] = None,
+    limit: int = Query(50, ge=1, le=MAX_STATS_PAGE),
+    current_manager: User = Depends(get_current_manager),
+    db: AsyncSession = Depends(get_db)
+):
+    """Assigned clients on trial with days remaining, trials ending soonest first"""
+    return await trial_clients_page(db, limit, cursor, manager_id=current_manager.id)
+
+
+@router.get("/stats/paid-clients", response_model=PaidClientPage)
+async def get_my_paid_clients(
+    cursor: Optional[str] = None,
+    limit: int = Query(50, ge=1, le=MAX_STATS_PAGE),
+    current_manager: User = Depends(get_current_manager),
+    db: AsyncSession = Depends(get_db)
+):
+    """Assigned clients with paid subscriptions and their renewal dates, soonest first"""
+    return await paid_clients_page(db, limit, cursor, manager_id=current_manager.id)
 
 
 # Add more manager-specific endpoints
@@ -11,6 +11,7 @@ from app.services.oauth import (
 )
 from app.schemas.auth import Token
 from app.core.config import settings
+from app.services.http_client import http_clients
 
 router = APIRouter(prefix="/api/v1/oauth", tags=["oauth"])
 
@@ -61,20 +62,20 @@ async def google_callback_post(
     """Alternative POST endpoint for Google OAuth callback (for mobile apps)"""
     try:
         # Exchange code for token
-        import httpx
-        async with httpx.AsyncClient() as client:
-            token_response = await client.post(
-                'https://oauth2.googleapis.com/token',
-                data={
-                    'code': code,
-                    'client_id': settings.GOOGLE_CLIENT_ID,
-                    'client_secret': settings.GOOGLE_CLIENT_SECRET,
-                    'redirect_uri': f"{settings.BACKEND_URL}/api/v1/oauth/google/callback",
-                    'grant_type': 'authorization_code'
-                }
-            )
-            token_response.raise_for_status()
-            token = token_response.json()
+        token_response = await http_clients.request(
+            'google',
+            'POST',
+            'https://oauth2.googleapis.com/token',
+            data={
+                'code': code,
+                'client_id': settings.GOOGLE_CLIENT_ID,
+                'client_secret': settings.GOOGLE_CLIENT_SECRET,
+                'redirect_uri': f"{settings.BACKEND_URL}/api/v1/oauth/google/callback",
+                'grant_type': 'authorization_code'
+            }
+        )
+        token_response.raise_for_status()
+        token = token_response.json()
 
         # Handle the callback and create/login user
         return await handle_google_callback(db, token)
@@ -126,19 +127,19 @@ async def facebook_callback_post(
     """Alternative POST endpoint for Facebook OAuth callback"""
     try:
         # Exchange code for token
-        import httpx
-        async with httpx.AsyncClient() as client:
-            token_response = await client.post(
-                'https://graph.facebook.com/v12.0/oauth/access_token',
-                data={
-                    'code': code,
-                    'client_id': settings.FACEBOOK_CLIENT_ID,
-                    'client_secret': settings.FACEBOOK_CLIENT_SECRET,
-                    'redirect_uri': f"{settings.BACKEND_URL}/api/v1/oauth/facebook/callback"
-                }
-            )
-            token_response.raise_for_status()
-            token = token_response.json()
+        token_response = await http_clients.request(
+            'facebook',
+            'POST',
+            'https://graph.facebook.com/v12.0/oauth/access_token',
+            data={
+                'code': code,
+                'client_id': settings.FACEBOOK_CLIENT_ID,
+                'client_secret': settings.FACEBOOK_CLIENT_SECRET,
+                'redirect_uri': f"{settings.BACKEND_URL}/api/v1/oauth/facebook/callback"
+            }
+        )
+        token_response.raise_for_status()
+        token = token_response.json()
 
         # Handle the callback and create/login user
         return await handle_facebook_callback(db, token)
@@ -1,47 +1,21 @@
 from fastapi import APIRouter, Depends, HTTPException, status, Request
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
-from typing import List
+from typing import List, Optional
+from datetime import datetime
+import json
 from app.db.session import get_db
 from app.schemas.subscription import Subscription as SubscriptionSchema, SubscriptionCreate
 from app.core.deps import get_current_user
 from app.models.user import User
 from app.models.subscription import Subscription, SubscriptionStatus
 from app.core.config import settings
+from app.services.billing import SUBSCRIPTION_PLANS, payment_links
+from app.services.stripe_events import stripe_events
 import stripe
 
-stripe.api_key = settings.STRIPE_SECRET_KEY
-
 router = APIRouter(prefix="/api/v1/subscriptions", tags=["subscriptions"])
 
-# Define subscription plans with pricing (in cents)
-SUBSCRIPTION_PLANS = {
-    "single": {
-        "name": "Single Plan",
-        "amount": 999,  # $9.99
-        "currency": "usd",
-        "description": "1 channel access"
-    },
-    "double": {
-        "name": "Double Plan",
-        "amount": 1999,  # $19.99
-        "currency": "usd",
-        "description": "2 channels access"
-    },
-    "growth": {
-        "name": "Growth Plan",
-        "amount": 4999,  # $49.99
-        "currency": "usd",
-        "description": "6 channels (all available channels)"
-    },
-    "special": {
-        "name": "Special Offer",
-        "amount": 2999,  # $29.99
-        "currency": "usd",
-        "description": "Special promotional plan"
-    }
-}
-
 
 @router.get("", response_model=List[SubscriptionSchema])
 async def list_subscriptions(
@@ -104,66 +78,22 @@ async def create_payment_link(
     plan = SUBSCRIPTION_PLANS[plan_id]
 
     try:
-        # Create or get Stripe customer
-        stripe_customer_id = None
-        if current_user.stripe_customer_id:
-            stripe_customer_id = current_user.stripe_customer_id
-        else:
-            customer = stripe.Customer.create(
-                email=current_user.email,
-                name=current_user.full_name,
-                metadata={
-                    "user_id": str(current_user.id)
-                }
-            )
-            stripe_customer_id = customer.id
-
-            # Update user with Stripe customer ID
-            current_user.stripe_customer_id = stripe_customer_id
-            await db.commit()
-
-        # Create a Stripe Price for this plan
-        price = stripe.Price.create(
-            currency=plan["currency"],
-            unit_amount=plan["amount"],
-            recurring={"interval": "month"},
-            product_data={
-                "name": plan["name"],
-                "description": plan["description"]
-            }
-        )
-
-        # Create payment link
-        payment_link = stripe.PaymentLink.create(
-            line_items=[{
-                "price": price.id,
-                "quantity": 1
-            }],
-            after_completion={
-                "type": "redirect",
-                "redirect": {
-                    "url": f"{settings.FRONTEND_URL}/dashboard?payment=success&plan={plan_id}"
-                }
-            },
-            metadata={
-                "user_id": str(current_user.id),
-                "plan_id": plan_id
-            }
-        )
-
-        return {
-            "payment_link_url": payment_link.url,
-            "plan": plan_id,
-            "amount": plan["amount"] / 100,  # Convert cents to dollars
-            "currency": plan["currency"]
-        }
-
+        # Stripe calls run in worker threads; the Price comes from the synced catalog
+        await payment_links.ensure_customer(db, current_user)
+        payment_link_url = await payment_links.get(current_user, plan_id)
     except stripe.error.StripeError as e:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail=f"Stripe error: {str(e)}"
         )
 
+    return {
+        "payment_link_url": payment_link_url,
+        "plan": plan_id,
+        "amount": plan["amount"] / 100,  # Convert cents to dollars
+        "currency": plan["currency"]
+    }
+
 
 @router.post("/webhook")
 async def stripe_webhook(
@@ -171,60 +101,55 @@ async def stripe_webhook(
     db: AsyncSession = Depends(get_db)
 ):
     """
-    Handle Stripe webhook events for payment confirmations.
+    Receive Stripe webhook events.
+    Events are stored (deduplicated by event id) and acknowledged right away;
+    app.services.stripe_events applies them in the background.
     """
     payload = await request.body()
     sig_header = request.headers.get("stripe-signature")
 
-    if not settings.STRIPE_WEBHOOK_SECRET:
-        # For development without webhook secret, just process the event
-        event = stripe.Event.construct_from(
-            await request.json(), stripe.api_key
-        )
-    else:
+    if settings.STRIPE_WEBHOOK_SECRET:
         try:
-            event = stripe.Webhook.construct_event(
+            stripe.Webhook.construct_event(
                 payload, sig_header, settings.STRIPE_WEBHOOK_SECRET
             )
         except ValueError:
             raise HTTPException(status_code=400, detail="Invalid payload")
         except stripe.error.SignatureVerificationError:
             raise HTTPException(status_code=400, detail="Invalid signature")
+    # For development without webhook secret, just queue the event
 
-    # Handle the event
-    if event.type == "checkout.session.completed":
-        session = event.data.object
-        await handle_successful_payment(session, db)
-
-    elif event.type == "customer.subscription.created":
-        subscription = event.data.object
-        await handle_subscription_created(subscription, db)
+    try:
+        event = json.loads(payload)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid payload")
 
-    elif event.type == "customer.subscription.updated":
-        subscription = event.data.object
-        await handle_subscription_updated(subscription, db)
+    if not stripe_events.handles(event.get("type")):
+        return {"status": "ignored"}
 
-    elif event.type == "customer.subscription.deleted":
-        subscription = event.data.object
-        await handle_subscription_cancelled(subscription, db)
+    stored = await stripe_events.store(db, event)
+    return {"status": "success", "duplicate": not stored}
 
-    return {"status": "success"}
 
+# Handlers run in the stripe_events worker: no commits (the worker commits the
+# changes together with the event), return the id of the user whose plan changed.
 
-async def handle_successful_payment(session, db: AsyncSession):
+async def handle_successful_payment(session, db: AsyncSession) -> Optional[int]:
     """Handle successful payment from Stripe."""
-    user_id = int(session.metadata.get("user_id"))
-    plan_id = session.metadata.get("plan_id")
+    # StripeObject has no dict-style .get() in current stripe releases
+    metadata = session.metadata.to_dict() if session.metadata else {}
+    user_id = metadata.get("user_id")
+    plan_id = metadata.get("plan_id")
 
     if not user_id or not plan_id:
-        return
+        return None
+    user_id = int(user_id)
 
     # Get user
-    result = await db.execute(select(User).where(User.id == user_id))
-    user = result.scalar_one_or_none()
+    user = await db.get(User, user_id)
 
     if not user:
-        return
+        return None
 
     # Create or update subscription
     result = await db.execute(
@@ -256,38 +181,39 @@ async def handle_successful_payment(session, db: AsyncSession):
         )
         db.add(new_subscription)
 
-    await db.commit()
+    return user_id
 
 
-async def handle_subscription_created(subscription, db: AsyncSession):
+async def handle_subscription_created(subscription, db: AsyncSession) -> Optional[int]:
     """Handle when a subscription is created in Stripe."""
     customer_id = subscription.customer
     subscription_id = subscription.id
 
     # Find user by Stripe customer ID
-    result = await db.execute(
-        select(User).where(User.stripe_customer_id == customer_id)
+    user_id = await db.scalar(
+        select(User.id).where(User.stripe_customer_id == customer_id)
     )
-    user = result.scalar_one_or_none()
 
-    if not user:
-        return
+    if not user_id:
+        return None
 
     # Update subscription with Stripe subscription ID
     result = await db.execute(
         select(Subscription).where(
-            Subscription.user_id == user.id,
+            Subscription.user_id == user_id,
             Subscription.status == SubscriptionStatus.ACTIVE
         )
     )
     user_subscription = result.scalar_one_or_none()
 
-    if user_subscription:
-        user_subscription.stripe_subscription_id = subscription_id
-        await db.commit()
+    if not user_subscription:
+        return None
+
+    user_subscription.stripe_subscription_id = subscription_id
+    return user_id
 
 
-async def handle_subscription_updated(subscription, db: AsyncSession):
+async def handle_subscription_updated(subscription, db: AsyncSession) -> Optional[int]:
     """Handle when a subscription is updated in Stripe."""
     subscription_id = subscription.id
 
@@ -298,19 +224,21 @@ async def handle_subscription_updated(subscription, db: AsyncSession):
     )
     user_subscription = result.scalar_one_or_none()
 
-    if user_subscription:
-        # Update status based on Stripe subscription status
-        if subscription.status == "active":
-            user_subscription.status = SubscriptionStatus.ACTIVE
-        elif subscription.status == "canceled":
-            user_subscription.status = SubscriptionStatus.CANCELLED
-        elif subscription.status == "past_due":
-            user_subscription.status = SubscriptionStatus.EXPIRED
+    if not user_subscription:
+        return None
 
-        await db.commit()
+    # Update status based on Stripe subscription status
+    if subscription.status == "active":
+        user_subscription.status = SubscriptionStatus.ACTIVE
+    elif subscription.status == "canceled":
+        user_subscription.status = SubscriptionStatus.CANCELLED
+    elif subscription.status == "past_due":
+        user_subscription.status = SubscriptionStatus.EXPIRED
+
+    return user_subscription.user_id
 
 
-async def handle_subscription_cancelled(subscription, db: AsyncSession):
+async def handle_subscription_cancelled(subscription, db: AsyncSession) -> Optional[int]:
     """Handle when a subscription is cancelled in Stripe."""
     subscription_id = subscription.id
 
@@ -321,8 +249,15 @@ async def handle_subscription_cancelled(subscription, db: AsyncSession):
     )
     user_subscription = result.scalar_one_or_none()
 
-    if user_subscription:
-        user_subscription.status = SubscriptionStatus.CANCELLED
-        from datetime import datetime
-        user_subscription.cancelled_at = datetime.utcnow()
-        await db.commit()
+    if not user_subscription:
+        return None
+
+    user_subscription.status = SubscriptionStatus.CANCELLED
+    user_subscription.cancelled_at = datetime.utcnow()
+    return user_subscription.user_id
+
+
+stripe_events.register("checkout.session.completed", handle_successful_payment)
+stripe_events.register("customer.subscription.created", handle_subscription_created)
+stripe_events.register("customer.subscription.updated", handle_subscription_updated)
+stripe_events.register("customer.subscription.deleted", handle_subscription_cancelled)
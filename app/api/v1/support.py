@@ -3,6 +3,7 @@ from pydantic import BaseModel
 from app.core.deps import get_current_user
 from app.models.user import User
 from app.core.config import settings
+from app.services.http_client import http_clients
 import httpx
 from typing import Optional
 
@@ -59,15 +60,16 @@ async def chat_with_ai_faq(
             headers["X-Webhook-Secret"] = settings.N8N_AI_FAQ_WEBHOOK_SECRET
 
         # Call n8n AI FAQ chatbot webhook
-        async with httpx.AsyncClient() as client:
-            response = await client.post(
-                settings.N8N_AI_FAQ_URL,
-                json=payload,
-                headers=headers,
-                timeout=30.0
-            )
-            response.raise_for_status()
-            data = response.json()
+        response = await http_clients.request(
+            "n8n",
+            "POST",
+            settings.N8N_AI_FAQ_URL,
+            json=payload,
+            headers=headers,
+            timeout=30.0
+        )
+        response.raise_for_status()
+        data = response.json()
 
         # Parse response from n8n
         return AIFAQResponse(
@@ -76,6 +78,8 @@ async def chat_with_ai_faq(
             sources=data.get("sources", [])
         )
 
+    except HTTPException:
+        raise
     except httpx.HTTPError as e:
         raise HTTPException(
             status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
@@ -103,12 +107,13 @@ async def get_ai_faq_status(current_user: User = Depends(get_current_user)):
 
     try:
         # Ping the n8n endpoint to check if it's responsive
-        async with httpx.AsyncClient() as client:
-            response = await client.get(
-                f"{settings.N8N_AI_FAQ_URL}/health",
-                timeout=5.0
-            )
-            is_online = response.status_code == 200
+        response = await http_clients.request(
+            "n8n",
+            "GET",
+            f"{settings.N8N_AI_FAQ_URL}/health",
+            timeout=5.0
+        )
+        is_online = response.status_code == 200
     except:
         is_online = False
 
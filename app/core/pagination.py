@@ -0,0 +1,37 @@
+"""
+Keyset (cursor) pagination helpers.
+A cursor is the sort key of the last row of a page, encoded as an opaque
+URL-safe string. The next page is `WHERE (sort keys) < (cursor)` on an
+index matching the ORDER BY, so every page costs the same no matter how
+deep the client scrolls (unlike OFFSET).
+"""
+import base64
+import json
+from datetime import datetime
+from typing import Any, List, Optional
+
+from fastapi import HTTPException, status
+
+
+def encode_cursor(*values: Any) -> str:
+    payload = [v.isoformat() if isinstance(v, datetime) else v for v in values]
+    return base64.urlsafe_b64encode(json.dumps(payload, separators=(",", ":")).encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: Optional[str], *types: type) -> Optional[List[Any]]:
+    """Decode a cursor into values of the given types; 400 if it is malformed."""
+    if not cursor:
+        return None
+    try:
+        raw = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+        if len(raw) != len(types):
+            raise ValueError("cursor arity")
+        return [
+            datetime.fromisoformat(value) if kind is datetime else kind(value)
+            for kind, value in zip(types, raw)
+        ]
+    except (ValueError, TypeError):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid cursor",
+        )
@@ -5,6 +5,13 @@ from app.models.subscription import Subscription
 from app.models.message import Message
 from app.models.channel import Channel
 from app.models.verification_code import VerificationCode
+from app.models.analytics import MessageRollupHourly, MessageRollupDaily, RollupWatermark, ResponseTimeSketch
+from app.models.manager_stats import ManagerStats, ManagerExpiryBucket
+from app.models.stripe_event import StripeEvent
+from app.models.email_outbox import EmailOutbox
 
 # Import all models here so Alembic can detect them
-__all__ = ["Base", "User", "Company", "Subscription", "Message", "Channel", "VerificationCode"]
+__all__ = ["Base", "User", "Company", "Subscription", "Message", "Channel", "VerificationCode",
+           "MessageRollupHourly", "MessageRollupDaily", "RollupWatermark", "ResponseTimeSketch",
+           "ManagerStats", "ManagerExpiryBucket", "StripeEvent",
+           "EmailOutbox"]
@@ -1,3 +1,5 @@
+import time
+from sqlalchemy import event
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession, async_sessionmaker
 from sqlalchemy.orm import declarative_base
 from app.core.config import settings
@@ -22,6 +24,56 @@ AsyncSessionLocal = async_sessionmaker(
 Base = declarative_base()
 
 
+class PoolCheckoutStats:
+    """How long pooled connections stay checked out (i.e. held by a session)."""
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self) -> None:
+        self.checkouts = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+
+    def observe(self, held_ms: float) -> None:
+        self.checkouts += 1
+        self.total_ms += held_ms
+        self.max_ms = max(self.max_ms, held_ms)
+
+    def snapshot(self) -> dict:
+        return {
+            "checkouts": self.checkouts,
+            "avg_held_ms": round(self.total_ms / self.checkouts, 2) if self.checkouts else None,
+            "max_held_ms": round(self.max_ms, 2),
+            "pool": engine.pool.status(),
+        }
+
+
+pool_stats = PoolCheckoutStats()
+
+
+@event.listens_for(engine.sync_engine, "checkout")
+def _on_checkout(dbapi_connection, connection_record, connection_proxy):
+    connection_record.info["checked_out_at"] = time.perf_counter()
+
+
+@event.listens_for(engine.sync_engine, "checkin")
+def _on_checkin(dbapi_connection, connection_record):
+    started = connection_record.info.pop("checked_out_at", None)
+    if started is not None:
+        pool_stats.observe((time.perf_counter() - started) * 1000)
+
+
+async def release_connection(db: AsyncSession) -> None:
+    """
+    End the session's current transaction so its pooled connection goes back
+    to the pool before a slow outbound call. Loaded objects stay usable
+    (expire_on_commit=False); the next query checks out a connection again
+    and runs in a new, short transaction.
+    """
+    await db.commit()
+
+
 # Dependency to get DB session
 async def get_db():
     async with AsyncSessionLocal() as session:
@@ -1,7 +1,8 @@
 import React, { useState, useEffect } from 'react';
 import { Header } from './Header';
 import { Users, Activity, TrendingUp, Clock, Calendar } from 'lucide-react';
-import { apiClient } from '../utils/api';
+import { apiClient, type ClientListStats } from '../utils/api';
+import { LoadMoreButton } from './LoadMoreButton';
 
 interface Manager {
   id: number;
@@ -10,13 +11,7 @@ interface Manager {
   created_at: string;
 }
 
-interface Stats {
-  total_managers: number;
-  clients_with_subscription: number;
-  clients_on_trial: number;
-  trial_clients: Array<{ id: number; email: string; full_name: string; days_remaining: number }>;
-  paid_clients: Array<{ id: number; email: string; full_name: string; subscription_tier: string; days_until_renewal: number; renewal_date: string }>;
-}
+type Stats = ClientListStats & { total_managers: number };
 
 export const AdminDashboard: React.FC<{
   language: string;
@@ -24,6 +19,7 @@ export const AdminDashboard: React.FC<{
   onLogout: () => void;
 }> = ({ language, onLanguageChange, onLogout }) => {
   const [managers, setManagers] = useState<Manager[]>([]);
+  const [managersCursor, setManagersCursor] = useState<string | null>(null);
   const [stats, setStats] = useState<Stats | null>(null);
 
   useEffect(() => {
@@ -36,13 +32,53 @@ export const AdminDashboard: React.FC<{
         apiClient.getAllManagers(),
         apiClient.getAdminStats()
       ]);
-      setManagers(managersData);
+      setManagers(managersData.items);
+      setManagersCursor(managersData.next_cursor);
       setStats(statsData);
     } catch (error) {
       console.error('Failed to load data:', error);
     }
   };
 
+  const loadMoreManagers = async () => {
+    if (!managersCursor) return;
+    try {
+      const page = await apiClient.getAllManagers({ cursor: managersCursor });
+      setManagers((current) => [...current, ...page.items]);
+      setManagersCursor(page.next_cursor);
+    } catch (error) {
+      console.error('Failed to load managers:', error);
+    }
+  };
+
+  const loadMoreTrialClients = async () => {
+    if (!stats?.trial_clients_next_cursor) return;
+    try {
+      const page = await apiClient.getTrialClients('admin', stats.trial_clients_next_cursor);
+      setStats((current) => current && {
+        ...current,
+        trial_clients: [...current.trial_clients, ...page.items],
+        trial_clients_next_cursor: page.next_cursor,
+      });
+    } catch (error) {
+      console.error('Failed to load trial clients:', error);
+    }
+  };
+
+  const loadMorePaidClients = async () => {
+    if (!stats?.paid_clients_next_cursor) return;
+    try {
+      const page = await apiClient.getPaidClients('admin', stats.paid_clients_next_cursor);
+      setStats((current) => current && {
+        ...current,
+        paid_clients: [...current.paid_clients, ...page.items],
+        paid_clients_next_cursor: page.next_cursor,
+      });
+    } catch (error) {
+      console.error('Failed to load paid clients:', error);
+    }
+  };
+
   return (
     <div style={{
       minHeight: '100vh',
@@ -175,6 +211,10 @@ export const AdminDashboard: React.FC<{
                 </div>
               ))}
             </div>
+
+            {stats.trial_clients_next_cursor && (
+              <LoadMoreButton language={language} onClick={loadMoreTrialClients} />
+            )}
           </div>
         )}
 
@@ -243,6 +283,10 @@ export const AdminDashboard: React.FC<{
                 </div>
               ))}
             </div>
+
+            {stats.paid_clients_next_cursor && (
+              <LoadMoreButton language={language} onClick={loadMorePaidClients} />
+            )}
           </div>
         )}
 
@@ -293,6 +337,10 @@ export const AdminDashboard: React.FC<{
               </div>
             ))}
           </div>
+
+          {managersCursor && (
+            <LoadMoreButton language={language} onClick={loadMoreManagers} />
+          )}
         </div>
       </main>
     </div>
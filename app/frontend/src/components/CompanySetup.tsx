@@ -1,5 +1,6 @@
 import React, { useState, useEffect } from 'react';
 import { MessageCircle, Send, Instagram, Facebook, Mail, Music } from 'lucide-react';
+import { apiClient } from '../utils/api';
 
 interface CompanySetupProps {
   language: string;
@@ -101,6 +102,21 @@ export const CompanySetup: React.FC<CompanySetupProps> = ({ language, onNavigate
     }
   };
 
+  // Message counters are pushed over the event stream instead of reloading the list
+  useEffect(() => {
+    return apiClient.subscribeToEvents({
+      'company.counters': ({ company_id, avg_response_time, ...counters }) => {
+        setCompanies((current) =>
+          current.map((company) =>
+            company.id === company_id
+              ? { ...company, ...counters, avg_response_time: avg_response_time ?? company.avg_response_time }
+              : company
+          )
+        );
+      },
+    });
+  }, []);
+
   const fetchCompanies = async () => {
     try {
       const token = localStorage.getItem('access_token');
@@ -1,6 +1,7 @@
 import React, { useState, useEffect } from 'react';
 import { ArrowLeft, Check, X, AlertCircle, Loader } from 'lucide-react';
 import axios from 'axios';
+import { apiClient } from '../utils/api';
 
 interface IntegrationsTokensProps {
   language: string;
@@ -53,6 +54,7 @@ export const IntegrationsTokens: React.FC<IntegrationsTokensProps> = ({ language
   const [whatsappLoading, setWhatsappLoading] = useState(false);
   const [companyChannels, setCompanyChannels] = useState<string[]>([]);
   const [companiesLoaded, setCompaniesLoaded] = useState(false);
+  const [streamDown, setStreamDown] = useState(false);
 
   const API_URL = import.meta.env.VITE_API_URL || 'http://127.0.0.1:8000';
 
@@ -169,6 +171,46 @@ export const IntegrationsTokens: React.FC<IntegrationsTokensProps> = ({ language
     }
   }, [selectedCompany, companiesLoaded]);
 
+  // Channel status changes (pairing done, session dropped) are pushed over the event stream
+  useEffect(() => {
+    if (!selectedCompany) return;
+    setStreamDown(false);
+    return apiClient.subscribeToEvents({
+      'channel.status': (event) => {
+        if (event.company_id !== selectedCompany) return;
+        if (event.status === 'connected') {
+          setWhatsappCode('');
+        }
+        loadIntegrations();
+      },
+      closed: () => setStreamDown(true),
+    });
+  }, [selectedCompany]);
+
+  // Fallback while the event stream is unavailable: poll until the pairing completes
+  useEffect(() => {
+    if (!streamDown || !whatsappCode || !selectedCompany) return;
+    const interval = setInterval(async () => {
+      try {
+        const response = await axios.get(
+          `${API_URL}/api/v1/integrations/whatsapp/status/${selectedCompany}`,
+          getAuthHeaders()
+        );
+        if (response.data.connected) {
+          setWhatsappCode('');
+          loadIntegrations();
+        }
+      } catch (err) {
+        clearInterval(interval);
+      }
+    }, 3000);
+    const timeout = setTimeout(() => clearInterval(interval), 300000);
+    return () => {
+      clearInterval(interval);
+      clearTimeout(timeout);
+    };
+  }, [streamDown, whatsappCode, selectedCompany]);
+
   const loadIntegrations = async () => {
     if (!selectedCompany) return;
 
@@ -234,7 +276,6 @@ export const IntegrationsTokens: React.FC<IntegrationsTokensProps> = ({ language
 
       const rawCode: string = response.data.qr_code || response.data.code;
       setWhatsappCode(String(rawCode || '').trim());
-      pollWhatsAppStatus();
     } catch (err: any) {
       const detail = err?.response?.data?.detail;
       if (typeof detail === 'string') {
@@ -249,26 +290,6 @@ export const IntegrationsTokens: React.FC<IntegrationsTokensProps> = ({ language
     }
   };
 
-  const pollWhatsAppStatus = () => {
-    if (!selectedCompany) return;
-    const interval = setInterval(async () => {
-      try {
-        const response = await axios.get(
-          `${API_URL}/api/v1/integrations/whatsapp/status/${selectedCompany}`,
-          getAuthHeaders()
-        );
-        if (response.data.connected) {
-          setWhatsappCode('');
-          clearInterval(interval);
-          loadIntegrations();
-        }
-      } catch (err) {
-        clearInterval(interval);
-      }
-    }, 3000);
-    setTimeout(() => clearInterval(interval), 300000);
-  };
-
   const handleWhatsAppDisconnect = async () => {
     if (!selectedCompany) return;
     setWhatsappLoading(true);
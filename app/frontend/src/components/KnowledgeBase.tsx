@@ -1,5 +1,6 @@
 import React, { useState, useEffect, useRef } from 'react';
 import { Upload, Download, Image as ImageIcon, Play, Database, X, AlertCircle, Images, Copy, Trash2 } from 'lucide-react';
+import { apiClient } from '../utils/api';
 
 interface KnowledgeBaseProps {
   language: string;
@@ -90,6 +91,8 @@ export const KnowledgeBase: React.FC<KnowledgeBaseProps> = ({ language, onNaviga
   // });
   const [selectedCompany, setSelectedCompany] = useState<string>('');
   const [companies, setCompanies] = useState<Company[]>([]);
+  const [importProgress, setImportProgress] = useState<string | null>(null);
+  const importIdRef = useRef<string | null>(null);
   const [productRows, setProductRows] = useState<ProductRow[]>([]);
   const [serviceRows, setServiceRows] = useState<ServiceRow[]>([]);
   const [registry, setRegistry] = useState<KBRegistryEntry[]>([]);
@@ -429,6 +432,22 @@ export const KnowledgeBase: React.FC<KnowledgeBaseProps> = ({ language, onNaviga
     }
   };
 
+  // Progress of the running CSV import, pushed as `kb.import` events
+  useEffect(() => {
+    return apiClient.subscribeToEvents({
+      'kb.import': (event) => {
+        if (event.import_id !== importIdRef.current) return;
+        if (event.stage === 'completed' || event.stage === 'failed') {
+          setImportProgress(null);
+        } else if (event.stage === 'uploading' && event.rows_total) {
+          setImportProgress(`${event.rows_uploaded || 0}/${event.rows_total}`);
+        } else {
+          setImportProgress('…');
+        }
+      },
+    });
+  }, []);
+
   const handleImportCSV = () => {
     const input = document.createElement('input');
     input.type = 'file';
@@ -456,6 +475,10 @@ export const KnowledgeBase: React.FC<KnowledgeBaseProps> = ({ language, onNaviga
       formData.append('file', file);
       formData.append('company_name', selectedCompany);
       formData.append('kb_type', kbType);
+      const importId = `${Date.now().toString(36)}${Math.random().toString(36).slice(2)}`;
+      importIdRef.current = importId;
+      formData.append('import_id', importId);
+      setImportProgress('…');
 
       // Get auth token
       const token = localStorage.getItem('access_token');
@@ -488,6 +511,9 @@ export const KnowledgeBase: React.FC<KnowledgeBaseProps> = ({ language, onNaviga
         ? `Failed to upload: ${error.message}`
         : `Error al cargar: ${error.message}`
       );
+    } finally {
+      importIdRef.current = null;
+      setImportProgress(null);
     }
   };
 
@@ -1025,7 +1051,9 @@ export const KnowledgeBase: React.FC<KnowledgeBaseProps> = ({ language, onNaviga
               }}
             >
               <Upload size={16} />
-              {language === 'EN' ? 'Import CSV' : 'Importar CSV'}
+              {importProgress !== null
+                ? `${language === 'EN' ? 'Importing' : 'Importando'} ${importProgress}`
+                : (language === 'EN' ? 'Import CSV' : 'Importar CSV')}
             </button>
 
             <button
@@ -0,0 +1,24 @@
+import React from 'react';
+
+// Follows the next_cursor of a paged list
+export const LoadMoreButton: React.FC<{
+  language: string;
+  onClick: () => void;
+}> = ({ language, onClick }) => (
+  <button
+    onClick={onClick}
+    style={{
+      marginTop: '16px',
+      padding: '8px 16px',
+      background: 'var(--bg-secondary)',
+      border: '1px solid var(--glass-border)',
+      borderRadius: '8px',
+      color: 'var(--text-secondary)',
+      fontSize: '14px',
+      fontWeight: 500,
+      cursor: 'pointer'
+    }}
+  >
+    {language === 'EN' ? 'Load more' : 'Cargar más'}
+  </button>
+);
@@ -1,14 +1,10 @@
 import React, { useState, useEffect } from 'react';
 import { Header } from './Header';
 import { TrendingUp, Clock, Calendar } from 'lucide-react';
-import { apiClient } from '../utils/api';
+import { apiClient, type ClientListStats } from '../utils/api';
+import { LoadMoreButton } from './LoadMoreButton';
 
-interface Stats {
-  clients_with_subscription: number;
-  clients_on_trial: number;
-  trial_clients: Array<{ id: number; email: string; full_name: string; days_remaining: number }>;
-  paid_clients: Array<{ id: number; email: string; full_name: string; subscription_tier: string; days_until_renewal: number; renewal_date: string }>;
-}
+type Stats = ClientListStats;
 
 export const ManagerDashboard: React.FC<{
   language: string;
@@ -30,6 +26,34 @@ export const ManagerDashboard: React.FC<{
     }
   };
 
+  const loadMoreTrialClients = async () => {
+    if (!stats?.trial_clients_next_cursor) return;
+    try {
+      const page = await apiClient.getTrialClients('managers', stats.trial_clients_next_cursor);
+      setStats((current) => current && {
+        ...current,
+        trial_clients: [...current.trial_clients, ...page.items],
+        trial_clients_next_cursor: page.next_cursor,
+      });
+    } catch (error) {
+      console.error('Failed to load trial clients:', error);
+    }
+  };
+
+  const loadMorePaidClients = async () => {
+    if (!stats?.paid_clients_next_cursor) return;
+    try {
+      const page = await apiClient.getPaidClients('managers', stats.paid_clients_next_cursor);
+      setStats((current) => current && {
+        ...current,
+        paid_clients: [...current.paid_clients, ...page.items],
+        paid_clients_next_cursor: page.next_cursor,
+      });
+    } catch (error) {
+      console.error('Failed to load paid clients:', error);
+    }
+  };
+
   return (
     <div style={{
       minHeight: '100vh',
@@ -148,6 +172,10 @@ export const ManagerDashboard: React.FC<{
                 </div>
               ))}
             </div>
+
+            {stats.trial_clients_next_cursor && (
+              <LoadMoreButton language={language} onClick={loadMoreTrialClients} />
+            )}
           </div>
         )}
 
@@ -216,6 +244,10 @@ export const ManagerDashboard: React.FC<{
                 </div>
               ))}
             </div>
+
+            {stats.paid_clients_next_cursor && (
+              <LoadMoreButton language={language} onClick={loadMorePaidClients} />
+            )}
           </div>
         )}
 
@@ -28,6 +28,85 @@ interface UserResponse {
   created_at: string;
 }
 
+export interface Page<T> {
+  items: T[];
+  next_cursor: string | null;
+}
+
+export interface TrialClient {
+  id: number;
+  email: string;
+  full_name: string | null;
+  trial_ends_at: string;
+  days_remaining: number;
+}
+
+export interface PaidClient {
+  id: number;
+  email: string;
+  full_name: string | null;
+  subscription_tier: string;
+  days_until_renewal: number;
+  renewal_date: string;
+}
+
+// Trial / paid client lists: first page in the stats, the rest via /stats/*-clients
+export interface ClientListStats {
+  clients_with_subscription: number;
+  clients_on_trial: number;
+  trial_clients: TrialClient[];
+  trial_clients_next_cursor: string | null;
+  paid_clients: PaidClient[];
+  paid_clients_next_cursor: string | null;
+}
+
+// Whose client lists: all clients (admin) or the manager's own
+type ClientListScope = 'admin' | 'managers';
+
+// Dashboard events pushed over /api/v1/events/stream (Server-Sent Events)
+export interface ChannelStatusEvent {
+  company_id: number;
+  channel_id: number | null;
+  platform: string;
+  status: string;
+  phone_number: string | null;
+}
+
+export interface CompanyCountersEvent {
+  company_id: number;
+  total_messages: number;
+  type1_count: number;
+  type2_count: number;
+  type2_unpaid: number;
+  type3_count: number;
+  type3_paid: number;
+  avg_response_time: number | null;
+}
+
+export interface KbImportEvent {
+  import_id: string;
+  table_name: string;
+  stage: string;
+  rows_uploaded?: number;
+  rows_total?: number;
+  rows_imported?: number;
+  error?: string;
+}
+
+export interface DashboardEventHandlers {
+  'channel.status'?: (event: ChannelStatusEvent) => void;
+  'company.counters'?: (event: CompanyCountersEvent) => void;
+  'kb.import'?: (event: KbImportEvent) => void;
+  // The stream is closed for good (e.g. expired token); callers fall back to polling
+  closed?: () => void;
+}
+
+interface UserListParams {
+  cursor?: string;
+  limit?: number;
+  search?: string;
+}
+
 class ApiClient {
   private baseUrl: string;
 
@@ -40,6 +119,47 @@ class ApiClient {
     return token ? { Authorization: `Bearer ${token}` } : {};
   }
 
+  private listQuery(params: UserListParams): string {
+    const query = new URLSearchParams();
+    if (params.cursor) query.set('cursor', params.cursor);
+    if (params.limit) query.set('limit', String(params.limit));
+    if (params.search) query.set('search', params.search);
+    const qs = query.toString();
+    return qs ? `?${qs}` : '';
+  }
+
+  /**
+   * Subscribe to the user's dashboard events. EventSource cannot send headers,
+   * so the access token goes in the query string; it reconnects by itself after
+   * network errors. Returns a function that closes the stream.
+   */
+  subscribeToEvents(handlers: DashboardEventHandlers): () => void {
+    const token = localStorage.getItem('access_token');
+    if (!token || typeof EventSource === 'undefined') {
+      handlers.closed?.();
+      return () => {};
+    }
+
+    const source = new EventSource(`${this.baseUrl}/api/v1/events/stream?token=${encodeURIComponent(token)}`);
+    (['channel.status', 'company.counters', 'kb.import'] as const).forEach((name) => {
+      const handler = handlers[name] as ((event: any) => void) | undefined;
+      if (!handler) return;
+      source.addEventListener(name, (message) => {
+        try {
+          handler(JSON.parse((message as MessageEvent).data));
+        } catch (error) {
+          console.error(`Bad ${name} event:`, error);
+        }
+      });
+    });
+    source.onerror = () => {
+      if (source.readyState === EventSource.CLOSED) {
+        handlers.closed?.();
+      }
+    };
+    return () => source.close();
+  }
+
   async login(email: string, password: string): Promise<TokenResponse> {
     const response = await fetch(`${this.baseUrl}/api/v1/auth/login`, {
       method: 'POST',
@@ -233,8 +353,8 @@ class ApiClient {
     return await response.json();
   }
 
-  async getAllManagers(): Promise<UserResponse[]> {
-    const response = await fetch(`${this.baseUrl}/api/v1/admin/managers`, {
+  async getAllManagers(params: UserListParams = {}): Promise<Page<UserResponse>> {
+    const response = await fetch(`${this.baseUrl}/api/v1/admin/managers${this.listQuery(params)}`, {
       method: 'GET',
       headers: {
         ...this.getAuthHeader(),
@@ -249,8 +369,8 @@ class ApiClient {
     return await response.json();
   }
 
-  async getMyClients(): Promise<UserResponse[]> {
-    const response = await fetch(`${this.baseUrl}/api/v1/managers/clients`, {
+  async getMyClients(params: UserListParams = {}): Promise<Page<UserResponse>> {
+    const response = await fetch(`${this.baseUrl}/api/v1/managers/clients${this.listQuery(params)}`, {
       method: 'GET',
       headers: {
         ...this.getAuthHeader(),
@@ -265,13 +385,7 @@ class ApiClient {
     return await response.json();
   }
 
-  async getAdminStats(): Promise<{
-    total_managers: number;
-    clients_with_subscription: number;
-    clients_on_trial: number;
-    trial_clients: Array<{ id: number; email: string; full_name: string; days_remaining: number }>;
-    paid_clients: Array<{ id: number; email: string; full_name: string; subscription_tier: string; days_until_renewal: number; renewal_date: string }>;
-  }> {
+  async getAdminStats(): Promise<ClientListStats & { total_managers: number }> {
     const response = await fetch(`${this.baseUrl}/api/v1/admin/stats`, {
       method: 'GET',
       headers: {
@@ -287,12 +401,7 @@ class ApiClient {
     return await response.json();
   }
 
-  async getManagerStats(): Promise<{
-    clients_with_subscription: number;
-    clients_on_trial: number;
-    trial_clients: Array<{ id: number; email: string; full_name: string; days_remaining: number }>;
-    paid_clients: Array<{ id: number; email: string; full_name: string; subscription_tier: string; days_until_renewal: number; renewal_date: string }>;
-  }> {
+  async getManagerStats(): Promise<ClientListStats> {
     const response = await fetch(`${this.baseUrl}/api/v1/managers/stats`, {
       method: 'GET',
       headers: {
@@ -308,6 +417,44 @@ class ApiClient {
     return await response.json();
   }
 
+  async getTrialClients(scope: ClientListScope, cursor: string): Promise<Page<TrialClient>> {
+    const response = await fetch(
+      `${this.baseUrl}/api/v1/${scope}/stats/trial-clients?cursor=${encodeURIComponent(cursor)}`,
+      {
+        method: 'GET',
+        headers: {
+          ...this.getAuthHeader(),
+        },
+      }
+    );
+
+    if (!response.ok) {
+      const error = await response.json();
+      throw new Error(error.detail || 'Failed to fetch trial clients');
+    }
+
+    return await response.json();
+  }
+
+  async getPaidClients(scope: ClientListScope, cursor: string): Promise<Page<PaidClient>> {
+    const response = await fetch(
+      `${this.baseUrl}/api/v1/${scope}/stats/paid-clients?cursor=${encodeURIComponent(cursor)}`,
+      {
+        method: 'GET',
+        headers: {
+          ...this.getAuthHeader(),
+        },
+      }
+    );
+
+    if (!response.ok) {
+      const error = await response.json();
+      throw new Error(error.detail || 'Failed to fetch paid clients');
+    }
+
+    return await response.json();
+  }
+
   async createPaymentLink(planId: string): Promise<{
     payment_link_url: string;
     plan: string;
@@ -1,14 +1,93 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from starlette.middleware.sessions import SessionMiddleware
-from app.api.v1 import auth, users, subscriptions, companies, managers, admin, oauth, knowledge_base, integrations, support, cloudinary
+from app.api.v1 import auth, users, subscriptions, companies, managers, admin, oauth, knowledge_base, integrations, support, cloudinary, ingest, events
 from app.core.config import settings
+from app.services.http_client import http_clients
+from app.services.background import background_tasks, PeriodicTask
+from app.services.waha_sync import waha_session_sync, WAHA_SYNC_INTERVAL
+from app.services.rollups import message_rollups, ROLLUP_INTERVAL
+from app.services.partitions import message_partitions, PARTITION_MAINTENANCE_INTERVAL
+from app.services.sketches import response_time_sketches, SKETCH_FLUSH_INTERVAL
+from app.services.events import event_hub
+from app.services.billing import plan_catalog, PLAN_CATALOG_SYNC_INTERVAL
+from app.services.stripe_events import stripe_events, STRIPE_EVENT_POLL_INTERVAL, STRIPE_EVENT_PURGE_INTERVAL
+from app.services.expiry import expiry_scheduler, EXPIRY_INTERVAL
+from app.services.email_delivery import email_delivery, EMAIL_POLL_INTERVAL, EMAIL_OUTBOX_PURGE_INTERVAL
+from app.services.email_templates import email_templates
+from app.services.verification_store import verification_store, VERIFICATION_PURGE_INTERVAL
+from app.services import message_counters  # noqa: F401  (registers the ORM flush hooks)
+from app.services import manager_stats  # noqa: F401  (registers the ORM flush hooks)
+
+
+background_tasks.register(
+    PeriodicTask("waha_session_sync", waha_session_sync.refresh, interval=WAHA_SYNC_INTERVAL)
+)
+background_tasks.register(
+    PeriodicTask("message_rollups", message_rollups.run, interval=ROLLUP_INTERVAL, initial_delay=10.0)
+)
+background_tasks.register(
+    PeriodicTask("message_partitions", message_partitions.run, interval=PARTITION_MAINTENANCE_INTERVAL)
+)
+background_tasks.register(
+    PeriodicTask("response_time_sketches", response_time_sketches.flush,
+                 interval=SKETCH_FLUSH_INTERVAL, singleton=False)
+)
+# Per-customer advisory locks keep event order, so every worker can drain the queue
+background_tasks.register(
+    PeriodicTask("stripe_events", stripe_events.run, interval=STRIPE_EVENT_POLL_INTERVAL, singleton=False)
+)
+# Price ids are cached per process: every worker syncs its own catalog (first run at startup)
+background_tasks.register(
+    PeriodicTask("stripe_plan_catalog", plan_catalog.sync, interval=PLAN_CATALOG_SYNC_INTERVAL, singleton=False)
+)
+background_tasks.register(
+    PeriodicTask("stripe_events_purge", stripe_events.purge, interval=STRIPE_EVENT_PURGE_INTERVAL, initial_delay=60.0)
+)
+background_tasks.register(
+    PeriodicTask("subscription_expiry", expiry_scheduler.run, interval=EXPIRY_INTERVAL, initial_delay=30.0)
+)
+# Rows are claimed with SKIP LOCKED, so every worker delivers from the outbox
+background_tasks.register(
+    PeriodicTask("email_delivery", email_delivery.run, interval=EMAIL_POLL_INTERVAL, singleton=False)
+)
+background_tasks.register(
+    PeriodicTask("email_outbox_purge", email_delivery.purge, interval=EMAIL_OUTBOX_PURGE_INTERVAL, initial_delay=90.0)
+)
+background_tasks.register(
+    PeriodicTask("verification_codes_purge", verification_store.purge,
+                 interval=VERIFICATION_PURGE_INTERVAL, initial_delay=120.0)
+)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Shared pooled HTTP clients for outbound integrations
+    await http_clients.start()
+    await event_hub.start()
+    # Compile email templates before the delivery worker needs them
+    email_templates.load()
+    background_tasks.start_all()
+    try:
+        yield
+    finally:
+        await background_tasks.stop_all()
+        # Sketches are buffered per process: write out what is pending
+        try:
+            await response_time_sketches.flush()
+        except Exception as e:
+            print(f"Final response time sketch flush failed: {str(e)}")
+        await event_hub.close()
+        await email_delivery.close()
+        await http_clients.close()
 
 
 app = FastAPI(
     title=settings.PROJECT_NAME,
     version="1.0.0",
-    description="X8 Network SaaS Platform API"
+    description="X8 Network SaaS Platform API",
+    lifespan=lifespan
 )
 
 # Add SessionMiddleware for OAuth (must be added before other middleware)
@@ -40,6 +119,8 @@ app.include_router(knowledge_base.router)
 app.include_router(integrations.router)
 app.include_router(support.router)
 app.include_router(cloudinary.router)
+app.include_router(ingest.router)
+app.include_router(events.router)
 
 
 @app.get("/")
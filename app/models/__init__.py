@@ -1,9 +1,13 @@
 from app.models.user import User, UserRole, SubscriptionTier
 from app.models.company import Company, CompanyStatus
 from app.models.subscription import Subscription, SubscriptionPlan, SubscriptionStatus
-from app.models.message import Message, MessageType, MessageStatus
+from app.models.message import Message, MessageKey, MessageType, MessageStatus
 from app.models.channel import Channel, ChannelPlatform
 from app.models.verification_code import VerificationCode
+from app.models.analytics import MessageRollupHourly, MessageRollupDaily, RollupWatermark, ResponseTimeSketch
+from app.models.manager_stats import ManagerStats, ManagerExpiryBucket
+from app.models.stripe_event import StripeEvent
+from app.models.email_outbox import EmailOutbox
 
 __all__ = [
     "User",
@@ -15,9 +19,18 @@ __all__ = [
     "SubscriptionPlan",
     "SubscriptionStatus",
     "Message",
+    "MessageKey",
     "MessageType",
     "MessageStatus",
     "Channel",
     "ChannelPlatform",
     "VerificationCode",
+    "MessageRollupHourly",
+    "MessageRollupDaily",
+    "RollupWatermark",
+    "ResponseTimeSketch",
+    "ManagerStats",
+    "ManagerExpiryBucket",
+    "StripeEvent",
+    "EmailOutbox",
 ]
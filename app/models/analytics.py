@@ -0,0 +1,49 @@
+from sqlalchemy import Column, Integer, BigInteger, String, DateTime, ForeignKey, LargeBinary
+from sqlalchemy.sql import func
+from app.db.session import Base
+
+
+class MessageRollupColumns:
+    """Columns shared by the hourly and daily message rollups."""
+
+    company_id = Column(Integer, ForeignKey("companies.id", ondelete="CASCADE"), primary_key=True)
+    channel = Column(String, primary_key=True)
+    bucket_start = Column(DateTime(timezone=True), primary_key=True)  # UTC bucket start
+
+    message_count = Column(Integer, nullable=False, default=0)
+    type1_count = Column(Integer, nullable=False, default=0)
+    type2_count = Column(Integer, nullable=False, default=0)
+    type3_count = Column(Integer, nullable=False, default=0)
+    payment_links_sent = Column(Integer, nullable=False, default=0)  # PAYMENT_LINK_SENT or PAID
+    paid_count = Column(Integer, nullable=False, default=0)
+    response_count = Column(Integer, nullable=False, default=0)
+    response_time_total = Column(BigInteger, nullable=False, default=0)
+
+
+class MessageRollupHourly(MessageRollupColumns, Base):
+    __tablename__ = "message_rollups_hourly"
+
+
+class MessageRollupDaily(MessageRollupColumns, Base):
+    __tablename__ = "message_rollups_daily"
+
+
+class RollupWatermark(Base):
+    """How far (by message updated_at, i.e. write time) a rollup job has processed."""
+    __tablename__ = "rollup_watermarks"
+
+    name = Column(String, primary_key=True)
+    watermark = Column(DateTime(timezone=True), nullable=False)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+
+class ResponseTimeSketch(Base):
+    """Hourly DDSketch of response_time_seconds per (company, channel)."""
+    __tablename__ = "response_time_sketches"
+
+    company_id = Column(Integer, ForeignKey("companies.id", ondelete="CASCADE"), primary_key=True)
+    channel = Column(String, primary_key=True)
+    bucket_start = Column(DateTime(timezone=True), primary_key=True)  # UTC hour
+    sketch = Column(LargeBinary, nullable=False)  # DDSketch.to_bytes()
+    count = Column(Integer, nullable=False, default=0)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Boolean, JSON, Enum as SQLEnum
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Boolean, JSON, Index, text, Enum as SQLEnum
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 import enum
@@ -55,5 +55,14 @@ class Channel(Base):
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
 
+    __table_args__ = (
+        # Channel of a company by platform (integration endpoints); prefix serves company_id lookups
+        Index("ix_channels_company_user_platform", "company_id", "user_id", "platform"),
+        # Channels of a user (channel limit, available integrations)
+        Index("ix_channels_user_status", "user_id", "status"),
+        # WAHA session -> channel (session sync and webhooks)
+        Index("ix_channels_waha_session_id", text("(config ->> 'session_id')")),
+    )
+
     # Relationships
     company = relationship("Company", back_populates="channels")
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Enum as SQLEnum
+from sqlalchemy import Column, Integer, BigInteger, String, DateTime, ForeignKey, Enum as SQLEnum
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 import enum
@@ -17,7 +17,7 @@ class Company(Base):
     id = Column(Integer, primary_key=True, index=True)
     company_id = Column(String, unique=True, index=True, nullable=False)
     name = Column(String, nullable=False)
-    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False, index=True)
 
     company_type = Column(String, nullable=False)
 
@@ -31,6 +31,9 @@ class Company(Base):
     type3_count = Column(Integer, default=0)
     type3_paid = Column(Integer, default=0)
     avg_response_time = Column(Integer, default=0)
+    # Running-mean state for avg_response_time (see services/message_counters.py)
+    response_count = Column(Integer, nullable=False, default=0, server_default="0")
+    response_time_total = Column(BigInteger, nullable=False, default=0, server_default="0")
 
     subscription_ends = Column(DateTime(timezone=True), nullable=True)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
@@ -0,0 +1,26 @@
+from sqlalchemy import Column, BigInteger, Integer, String, DateTime, JSON, Index, text
+from sqlalchemy.sql import func
+from app.db.session import Base
+
+
+class EmailOutbox(Base):
+    """Queued outgoing email (see services/email_outbox.py); rendered and sent by the delivery worker."""
+    __tablename__ = "email_outbox"
+
+    id = Column(BigInteger, primary_key=True)
+    kind = Column(String, nullable=False)  # template name, e.g. "trial_expired"
+    recipient = Column(String, nullable=False)
+    payload = Column(JSON, nullable=False)  # template variables
+
+    status = Column(String, nullable=False, default="pending")  # "pending", "sent" or "failed"
+    attempts = Column(Integer, nullable=False, default=0)
+    next_attempt_at = Column(DateTime(timezone=True), server_default=func.now())
+    last_error = Column(String, nullable=True)
+
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    sent_at = Column(DateTime(timezone=True), nullable=True)
+
+    __table_args__ = (
+        # Delivery queue: due pending emails, oldest first
+        Index("ix_email_outbox_pending", "next_attempt_at", "id", postgresql_where=text("status = 'pending'")),
+    )
@@ -0,0 +1,25 @@
+from sqlalchemy import Column, Integer, String, Date, DateTime, ForeignKey
+from sqlalchemy.sql import func
+from app.db.session import Base
+
+
+class ManagerStats(Base):
+    """Client counts per subscription tier of a manager's portfolio (see services/manager_stats.py)."""
+    __tablename__ = "manager_stats"
+
+    manager_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), primary_key=True)
+    trial_count = Column(Integer, nullable=False, default=0)
+    basic_count = Column(Integer, nullable=False, default=0)
+    pro_count = Column(Integer, nullable=False, default=0)
+    enterprise_count = Column(Integer, nullable=False, default=0)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+
+class ManagerExpiryBucket(Base):
+    """Clients of a manager whose trial ends / paid subscription renews on a given UTC day."""
+    __tablename__ = "manager_expiry_buckets"
+
+    manager_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), primary_key=True)
+    kind = Column(String, primary_key=True)  # "trial" or "renewal"
+    day = Column(Date, primary_key=True)
+    client_count = Column(Integer, nullable=False, default=0)
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Text, Enum as SQLEnum
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Text, Index, Enum as SQLEnum
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 import enum
@@ -20,7 +20,8 @@ class MessageStatus(str, enum.Enum):
 class Message(Base):
     __tablename__ = "messages"
 
-    id = Column(Integer, primary_key=True, index=True)
+    # Composite primary key: `messages` is range-partitioned by created_at (monthly)
+    id = Column(Integer, primary_key=True, autoincrement=True, index=True)
     company_id = Column(Integer, ForeignKey("companies.id"), nullable=False)
 
     channel = Column(String, nullable=False)
@@ -34,8 +35,65 @@ class Message(Base):
     received_at = Column(DateTime(timezone=True), nullable=True)
     response_time_seconds = Column(Integer, nullable=True)
 
-    created_at = Column(DateTime(timezone=True), server_default=func.now())
-    updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+    created_at = Column(DateTime(timezone=True), primary_key=True, server_default=func.now())
+    # Set on insert too: the rollup watermark follows it, so messages that arrive
+    # late (created_at already behind the watermark) are still rolled up
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
 
     # Relationships
     company = relationship("Company", back_populates="messages")
+
+    __table_args__ = (
+        # Unique indexes on a partitioned table must contain the partition key; the
+        # dedupe key itself lives in message_keys (MessageKey), which pins created_at
+        Index(
+            "uq_messages_company_channel_external_id",
+            "company_id",
+            "channel",
+            "external_id",
+            "created_at",
+            unique=True,
+            postgresql_where=external_id.isnot(None),
+        ),
+        # Message history (keyset on created_at, id); INCLUDE makes compact pages index-only
+        Index(
+            "ix_messages_company_history",
+            "company_id",
+            created_at.desc(),
+            id.desc(),
+            postgresql_include=[
+                "channel",
+                "message_type",
+                "status",
+                "external_id",
+                "sent_at",
+                "received_at",
+                "response_time_seconds",
+            ],
+        ),
+        # Rollup job: recompute one (company, channel, hour) bucket / find changed rows
+        Index("ix_messages_company_channel_created_at", "company_id", "channel", "created_at"),
+        Index("ix_messages_updated_at", "updated_at"),
+        Index("ix_messages_created_at", "created_at"),
+        {"postgresql_partition_by": "RANGE (created_at)"},
+    )
+
+
+class MessageKey(Base):
+    """
+    Dedupe key of an ingested message (not partitioned, so it is unique
+    without the partition key). Holds the created_at the message row got
+    when the key was first seen; retries and status updates reuse it and
+    hit the same row in `messages`.
+    """
+    __tablename__ = "message_keys"
+
+    company_id = Column(Integer, ForeignKey("companies.id", ondelete="CASCADE"), primary_key=True)
+    channel = Column(String, primary_key=True)
+    external_id = Column(String, primary_key=True)
+    created_at = Column(DateTime(timezone=True), nullable=False)
+
+    __table_args__ = (
+        # Retention: keys of retired partitions are deleted with them
+        Index("ix_message_keys_created_at", "created_at"),
+    )
@@ -0,0 +1,31 @@
+from sqlalchemy import Column, Integer, String, DateTime, JSON, Index, text
+from sqlalchemy.sql import func
+from app.db.session import Base
+
+
+class StripeEvent(Base):
+    """Received Stripe webhook event, processed by the worker in app/services/stripe_events.py."""
+    __tablename__ = "stripe_events"
+
+    id = Column(String, primary_key=True)  # Stripe event id (evt_...), dedupes redeliveries
+    type = Column(String, nullable=False)
+    customer_id = Column(String, nullable=True)  # Events of one customer are applied in order
+    payload = Column(JSON, nullable=False)
+    stripe_created_at = Column(DateTime(timezone=True), nullable=False)
+
+    status = Column(String, nullable=False, default="pending")  # "pending", "processed" or "failed"
+    attempts = Column(Integer, nullable=False, default=0)
+    next_attempt_at = Column(DateTime(timezone=True), server_default=func.now())
+    last_error = Column(String, nullable=True)
+
+    received_at = Column(DateTime(timezone=True), server_default=func.now())
+    processed_at = Column(DateTime(timezone=True), nullable=True)
+
+    __table_args__ = (
+        # Worker queue: pending events per customer in Stripe order
+        Index(
+            "ix_stripe_events_pending",
+            "customer_id", "stripe_created_at", "id",
+            postgresql_where=text("status = 'pending'"),
+        ),
+    )
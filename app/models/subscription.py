@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Float, Enum as SQLEnum
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Float, Index, text, Enum as SQLEnum
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 import enum
@@ -42,5 +42,17 @@ class Subscription(Base):
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
 
+    __table_args__ = (
+        # Latest subscription of a user (ORDER BY created_at DESC LIMIT 1); prefix serves user_id lookups
+        Index("ix_subscriptions_user_created_at", "user_id", created_at.desc()),
+        # Expiry scheduler: open subscriptions in end_date order
+        Index(
+            "ix_subscriptions_open_end_date",
+            "end_date",
+            "id",
+            postgresql_where=text("status IN ('ACTIVE', 'TRIAL')"),
+        ),
+    )
+
     # Relationships
     user = relationship("User", back_populates="subscriptions")
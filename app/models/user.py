@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, DateTime, Boolean, ForeignKey, Enum as SQLEnum
+from sqlalchemy import Column, Integer, String, DateTime, Boolean, ForeignKey, Index, text, Enum as SQLEnum
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 import enum
@@ -38,7 +38,7 @@ class User(Base):
     manager_id = Column(Integer, ForeignKey("users.id"), nullable=True)
 
     # Stripe integration
-    stripe_customer_id = Column(String, nullable=True)
+    stripe_customer_id = Column(String, nullable=True, index=True)
 
     is_active = Column(Boolean, default=True)
     is_superuser = Column(Boolean, default=False)
@@ -51,3 +51,40 @@ class User(Base):
 
     # Manager-Client relationship
     manager = relationship("User", remote_side=[id], foreign_keys=[manager_id], backref="managed_clients")
+
+    __table_args__ = (
+        # Client / manager listings (keyset on id within a role, filtered by manager or tier)
+        Index("ix_users_role_manager_id", "role", "manager_id", "id"),
+        Index("ix_users_role_subscription_tier", "role", "subscription_tier", "id"),
+        # Case-insensitive prefix search (LIKE 'abc%' needs text_pattern_ops outside the C collation)
+        Index("ix_users_email_lower_prefix", text("lower(email) text_pattern_ops")),
+        Index("ix_users_full_name_lower_prefix", text("lower(full_name) text_pattern_ops")),
+        # Admin stats: trial / paid client lists in expiry order (keyset on (ends_at, id))
+        Index(
+            "ix_users_trial_clients_ends_at",
+            "trial_ends_at",
+            "id",
+            postgresql_where=text("role = 'CLIENT' AND subscription_tier = 'TRIAL'"),
+        ),
+        Index(
+            "ix_users_paid_clients_ends_at",
+            "subscription_ends_at",
+            "id",
+            postgresql_where=text("role = 'CLIENT' AND subscription_tier IN ('BASIC', 'PRO', 'ENTERPRISE')"),
+        ),
+        # Same lists for one manager's portfolio
+        Index(
+            "ix_users_manager_trial_clients_ends_at",
+            "manager_id",
+            "trial_ends_at",
+            "id",
+            postgresql_where=text("role = 'CLIENT' AND subscription_tier = 'TRIAL'"),
+        ),
+        Index(
+            "ix_users_manager_paid_clients_ends_at",
+            "manager_id",
+            "subscription_ends_at",
+            "id",
+            postgresql_where=text("role = 'CLIENT' AND subscription_tier IN ('BASIC', 'PRO', 'ENTERPRISE')"),
+        ),
+    )
@@ -9,9 +9,11 @@ class VerificationCode(Base):
 
     id = Column(Integer, primary_key=True, index=True)
     email = Column(String, index=True, nullable=False)
-    code = Column(String, nullable=False)
+    # HMAC-SHA256 of the code / magic link token (see services/verification_store.py)
+    code_hash = Column(String(64), nullable=False, index=True)
     is_used = Column(Boolean, default=False)
-    expires_at = Column(DateTime(timezone=True), nullable=False)
+    # Indexed for the periodic purge
+    expires_at = Column(DateTime(timezone=True), nullable=False, index=True)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
 
     def is_expired(self) -> bool:
@@ -0,0 +1,41 @@
+from pydantic import BaseModel, Field
+from typing import Optional, List
+from datetime import datetime
+from app.models.user import SubscriptionTier
+
+
+class TrialClient(BaseModel):
+    id: int
+    email: str
+    full_name: Optional[str] = None
+    trial_ends_at: datetime
+    days_remaining: int
+
+
+class PaidClient(BaseModel):
+    id: int
+    email: str
+    full_name: Optional[str] = None
+    subscription_tier: SubscriptionTier
+    days_until_renewal: int
+    renewal_date: datetime
+
+
+class TrialClientPage(BaseModel):
+    items: List[TrialClient]
+    next_cursor: Optional[str] = Field(None, description="Pass as `cursor` to get the next page; null on the last page")
+
+
+class PaidClientPage(BaseModel):
+    items: List[PaidClient]
+    next_cursor: Optional[str] = Field(None, description="Pass as `cursor` to get the next page; null on the last page")
+
+
+class SystemStats(BaseModel):
+    total_managers: int
+    clients_with_subscription: int
+    clients_on_trial: int
+    trial_clients: List[TrialClient] = Field(..., description="First page, trials ending soonest first")
+    trial_clients_next_cursor: Optional[str] = Field(None, description="Continue with GET /admin/stats/trial-clients")
+    paid_clients: List[PaidClient] = Field(..., description="First page, renewals soonest first")
+    paid_clients_next_cursor: Optional[str] = Field(None, description="Continue with GET /admin/stats/paid-clients")
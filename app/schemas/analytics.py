@@ -0,0 +1,39 @@
+from pydantic import BaseModel, Field
+from typing import Optional, Dict, List
+from datetime import datetime
+
+
+class TimeseriesPoint(BaseModel):
+    bucket_start: datetime
+    messages: int
+    type1: int
+    type2: int
+    type3: int
+    payment_links_sent: int
+    paid: int
+    conversion_rate: Optional[float] = Field(None, description="paid / payment_links_sent")
+    avg_response_time: Optional[int] = Field(None, description="Seconds")
+
+
+class TimeseriesResponse(BaseModel):
+    company_id: int
+    granularity: str
+    start: datetime
+    end: datetime
+    series: Dict[str, List[TimeseriesPoint]] = Field(..., description="Points per channel")
+
+
+class ResponseTimePoint(BaseModel):
+    bucket_start: datetime
+    count: int = Field(..., description="Messages with a response time")
+    p50: Optional[float] = Field(None, description="Seconds")
+    p90: Optional[float] = Field(None, description="Seconds")
+    p99: Optional[float] = Field(None, description="Seconds")
+
+
+class ResponseTimeResponse(BaseModel):
+    company_id: int
+    granularity: str
+    start: datetime
+    end: datetime
+    series: Dict[str, List[ResponseTimePoint]] = Field(..., description="Points per channel")
@@ -0,0 +1,24 @@
+from pydantic import BaseModel, Field
+from typing import Dict, List, Optional
+from datetime import date
+from app.schemas.admin import TrialClient, PaidClient
+
+
+class ExpiryBucket(BaseModel):
+    day: date
+    days_until: int
+    clients: int
+
+
+class ManagerPortfolioStats(BaseModel):
+    clients_total: int
+    clients_with_subscription: int
+    clients_on_trial: int
+    tier_counts: Dict[str, int] = Field(..., description="Clients per subscription tier")
+    horizon_days: int
+    trial_expiries: List[ExpiryBucket] = Field(..., description="Trials ending per day within the horizon")
+    renewals: List[ExpiryBucket] = Field(..., description="Paid renewals per day within the horizon")
+    trial_clients: List[TrialClient] = Field(..., description="First page, trials ending soonest first")
+    trial_clients_next_cursor: Optional[str] = Field(None, description="Continue with GET /managers/stats/trial-clients")
+    paid_clients: List[PaidClient] = Field(..., description="First page, renewals soonest first")
+    paid_clients_next_cursor: Optional[str] = Field(None, description="Continue with GET /managers/stats/paid-clients")
@@ -0,0 +1,58 @@
+from pydantic import BaseModel, Field
+from typing import Optional, List
+from datetime import datetime
+from app.models.message import MessageType, MessageStatus
+
+# Max events accepted in one ingest request
+MAX_INGEST_BATCH = 1000
+
+
+class MessageEvent(BaseModel):
+    """One inbound/outbound channel message as reported by n8n/WAHA"""
+    company_id: int
+    channel: str = Field(..., min_length=1, max_length=50)
+    external_id: Optional[str] = Field(None, max_length=255, description="Message id in the source channel")
+    message_type: MessageType
+    status: MessageStatus = MessageStatus.NO_PAYMENT_LINK
+    content: Optional[str] = None
+    sent_at: Optional[datetime] = None
+    received_at: Optional[datetime] = Field(
+        None,
+        description="Stored as created_at (falls back to sent_at, then the time of ingestion; future times are clamped to it)",
+    )
+    response_time_seconds: Optional[int] = Field(None, ge=0)
+
+
+class MessageIngestRequest(BaseModel):
+    messages: List[MessageEvent] = Field(..., min_length=1, max_length=MAX_INGEST_BATCH)
+    upsert: bool = Field(
+        False,
+        description="Update status/timestamps of already stored messages instead of skipping them",
+    )
+
+
+class MessageIngestResponse(BaseModel):
+    received: int
+    inserted: int
+    updated: int = 0
+    duplicates: int
+    rejected: int = Field(0, description="Events for unknown companies")
+
+
+class MessageOut(BaseModel):
+    """Stored message; `content` is left out of compact pages"""
+    id: int
+    channel: str
+    message_type: MessageType
+    status: Optional[MessageStatus] = None
+    external_id: Optional[str] = None
+    content: Optional[str] = None
+    sent_at: Optional[datetime] = None
+    received_at: Optional[datetime] = None
+    response_time_seconds: Optional[int] = None
+    created_at: datetime
+
+
+class MessagePage(BaseModel):
+    items: List[MessageOut]
+    next_cursor: Optional[str] = Field(None, description="Pass as `cursor` to get the next page; null on the last page")
@@ -1,5 +1,5 @@
-from pydantic import BaseModel, EmailStr
-from typing import Optional
+from pydantic import BaseModel, EmailStr, Field
+from typing import Optional, List
 from datetime import datetime
 from app.models.user import UserRole, SubscriptionTier
 
@@ -39,3 +39,8 @@ class UserInDB(UserBase):
 
 class User(UserInDB):
     pass
+
+
+class UserPage(BaseModel):
+    items: List[User]
+    next_cursor: Optional[str] = Field(None, description="Pass as `cursor` to get the next page; null on the last page")
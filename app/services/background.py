@@ -0,0 +1,118 @@
+"""
+Periodic background jobs started from the FastAPI lifespan handler.
+Jobs registered with singleton=True run on one API worker at a time:
+each run first takes a transaction-scoped Postgres advisory lock and
+skips the run if another worker holds it.
+"""
+import asyncio
+import zlib
+from typing import Awaitable, Callable, Dict, List, Optional
+
+from sqlalchemy import text
+
+from app.db.session import AsyncSessionLocal
+
+
+class PeriodicTask:
+    """Runs a coroutine function every `interval` seconds until stopped."""
+
+    def __init__(
+        self,
+        name: str,
+        job: Callable[[], Awaitable[None]],
+        interval: float,
+        singleton: bool = True,
+        initial_delay: float = 0.0,
+    ):
+        self.name = name
+        self.job = job
+        self.interval = interval
+        self.singleton = singleton
+        self.initial_delay = initial_delay
+        self.lock_key = zlib.crc32(name.encode())
+        self.runs = 0
+        self.failures = 0
+        self.last_error: Optional[str] = None
+        self._task: Optional[asyncio.Task] = None
+
+    async def run_once(self) -> bool:
+        """Run the job once. Returns False if another worker holds the lock."""
+        if not self.singleton:
+            await self.job()
+            return True
+
+        async with AsyncSessionLocal() as session:
+            acquired = await session.scalar(
+                text("SELECT pg_try_advisory_xact_lock(:key)"), {"key": self.lock_key}
+            )
+            if not acquired:
+                return False
+            try:
+                await self.job()
+            finally:
+                # Ends the transaction and releases the advisory lock
+                await session.commit()
+        return True
+
+    async def _loop(self) -> None:
+        if self.initial_delay:
+            await asyncio.sleep(self.initial_delay)
+        while True:
+            try:
+                if await self.run_once():
+                    self.runs += 1
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.failures += 1
+                self.last_error = str(e)
+                print(f"Background task '{self.name}' failed: {str(e)}")
+            await asyncio.sleep(self.interval)
+
+    def start(self) -> None:
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._loop(), name=f"background:{self.name}")
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def snapshot(self) -> Dict[str, object]:
+        return {
+            "interval": self.interval,
+            "running": self._task is not None and not self._task.done(),
+            "runs": self.runs,
+            "failures": self.failures,
+            "last_error": self.last_error,
+        }
+
+
+class BackgroundTasks:
+    """Registry of periodic tasks owned by the application."""
+
+    def __init__(self):
+        self._tasks: List[PeriodicTask] = []
+
+    def register(self, task: PeriodicTask) -> PeriodicTask:
+        self._tasks.append(task)
+        return task
+
+    def start_all(self) -> None:
+        for task in self._tasks:
+            task.start()
+
+    async def stop_all(self) -> None:
+        for task in self._tasks:
+            await task.stop()
+
+    def status(self) -> Dict[str, object]:
+        return {task.name: task.snapshot() for task in self._tasks}
+
+
+# Singleton instance
+background_tasks = BackgroundTasks()
@@ -0,0 +1,223 @@
+"""
+Stripe billing: plan catalog, customers and payment links.
+Each SUBSCRIPTION_PLANS entry maps to one recurring Stripe Price found by
+its lookup key ("x8_plan_<plan_id>"). `plan_catalog.sync()` looks all of
+them up in one call and creates only missing Prices; when an entry's
+amount, currency or name change, a new Price takes over the lookup key
+and the old one is archived. Price ids are cached per process.
+Payment links are cached per (user, plan) for PAYMENT_LINK_TTL seconds.
+The Stripe SDK is synchronous: every call runs in a worker thread, behind
+the "stripe" circuit breaker / bulkhead.
+"""
+import asyncio
+import hashlib
+import json
+import time
+from collections import OrderedDict
+from functools import partial
+from typing import Any, Callable, Dict, Optional
+
+import stripe
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.models.user import User
+from app.services.resilience import upstream_guards
+
+stripe.api_key = settings.STRIPE_SECRET_KEY
+
+# Define subscription plans with pricing (in cents)
+SUBSCRIPTION_PLANS = {
+    "single": {
+        "name": "Single Plan",
+        "amount": 999,  # $9.99
+        "currency": "usd",
+        "description": "1 channel access"
+    },
+    "double": {
+        "name": "Double Plan",
+        "amount": 1999,  # $19.99
+        "currency": "usd",
+        "description": "2 channels access"
+    },
+    "growth": {
+        "name": "Growth Plan",
+        "amount": 4999,  # $49.99
+        "currency": "usd",
+        "description": "6 channels (all available channels)"
+    },
+    "special": {
+        "name": "Special Offer",
+        "amount": 2999,  # $29.99
+        "currency": "usd",
+        "description": "Special promotional plan"
+    }
+}
+
+PLAN_INTERVAL = "month"
+
+# Stripe errors that mean Stripe itself is unhealthy (trip the circuit breaker);
+# card/validation errors do not
+STRIPE_UPSTREAM_ERRORS = (
+    stripe.error.APIConnectionError,
+    stripe.error.APIError,
+    stripe.error.RateLimitError,
+)
+
+# Periodic catalog re-sync (picks up Prices archived or edited in the dashboard)
+PLAN_CATALOG_SYNC_INTERVAL = 3600.0
+
+# Seconds a user's payment link is reused, and cached links per process
+PAYMENT_LINK_TTL = 24 * 3600.0
+PAYMENT_LINK_CACHE_SIZE = 10_000
+
+
+def lookup_key(plan_id: str) -> str:
+    return f"x8_plan_{plan_id}"
+
+
+def plan_fingerprint(plan: Dict[str, Any]) -> str:
+    """Short hash of the billed fields; a new Price is created when it changes."""
+    fields = {k: plan[k] for k in ("name", "amount", "currency")}
+    fields["interval"] = PLAN_INTERVAL
+    return hashlib.sha256(json.dumps(fields, sort_keys=True).encode()).hexdigest()[:16]
+
+
+async def stripe_call(fn: Callable[..., Any], *args, **kwargs) -> Any:
+    """Run a blocking Stripe SDK call in a worker thread, behind the circuit breaker."""
+    async with upstream_guards.protect("stripe", failure_exceptions=STRIPE_UPSTREAM_ERRORS):
+        return await asyncio.to_thread(partial(fn, *args, **kwargs))
+
+
+class PlanCatalog:
+    """SUBSCRIPTION_PLANS entries -> Stripe Price ids."""
+
+    def __init__(self, plans: Dict[str, Dict[str, Any]]):
+        self.plans = plans
+        self._prices: Dict[str, str] = {}
+        self._lock = asyncio.Lock()
+        self.synced_at: Optional[float] = None
+        self.created = 0
+        self.archived = 0
+
+    async def sync(self) -> Dict[str, str]:
+        """Look up every plan's Price (one list call), create missing or outdated ones."""
+        if not settings.STRIPE_SECRET_KEY:
+            return {}
+        async with self._lock:
+            keys = {lookup_key(plan_id): plan_id for plan_id in self.plans}
+            existing = await stripe_call(
+                stripe.Price.list, lookup_keys=list(keys), active=True, limit=100
+            )
+            current = {price.lookup_key: price for price in existing.data}
+
+            prices = {}
+            for key, plan_id in keys.items():
+                plan = self.plans[plan_id]
+                fingerprint = plan_fingerprint(plan)
+                price = current.get(key)
+                metadata = price.metadata.to_dict() if price is not None and price.metadata else {}
+                if price is not None and metadata.get("fingerprint") == fingerprint:
+                    prices[plan_id] = price.id
+                    continue
+
+                created = await stripe_call(
+                    stripe.Price.create,
+                    currency=plan["currency"],
+                    unit_amount=plan["amount"],
+                    recurring={"interval": PLAN_INTERVAL},
+                    product_data={"name": plan["name"]},
+                    lookup_key=key,
+                    transfer_lookup_key=True,
+                    metadata={"plan_id": plan_id, "fingerprint": fingerprint},
+                    # Workers syncing at the same time create one Price, not several
+                    idempotency_key=f"x8-price-{key}-{fingerprint}",
+                )
+                self.created += 1
+                prices[plan_id] = created.id
+                if price is not None and price.id != created.id:
+                    await stripe_call(stripe.Price.modify, price.id, active=False)
+                    self.archived += 1
+
+            self._prices = prices
+            self.synced_at = time.time()
+            return dict(prices)
+
+    async def price_id(self, plan_id: str) -> str:
+        price = self._prices.get(plan_id)
+        if price is None:
+            await self.sync()
+            price = self._prices[plan_id]
+        return price
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "prices": dict(self._prices),
+            "synced_at": self.synced_at,
+            "created": self.created,
+            "archived": self.archived,
+        }
+
+
+class PaymentLinks:
+    """Stripe customers and per-user payment links (cached)."""
+
+    def __init__(self, catalog: PlanCatalog, ttl: float = PAYMENT_LINK_TTL, max_entries: int = PAYMENT_LINK_CACHE_SIZE):
+        self.catalog = catalog
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._links: "OrderedDict[tuple, tuple]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    async def ensure_customer(self, db: AsyncSession, user: User) -> str:
+        if user.stripe_customer_id:
+            return user.stripe_customer_id
+        customer = await stripe_call(
+            stripe.Customer.create,
+            email=user.email,
+            name=user.full_name,
+            metadata={"user_id": str(user.id)},
+            idempotency_key=f"x8-customer-{user.id}",
+        )
+        user.stripe_customer_id = customer.id
+        await db.commit()
+        return customer.id
+
+    async def get(self, user: User, plan_id: str) -> str:
+        """Payment link URL for the user and plan (reused until it expires or the Price changes)."""
+        price_id = await self.catalog.price_id(plan_id)
+        key = (user.id, plan_id)
+        now = time.monotonic()
+
+        cached = self._links.get(key)
+        if cached is not None and cached[0] > now and cached[1] == price_id:
+            self._links.move_to_end(key)
+            self.hits += 1
+            return cached[2]
+
+        self.misses += 1
+        payment_link = await stripe_call(
+            stripe.PaymentLink.create,
+            line_items=[{"price": price_id, "quantity": 1}],
+            after_completion={
+                "type": "redirect",
+                "redirect": {
+                    "url": f"{settings.FRONTEND_URL}/dashboard?payment=success&plan={plan_id}"
+                }
+            },
+            metadata={"user_id": str(user.id), "plan_id": plan_id},
+        )
+        self._links[key] = (now + self.ttl, price_id, payment_link.url)
+        self._links.move_to_end(key)
+        while len(self._links) > self.max_entries:
+            self._links.popitem(last=False)
+        return payment_link.url
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {"cached_links": len(self._links), "hits": self.hits, "misses": self.misses}
+
+
+# Singleton instances
+plan_catalog = PlanCatalog(SUBSCRIPTION_PLANS)
+payment_links = PaymentLinks(plan_catalog)
@@ -0,0 +1,160 @@
+"""
+User listings for the admin and manager dashboards.
+All lists are keyset pages selecting only the columns the response needs:
+- users_page: clients/managers by id, with tier / manager / trial window /
+  email-or-name prefix filters (indexes on (role, manager_id, id),
+  (role, subscription_tier, id) and lower(email|full_name) prefixes)
+- trial / paid client lists in expiry order (soonest first) on
+  (ends_at, id), backed by partial indexes; days remaining are computed
+  in the database
+"""
+from datetime import datetime
+from typing import Optional
+
+from sqlalchemy import select, func, or_, cast, tuple_, Integer
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.pagination import encode_cursor, decode_cursor
+from app.models.user import User, UserRole, SubscriptionTier
+from app.schemas.admin import TrialClient, PaidClient, TrialClientPage, PaidClientPage
+from app.schemas.user import User as UserSchema, UserPage
+
+PAID_TIERS = [SubscriptionTier.BASIC, SubscriptionTier.PRO, SubscriptionTier.ENTERPRISE]
+
+# Columns of UserSchema (no password hash, no Stripe ids)
+USER_LIST_COLUMNS = (
+    User.id,
+    User.email,
+    User.full_name,
+    User.role,
+    User.subscription_tier,
+    User.trial_ends_at,
+    User.subscription_ends_at,
+    User.manager_id,
+    User.is_active,
+    User.is_superuser,
+    User.created_at,
+    User.updated_at,
+)
+
+
+def _prefix_pattern(prefix: str) -> str:
+    """Case-insensitive LIKE prefix pattern (wildcards in the input are escaped)."""
+    escaped = prefix.lower().replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+    return escaped + "%"
+
+
+def days_left(column):
+    """Whole days until `column` (floored, never negative), computed in the database."""
+    seconds = func.extract("epoch", column - func.now())
+    return cast(func.greatest(func.floor(seconds / 86400), 0), Integer)
+
+
+async def users_page(
+    db: AsyncSession,
+    role: UserRole,
+    limit: int,
+    cursor: Optional[str] = None,
+    tier: Optional[SubscriptionTier] = None,
+    manager_id: Optional[int] = None,
+    trial_ends_after: Optional[datetime] = None,
+    trial_ends_before: Optional[datetime] = None,
+    search: Optional[str] = None,
+) -> UserPage:
+    """Users of a role in id order (keyset on id), filtered in the database."""
+    query = select(*USER_LIST_COLUMNS).where(User.role == role)
+    if tier is not None:
+        query = query.where(User.subscription_tier == tier)
+    if manager_id is not None:
+        query = query.where(User.manager_id == manager_id)
+    if trial_ends_after is not None:
+        query = query.where(User.trial_ends_at >= trial_ends_after)
+    if trial_ends_before is not None:
+        query = query.where(User.trial_ends_at < trial_ends_before)
+    if search:
+        pattern = _prefix_pattern(search)
+        query = query.where(or_(
+            func.lower(User.email).like(pattern, escape="\\"),
+            func.lower(User.full_name).like(pattern, escape="\\"),
+        ))
+    after = decode_cursor(cursor, int)
+    if after:
+        query = query.where(User.id > after[0])
+
+    result = await db.execute(query.order_by(User.id).limit(limit + 1))
+    rows = result.mappings().all()
+
+    items = [UserSchema(**row) for row in rows[:limit]]
+    next_cursor = encode_cursor(rows[limit - 1]["id"]) if len(rows) > limit else None
+    return UserPage(items=items, next_cursor=next_cursor)
+
+
+async def trial_clients_page(
+    db: AsyncSession,
+    limit: int,
+    cursor: Optional[str] = None,
+    manager_id: Optional[int] = None,
+) -> TrialClientPage:
+    """Trial clients, trials ending soonest first (keyset on (trial_ends_at, id))."""
+    query = select(
+        User.id,
+        User.email,
+        User.full_name,
+        User.trial_ends_at,
+        days_left(User.trial_ends_at).label("days_remaining"),
+    ).where(
+        User.role == UserRole.CLIENT,
+        User.subscription_tier == SubscriptionTier.TRIAL,
+        User.trial_ends_at.is_not(None),
+    )
+    if manager_id is not None:
+        query = query.where(User.manager_id == manager_id)
+    after = decode_cursor(cursor, datetime, int)
+    if after:
+        query = query.where(tuple_(User.trial_ends_at, User.id) > tuple(after))
+
+    result = await db.execute(query.order_by(User.trial_ends_at, User.id).limit(limit + 1))
+    rows = result.mappings().all()
+
+    items = [TrialClient(**row) for row in rows[:limit]]
+    next_cursor = None
+    if len(rows) > limit:
+        last = rows[limit - 1]
+        next_cursor = encode_cursor(last["trial_ends_at"], last["id"])
+    return TrialClientPage(items=items, next_cursor=next_cursor)
+
+
+async def paid_clients_page(
+    db: AsyncSession,
+    limit: int,
+    cursor: Optional[str] = None,
+    manager_id: Optional[int] = None,
+) -> PaidClientPage:
+    """Paid clients, renewals soonest first (keyset on (subscription_ends_at, id))."""
+    query = select(
+        User.id,
+        User.email,
+        User.full_name,
+        User.subscription_tier,
+        days_left(User.subscription_ends_at).label("days_until_renewal"),
+        User.subscription_ends_at.label("renewal_date"),
+    ).where(
+        User.role == UserRole.CLIENT,
+        User.subscription_tier.in_(PAID_TIERS),
+        User.subscription_ends_at.is_not(None),
+    )
+    if manager_id is not None:
+        query = query.where(User.manager_id == manager_id)
+    after = decode_cursor(cursor, datetime, int)
+    if after:
+        query = query.where(tuple_(User.subscription_ends_at, User.id) > tuple(after))
+
+    result = await db.execute(query.order_by(User.subscription_ends_at, User.id).limit(limit + 1))
+    rows = result.mappings().all()
+
+    items = [PaidClient(**row) for row in rows[:limit]]
+    next_cursor = None
+    if len(rows) > limit:
+        last = rows[limit - 1]
+        next_cursor = encode_cursor(last["renewal_date"], last["id"])
+    return PaidClientPage(items=items, next_cursor=next_cursor)
@@ -2,12 +2,16 @@
 Cloudinary service for media uploads.
 Automatically creates user-specific folders and manages media assets.
 """
+import asyncio
 import cloudinary
 import cloudinary.uploader
 import cloudinary.api
 from typing import Optional, List, Dict, Any
 from app.core.config import settings
 
+# Cloudinary Admin API accepts at most 100 public IDs per delete_resources call
+DELETE_CHUNK_SIZE = 100
+
 
 class CloudinaryService:
     """Service for managing Cloudinary uploads and folders."""
@@ -219,6 +223,54 @@ class CloudinaryService:
         except Exception as e:
             raise Exception(f"Failed to delete file from Cloudinary: {str(e)}")
 
+    async def delete_files(self, public_ids: List[str]) -> Dict[str, str]:
+        """
+        Delete many files from Cloudinary using the bulk Admin API.
+
+        Ids are sent in chunks of DELETE_CHUNK_SIZE (the Admin API limit).
+        The resource type of each id is unknown, so every chunk is tried as
+        images first and whatever comes back "not_found" is retried as videos.
+        The blocking SDK calls run in a worker thread.
+
+        Args:
+            public_ids: Cloudinary public IDs of the files
+
+        Returns:
+            Dictionary mapping each public_id to "deleted", "not_found" or an error message
+        """
+        if not self.is_configured():
+            raise Exception("Cloudinary is not configured")
+
+        results: Dict[str, str] = {}
+
+        for start in range(0, len(public_ids), DELETE_CHUNK_SIZE):
+            chunk = public_ids[start:start + DELETE_CHUNK_SIZE]
+            pending = chunk
+
+            for resource_type in ("image", "video"):
+                if not pending:
+                    break
+                try:
+                    response = await asyncio.to_thread(
+                        cloudinary.api.delete_resources,
+                        pending,
+                        resource_type=resource_type,
+                        type="upload",
+                        invalidate=True,
+                    )
+                except Exception as e:
+                    for public_id in pending:
+                        results[public_id] = f"error: {str(e)}"
+                    pending = []
+                    break
+
+                deleted = response.get("deleted", {})
+                for public_id in pending:
+                    results[public_id] = deleted.get(public_id, "not_found")
+                pending = [p for p in pending if results[p] == "not_found"]
+
+        return results
+
     async def get_user_media(
         self,
         user_id: int,
@@ -0,0 +1,292 @@
+"""
+Email delivery worker.
+Drains `email_outbox` (see email_outbox.py) over a small pool of SMTP
+connections that stay connected and authenticated between emails, so a
+signup burst costs one TLS handshake + login per pooled connection
+instead of one per email:
+- each run claims up to EMAIL_BATCH_SIZE due rows with FOR UPDATE SKIP
+  LOCKED and leases them for EMAIL_CLAIM_LEASE seconds, so every API
+  worker can run it without sending an email twice (a worker that dies
+  mid-batch only delays its rows until the lease ends)
+- sends are spread over the pool and paced by EMAIL_RATE_LIMIT (emails
+  per second, per process)
+- failures are retried with exponential backoff; permanent SMTP
+  rejections (5xx) and emails still failing after MAX_ATTEMPTS are
+  marked "failed"
+- sent and failed rows lose the secret payload fields (codes, magic
+  links) in the same UPDATE; only pending rows still hold them
+Without SMTP configured (development) emails are printed to the console.
+"""
+import asyncio
+import time
+from contextlib import asynccontextmanager
+from datetime import datetime, timedelta, timezone
+from email.mime.multipart import MIMEMultipart
+from email.mime.text import MIMEText
+from typing import Any, Dict, List, Optional
+
+import aiosmtplib
+from sqlalchemy import select, update, delete, func
+
+from app.core.config import settings
+from app.db.session import AsyncSessionLocal
+from app.models.email_outbox import EmailOutbox
+from app.services.email_outbox import PENDING, SENT, FAILED, scrub_payload
+from app.services.email_templates import email_templates
+
+# Worker poll interval, seconds
+EMAIL_POLL_INTERVAL = 1.0
+
+# Rows claimed per run, and seconds they stay leased to the claiming worker
+EMAIL_BATCH_SIZE = 100
+EMAIL_CLAIM_LEASE = 120.0
+
+# Pooled SMTP connections per process; idle ones are closed after EMAIL_SMTP_IDLE_TIMEOUT seconds
+EMAIL_SMTP_POOL_SIZE = 4
+EMAIL_SMTP_IDLE_TIMEOUT = 60.0
+
+# Emails per second per process (provider sending limits)
+EMAIL_RATE_LIMIT = 20.0
+
+# Retry backoff: RETRY_BASE_DELAY * 2^(attempt-1), capped; failed for good after MAX_ATTEMPTS
+MAX_ATTEMPTS = 6
+RETRY_BASE_DELAY = 30.0
+RETRY_MAX_DELAY = 3600.0
+
+# Sent / failed emails are kept this long
+EMAIL_OUTBOX_RETENTION_DAYS = 7
+EMAIL_OUTBOX_PURGE_INTERVAL = 3600.0
+
+# Connection-level errors: drop the connection and retry the email once on a fresh one
+RECONNECT_ERRORS = (aiosmtplib.SMTPServerDisconnected, ConnectionError)
+
+
+def smtp_configured() -> bool:
+    return bool(settings.SMTP_HOST) and settings.SMTP_HOST != "localhost"
+
+
+def retry_delay(attempts: int) -> timedelta:
+    return timedelta(seconds=min(RETRY_BASE_DELAY * 2 ** (attempts - 1), RETRY_MAX_DELAY))
+
+
+def build_message(kind: str, recipient: str, payload: Dict[str, Any]) -> MIMEMultipart:
+    rendered = email_templates.render(kind, payload, payload.get("locale"))
+    message = MIMEMultipart("alternative")
+    message["Subject"] = rendered.subject
+    message["From"] = settings.SMTP_FROM_EMAIL
+    message["To"] = recipient
+    message.attach(MIMEText(rendered.text, "plain"))
+    message.attach(MIMEText(rendered.html, "html"))
+    return message
+
+
+class RateLimiter:
+    """Token bucket: at most `rate` acquisitions per second, bursts up to one second's worth."""
+
+    def __init__(self, rate: float):
+        self.rate = rate
+        self._tokens = rate
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self) -> None:
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self._tokens = min(self.rate, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+
+
+class SMTPPool:
+    """Connected, logged-in SMTP clients reused across emails."""
+
+    def __init__(self, size: int = EMAIL_SMTP_POOL_SIZE, idle_timeout: float = EMAIL_SMTP_IDLE_TIMEOUT):
+        self.size = size
+        self.idle_timeout = idle_timeout
+        self._idle: List[tuple] = []
+        self._slots = asyncio.Semaphore(size)
+        self.connects = 0
+
+    async def _connect(self) -> aiosmtplib.SMTP:
+        client = aiosmtplib.SMTP(
+            hostname=settings.SMTP_HOST,
+            port=settings.SMTP_PORT,
+            username=settings.SMTP_USERNAME or None,
+            password=settings.SMTP_PASSWORD or None,
+            use_tls=settings.SMTP_USE_TLS,
+        )
+        await client.connect()
+        self.connects += 1
+        return client
+
+    @staticmethod
+    async def _close(client: aiosmtplib.SMTP) -> None:
+        try:
+            await client.quit()
+        except Exception:
+            client.close()
+
+    @asynccontextmanager
+    async def connection(self):
+        """Borrow a connection; it is returned to the pool unless the connection failed."""
+        async with self._slots:
+            client = None
+            now = time.monotonic()
+            while self._idle:
+                candidate, returned_at = self._idle.pop()
+                if candidate.is_connected and now - returned_at < self.idle_timeout:
+                    client = candidate
+                    break
+                await self._close(candidate)
+            if client is None:
+                client = await self._connect()
+
+            try:
+                yield client
+            except RECONNECT_ERRORS:
+                client.close()
+                raise
+            finally:
+                # Rejected emails leave the session usable
+                if client.is_connected:
+                    self._idle.append((client, time.monotonic()))
+
+    async def close(self) -> None:
+        while self._idle:
+            client, _ = self._idle.pop()
+            await self._close(client)
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {"size": self.size, "idle": len(self._idle), "connects": self.connects}
+
+
+class EmailDeliveryWorker:
+    """Claims due outbox rows and delivers them through the SMTP pool."""
+
+    def __init__(self):
+        self.pool = SMTPPool()
+        self.limiter = RateLimiter(EMAIL_RATE_LIMIT)
+        self.sent = 0
+        self.retried = 0
+        self.failed = 0
+        self.last_error: Optional[str] = None
+
+    async def _claim(self) -> List[Any]:
+        due = (
+            select(EmailOutbox.id)
+            .where(EmailOutbox.status == PENDING, EmailOutbox.next_attempt_at <= func.now())
+            .order_by(EmailOutbox.next_attempt_at, EmailOutbox.id)
+            .limit(EMAIL_BATCH_SIZE)
+            .with_for_update(skip_locked=True)
+        )
+        async with AsyncSessionLocal() as db:
+            result = await db.execute(
+                update(EmailOutbox)
+                .where(EmailOutbox.id.in_(due.scalar_subquery()))
+                .values(next_attempt_at=func.now() + timedelta(seconds=EMAIL_CLAIM_LEASE))
+                .returning(EmailOutbox.id, EmailOutbox.kind, EmailOutbox.recipient,
+                           EmailOutbox.payload, EmailOutbox.attempts)
+            )
+            rows = result.all()
+            await db.commit()
+        return rows
+
+    async def send(self, message: MIMEMultipart) -> None:
+        """Send one message through the pool (rate limited)."""
+        await self.limiter.acquire()
+        try:
+            async with self.pool.connection() as client:
+                await client.send_message(message)
+        except RECONNECT_ERRORS:
+            # Pooled connection dropped by the server: one retry on a fresh connection
+            async with self.pool.connection() as client:
+                await client.send_message(message)
+
+    async def _deliver(self, row) -> Dict[str, Any]:
+        """Send one claimed row; returns the outbox update for it."""
+        attempts = row.attempts + 1
+        try:
+            message = build_message(row.kind, row.recipient, row.payload or {})
+            if smtp_configured():
+                await self.send(message)
+            else:
+                self._print(row.recipient, message)
+        except Exception as e:
+            self.last_error = f"{row.id}: {str(e)}"
+            print(f"Email {row.id} ({row.kind}) to {row.recipient} failed: {str(e)}")
+            # Unknown template, refused recipients or a 5xx rejection: retrying will not help
+            permanent = isinstance(e, (KeyError, aiosmtplib.SMTPRecipientsRefused)) or (
+                isinstance(e, aiosmtplib.SMTPResponseException) and e.code >= 500
+            )
+            values = {"id": row.id, "attempts": attempts, "last_error": str(e)[:1000]}
+            if permanent or attempts >= MAX_ATTEMPTS:
+                self.failed += 1
+                return {**values, "status": FAILED, "payload": scrub_payload(row.payload or {})}
+            self.retried += 1
+            return {**values, "next_attempt_at": datetime.now(timezone.utc) + retry_delay(attempts)}
+
+        self.sent += 1
+        return {
+            "id": row.id,
+            "attempts": attempts,
+            "status": SENT,
+            "sent_at": datetime.now(timezone.utc),
+            "payload": scrub_payload(row.payload or {}),
+        }
+
+    @staticmethod
+    def _print(recipient: str, message: MIMEMultipart) -> None:
+        # Development mode - print to console
+        text_part = message.get_payload()[0].get_payload(decode=True).decode()
+        print("\n" + "=" * 60)
+        print(f"📧 {message['Subject']} -> {recipient}")
+        print("=" * 60)
+        print(text_part.strip())
+        print("=" * 60 + "\n")
+
+    async def run(self) -> None:
+        """Periodic job: deliver one batch of due emails."""
+        rows = await self._claim()
+        if not rows:
+            return
+
+        results = await asyncio.gather(*(self._deliver(row) for row in rows))
+        async with AsyncSessionLocal() as db:
+            # Bulk UPDATE by primary key, one executemany per distinct column set
+            for columns in {tuple(sorted(result)) for result in results}:
+                await db.execute(
+                    update(EmailOutbox),
+                    [result for result in results if tuple(sorted(result)) == columns],
+                )
+            await db.commit()
+
+    async def purge(self) -> None:
+        """Periodic job: delete sent / failed emails past the retention window."""
+        cutoff = datetime.now(timezone.utc) - timedelta(days=EMAIL_OUTBOX_RETENTION_DAYS)
+        async with AsyncSessionLocal() as db:
+            await db.execute(
+                delete(EmailOutbox).where(EmailOutbox.status != PENDING, EmailOutbox.created_at < cutoff)
+            )
+            await db.commit()
+
+    async def close(self) -> None:
+        await self.pool.close()
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "smtp_configured": smtp_configured(),
+            "pool": self.pool.snapshot(),
+            "rate_limit": self.limiter.rate,
+            "sent": self.sent,
+            "retried": self.retried,
+            "failed": self.failed,
+            "last_error": self.last_error,
+        }
+
+
+# Singleton instance
+email_delivery = EmailDeliveryWorker()
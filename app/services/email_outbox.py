@@ -0,0 +1,40 @@
+"""
+Outgoing email queue.
+Emails are written to `email_outbox` in the caller's transaction (so a
+notice is queued if and only if the change it reports is committed) and
+delivered later by a worker.
+"""
+from typing import Any, Dict, Iterable
+
+from sqlalchemy import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.email_outbox import EmailOutbox
+
+PENDING = "pending"
+SENT = "sent"
+FAILED = "failed"
+
+# Payload fields holding credentials (verification codes, magic links); cleared
+# once the email is sent or has failed for good, the row itself is kept a while
+SECRET_PAYLOAD_KEYS = ("code", "magic_link_url")
+
+
+def scrub_payload(payload: Dict[str, Any]) -> Dict[str, Any]:
+    return {key: value for key, value in payload.items() if key not in SECRET_PAYLOAD_KEYS}
+
+# Rows per INSERT when queueing in bulk
+ENQUEUE_CHUNK_SIZE = 1000
+
+
+async def enqueue(db: AsyncSession, kind: str, recipient: str, payload: Dict[str, Any]) -> None:
+    """Queue one email (not committed)."""
+    await enqueue_many(db, [{"kind": kind, "recipient": recipient, "payload": payload}])
+
+
+async def enqueue_many(db: AsyncSession, emails: Iterable[Dict[str, Any]]) -> int:
+    """Queue emails given as {"kind", "recipient", "payload"} dicts (not committed). Returns the count."""
+    rows = [{**email, "status": PENDING, "attempts": 0} for email in emails]
+    for start in range(0, len(rows), ENQUEUE_CHUNK_SIZE):
+        await db.execute(insert(EmailOutbox), rows[start:start + ENQUEUE_CHUNK_SIZE])
+    return len(rows)
@@ -0,0 +1,139 @@
+"""
+Outgoing email templates (Jinja2, app/templates/email).
+Each outbox `kind` has `<kind>.txt` (with a `subject` block) and
+`<kind>.html`, both extending the shared layouts; a localized variant
+lives in `<locale>/` and falls back to the default one per file. All
+templates are compiled once (at startup, see `load()`) into a table keyed
+by (locale, kind), so rendering is a dict lookup plus the compiled
+render functions; compiled bytecode is cached on disk so other workers
+and restarts skip parsing. The cache holds marshalled code, so it only
+lives in a directory private to the process user: Jinja's per-user
+temp directory by default, or EMAIL_TEMPLATE_CACHE_DIR, which must be
+owned by that user with mode 0700. HTML templates are autoescaped.
+"""
+import os
+import stat
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from jinja2 import Environment, FileSystemBytecodeCache, FileSystemLoader, Template, select_autoescape
+
+from app.core.config import settings
+
+TEMPLATE_DIR = Path(__file__).resolve().parent.parent / "templates" / "email"
+
+DEFAULT_LOCALE = "en"
+LOCALES = ("en", "ru")
+
+# Shared files, not email kinds
+NON_KIND_TEMPLATES = {"layout", "macros"}
+
+
+@dataclass(frozen=True)
+class RenderedEmail:
+    subject: str
+    text: str
+    html: str
+
+
+@dataclass(frozen=True)
+class CompiledEmail:
+    text: Template
+    html: Template
+
+    def render(self, variables: Dict[str, Any]) -> RenderedEmail:
+        context = self.text.new_context(variables)
+        subject = "".join(self.text.blocks["subject"](context)).strip()
+        return RenderedEmail(
+            subject=subject,
+            text=self.text.render(variables).strip() + "\n",
+            html=self.html.render(variables),
+        )
+
+
+def preferred_locale(accept_language: Optional[str]) -> Optional[str]:
+    """Best supported locale from an Accept-Language header (None if nothing matches)."""
+    ranked: List[Tuple[float, int, str]] = []
+    for position, part in enumerate((accept_language or "").split(",")):
+        tag, _, params = part.strip().partition(";")
+        quality = 1.0
+        if params.strip().startswith("q="):
+            try:
+                quality = float(params.strip()[2:])
+            except ValueError:
+                continue
+        language = tag.split("-")[0].lower()
+        if language in LOCALES and quality > 0:
+            ranked.append((-quality, position, language))
+    return min(ranked)[2] if ranked else None
+
+
+class EmailTemplates:
+    """Compiled email templates per (locale, kind)."""
+
+    def __init__(self, directory: Path = TEMPLATE_DIR, cache_dir: Optional[str] = None):
+        self.directory = directory
+        self.cache_dir = cache_dir
+        self._compiled: Dict[Tuple[str, str], CompiledEmail] = {}
+
+    @staticmethod
+    def _bytecode_cache(cache_dir: Optional[str]) -> FileSystemBytecodeCache:
+        """
+        Bytecode cache in `cache_dir`, refused unless it is private to this user;
+        without a directory Jinja picks (and checks) a per-user one in the temp dir.
+        """
+        if not cache_dir:
+            return FileSystemBytecodeCache()
+        os.makedirs(cache_dir, mode=0o700, exist_ok=True)
+        info = os.lstat(cache_dir)
+        if (
+            not stat.S_ISDIR(info.st_mode)
+            or info.st_uid != os.getuid()
+            or stat.S_IMODE(info.st_mode) != 0o700
+        ):
+            raise RuntimeError(
+                f"Email template cache {cache_dir} must be a directory owned by uid {os.getuid()} with mode 0700"
+            )
+        return FileSystemBytecodeCache(cache_dir)
+
+    def _environment(self) -> Environment:
+        return Environment(
+            loader=FileSystemLoader(str(self.directory)),
+            autoescape=select_autoescape(["html"]),
+            bytecode_cache=self._bytecode_cache(self.cache_dir or settings.EMAIL_TEMPLATE_CACHE_DIR),
+            # Compiled once; template edits are picked up on restart
+            auto_reload=False,
+            trim_blocks=True,
+            lstrip_blocks=True,
+        )
+
+    def kinds(self) -> List[str]:
+        return sorted(
+            path.stem for path in self.directory.glob("*.txt") if path.stem not in NON_KIND_TEMPLATES
+        )
+
+    def load(self) -> int:
+        """Compile every kind for every locale. Returns the number of (locale, kind) entries."""
+        env = self._environment()
+        compiled = {}
+        for kind in self.kinds():
+            for locale in LOCALES:
+                compiled[(locale, kind)] = CompiledEmail(
+                    text=env.select_template([f"{locale}/{kind}.txt", f"{kind}.txt"]),
+                    html=env.select_template([f"{locale}/{kind}.html", f"{kind}.html"]),
+                )
+        self._compiled = compiled
+        return len(compiled)
+
+    def render(self, kind: str, payload: Dict[str, Any], locale: Optional[str] = None) -> RenderedEmail:
+        """Render a queued email. Raises KeyError for an unknown kind."""
+        if not self._compiled:
+            self.load()
+        template = self._compiled.get((locale or DEFAULT_LOCALE, kind)) or self._compiled[(DEFAULT_LOCALE, kind)]
+        variables = {"dashboard_url": f"{settings.FRONTEND_URL}/dashboard", **payload}
+        return template.render(variables)
+
+
+# Singleton instance
+email_templates = EmailTemplates()
@@ -0,0 +1,310 @@
+"""
+Plan entitlements.
+What a user may do is resolved in one query: the plan and end date of
+their latest subscription plus the number of connected channels. Without
+a subscription the user is on the signup trial (users.trial_ends_at); an
+expired or cancelled latest subscription counts as an ended FREE plan,
+which allows no channels. The
+result is cached per user for ENTITLEMENT_CACHE_TTL seconds and dropped
+from the cache when it changes in this process (Stripe webhooks, channel
+connect/disconnect, WAHA session status sync); other workers pick the
+change up when their entry expires. Enforcement paths (channel limit)
+always read fresh values.
+"""
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterable, Optional
+
+from fastapi import HTTPException, status
+from sqlalchemy import select, func, true
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.models.channel import Channel, ChannelStatus
+from app.models.subscription import Subscription, SubscriptionPlan, SubscriptionStatus
+from app.models.user import User
+
+PLAN_CHANNELS = {
+    SubscriptionPlan.FREE: {
+        "whatsapp": True,
+        "telegram": True,
+        "instagram": True,
+        "facebook": True,
+        "email": True,
+        "tiktok": True,
+    },
+    SubscriptionPlan.SINGLE: {
+        "whatsapp": True,
+        "telegram": True,
+        "instagram": True,
+        "facebook": True,
+        "email": True,
+        "tiktok": True,
+    },
+    SubscriptionPlan.DOUBLE: {
+        "whatsapp": True,
+        "telegram": True,
+        "instagram": True,
+        "facebook": True,
+        "email": True,
+        "tiktok": True,
+    },
+    SubscriptionPlan.GROWTH: {
+        "whatsapp": True,
+        "telegram": True,
+        "instagram": True,
+        "facebook": True,
+        "email": True,
+        "tiktok": True,
+    },
+    SubscriptionPlan.ENTERPRISE: {
+        "whatsapp": True,
+        "telegram": True,
+        "instagram": True,
+        "facebook": True,
+        "email": True,
+        "tiktok": True,
+    },
+}
+
+NO_CHANNELS = dict.fromkeys(PLAN_CHANNELS[SubscriptionPlan.FREE], False)
+
+PLAN_CHANNEL_LIMITS = {
+    SubscriptionPlan.FREE: 1,
+    SubscriptionPlan.SINGLE: 1,
+    SubscriptionPlan.DOUBLE: 2,
+    SubscriptionPlan.GROWTH: 4,
+    SubscriptionPlan.ENTERPRISE: None,
+}
+
+# Subscription statuses that still grant their plan
+OPEN_STATUSES = (SubscriptionStatus.ACTIVE, SubscriptionStatus.TRIAL)
+
+# Cached users per process (least recently used are evicted first)
+ENTITLEMENT_CACHE_SIZE = 10_000
+
+
+@dataclass(frozen=True)
+class Entitlements:
+    """A user's plan and usage; time-dependent fields are computed on access."""
+
+    user_id: int
+    plan: SubscriptionPlan
+    plan_ends_at: Optional[datetime]
+    connected_channels: int
+
+    @property
+    def channel_limit(self) -> Optional[int]:
+        return PLAN_CHANNEL_LIMITS.get(self.plan)
+
+    @property
+    def is_trial(self) -> bool:
+        return self.plan == SubscriptionPlan.FREE
+
+    @property
+    def is_enterprise(self) -> bool:
+        return self.plan == SubscriptionPlan.ENTERPRISE
+
+    @property
+    def trial_end_date(self) -> Optional[datetime]:
+        return self.plan_ends_at if self.is_trial else None
+
+    @property
+    def days_left(self) -> Optional[int]:
+        ends_at = self.trial_end_date
+        if ends_at is None:
+            return None
+        if ends_at.tzinfo is None:
+            ends_at = ends_at.replace(tzinfo=timezone.utc)
+        return max(0, (ends_at - datetime.now(timezone.utc)).days)
+
+    @property
+    def trial_expired(self) -> bool:
+        ends_at = self.trial_end_date
+        if ends_at is None:
+            return False
+        if ends_at.tzinfo is None:
+            ends_at = ends_at.replace(tzinfo=timezone.utc)
+        return ends_at < datetime.now(timezone.utc)
+
+    def available_channels(self) -> Dict[str, bool]:
+        # Expired trials get nothing; enterprise is set up by hand, not through the standard UI
+        if self.trial_expired or self.is_enterprise:
+            return dict(NO_CHANNELS)
+        return dict(PLAN_CHANNELS.get(self.plan, PLAN_CHANNELS[SubscriptionPlan.FREE]))
+
+    @property
+    def allowed_channels(self) -> Optional[int]:
+        """Connected channels allowed right now (None = unlimited, 0 once the trial/plan has ended)."""
+        if self.trial_expired:
+            return 0
+        return self.channel_limit
+
+    def can_connect_channel(self) -> bool:
+        limit = self.allowed_channels
+        return limit is None or self.connected_channels < limit
+
+
+def _entitlements(user_id: int, row) -> Entitlements:
+    connected = row.connected_channels or 0
+    if row.plan is None:
+        # No subscription yet: signup trial
+        return Entitlements(user_id, SubscriptionPlan.FREE, row.trial_ends_at, connected)
+    if row.status in OPEN_STATUSES:
+        return Entitlements(user_id, row.plan, row.end_date, connected)
+    # Expired / cancelled: an ended FREE plan
+    ended_at = row.end_date or row.cancelled_at or row.trial_ends_at
+    return Entitlements(user_id, SubscriptionPlan.FREE, ended_at, connected)
+
+
+def _resolve_statement(user_id: int):
+    # One round trip: latest subscription (user_id, created_at DESC index), trial end, connected channel count
+    latest = (
+        select(Subscription.plan, Subscription.status, Subscription.end_date, Subscription.cancelled_at)
+        .where(Subscription.user_id == user_id)
+        .order_by(Subscription.created_at.desc())
+        .limit(1)
+        .subquery()
+    )
+    connected = select(
+        select(func.count())
+        .select_from(Channel)
+        .where(Channel.user_id == user_id, Channel.status == ChannelStatus.CONNECTED)
+        .scalar_subquery()
+        .label("connected_channels")
+    ).subquery()
+    # Outer joins: one row even for users without a subscription
+    return select(
+        latest.c.plan,
+        latest.c.status,
+        latest.c.end_date,
+        latest.c.cancelled_at,
+        User.trial_ends_at,
+        connected.c.connected_channels,
+    ).select_from(
+        connected.outerjoin(latest, true()).outerjoin(User, User.id == user_id)
+    )
+
+
+def _resolve_many_statement(user_ids):
+    """Same as _resolve_statement for a batch of users (grouped passes instead of per-user lookups)."""
+    ranked = (
+        select(
+            Subscription.user_id,
+            Subscription.plan,
+            Subscription.status,
+            Subscription.end_date,
+            Subscription.cancelled_at,
+            func.row_number().over(
+                partition_by=Subscription.user_id, order_by=Subscription.created_at.desc()
+            ).label("rank"),
+        )
+        .where(Subscription.user_id.in_(user_ids))
+        .subquery()
+    )
+    connected = (
+        select(Channel.user_id, func.count().label("connected_channels"))
+        .where(Channel.user_id.in_(user_ids), Channel.status == ChannelStatus.CONNECTED)
+        .group_by(Channel.user_id)
+        .subquery()
+    )
+    return (
+        select(
+            User.id,
+            ranked.c.plan,
+            ranked.c.status,
+            ranked.c.end_date,
+            ranked.c.cancelled_at,
+            User.trial_ends_at,
+            connected.c.connected_channels,
+        )
+        .outerjoin(ranked, (ranked.c.user_id == User.id) & (ranked.c.rank == 1))
+        .outerjoin(connected, connected.c.user_id == User.id)
+        .where(User.id.in_(user_ids))
+    )
+
+
+class EntitlementService:
+    """Resolves and caches per-user entitlements."""
+
+    def __init__(self, ttl: Optional[float] = None, max_entries: int = ENTITLEMENT_CACHE_SIZE):
+        # Seconds a resolved entitlement is served from the cache
+        self.ttl = settings.ENTITLEMENT_CACHE_TTL if ttl is None else ttl
+        self.max_entries = max_entries
+        self._cache: "OrderedDict[int, tuple]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    async def resolve(self, db: AsyncSession, user_id: int) -> Entitlements:
+        """Read a user's entitlements from the database (no cache)."""
+        row = (await db.execute(_resolve_statement(user_id))).one()
+        return _entitlements(user_id, row)
+
+    async def resolve_many(self, db: AsyncSession, user_ids: Iterable[int]) -> Dict[int, Entitlements]:
+        """Entitlements of several users in one query (no cache)."""
+        user_ids = list(user_ids)
+        if not user_ids:
+            return {}
+        result = await db.execute(_resolve_many_statement(user_ids))
+        return {row.id: _entitlements(row.id, row) for row in result.all()}
+
+    async def get(self, db: AsyncSession, user_id: int, fresh: bool = False) -> Entitlements:
+        """Cached entitlements; fresh=True re-reads them (and refreshes the cache)."""
+        now = time.monotonic()
+        if not fresh:
+            cached = self._cache.get(user_id)
+            if cached is not None and cached[0] > now:
+                self._cache.move_to_end(user_id)
+                self.hits += 1
+                return cached[1]
+
+        self.misses += 1
+        entitlements = await self.resolve(db, user_id)
+        self._cache[user_id] = (now + self.ttl, entitlements)
+        self._cache.move_to_end(user_id)
+        while len(self._cache) > self.max_entries:
+            self._cache.popitem(last=False)
+        return entitlements
+
+    async def require_channel_slot(self, db: AsyncSession, user_id: int) -> Entitlements:
+        """403 if the user's plan does not allow one more connected channel."""
+        entitlements = await self.get(db, user_id, fresh=True)
+        if entitlements.trial_expired:
+            raise HTTPException(
+                status_code=status.HTTP_403_FORBIDDEN,
+                detail="Your trial or subscription has ended. Please choose a plan to connect channels.",
+            )
+        if not entitlements.can_connect_channel():
+            raise HTTPException(
+                status_code=status.HTTP_403_FORBIDDEN,
+                detail=(
+                    f"Channel limit reached. Your {entitlements.plan.value} plan allows "
+                    f"maximum {entitlements.channel_limit} channels."
+                ),
+            )
+        return entitlements
+
+    def invalidate(self, *user_ids: Optional[int]) -> None:
+        """Drop cached entitlements after a plan or channel change (None ids are ignored)."""
+        for user_id in user_ids:
+            if user_id is not None and self._cache.pop(user_id, None) is not None:
+                self.invalidations += 1
+
+    def clear(self) -> None:
+        self._cache.clear()
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "cached_users": len(self._cache),
+            "ttl_seconds": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "invalidations": self.invalidations,
+        }
+
+
+# Singleton instance
+entitlements = EntitlementService()
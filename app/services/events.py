@@ -0,0 +1,195 @@
+"""
+Real-time dashboard events.
+Services publish small events (channel status changes, company message
+counters, knowledge-base import progress) addressed to a user; the hub
+fans them out to that user's open Server-Sent Events streams
+(GET /api/v1/events/stream) instead of the dashboard polling the
+status/stats endpoints.
+
+Backends (EVENT_BACKEND setting):
+    local     - in-process only (single worker, default)
+    postgres  - LISTEN/NOTIFY on the application database, so an event
+                published by any worker reaches streams on every worker
+Publishing never fails the caller; events are best-effort hints and the
+REST endpoints stay the source of truth.
+"""
+import asyncio
+import json
+from collections import defaultdict
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Callable, Dict, Optional, Set
+
+from app.core.config import settings
+
+# Buffered frames per stream; the oldest frame is dropped when a client falls behind
+STREAM_QUEUE_SIZE = 100
+
+# Postgres NOTIFY channel for the "postgres" backend
+NOTIFY_CHANNEL = "x8_events"
+
+# Seconds before the Postgres listener reconnects after losing its connection
+RECONNECT_DELAY = 5.0
+
+Deliver = Callable[[int, str], None]
+
+
+def format_event(event: str, data: Dict[str, Any]) -> str:
+    """One SSE frame."""
+    return f"event: {event}\ndata: {json.dumps(data, default=str, separators=(',', ':'))}\n\n"
+
+
+class LocalBackend:
+    """Delivers to streams of this process only."""
+
+    name = "local"
+
+    def __init__(self):
+        self._deliver: Optional[Deliver] = None
+
+    async def start(self, deliver: Deliver) -> None:
+        self._deliver = deliver
+
+    async def publish(self, user_id: int, frame: str) -> None:
+        if self._deliver is not None:
+            self._deliver(user_id, frame)
+
+    async def close(self) -> None:
+        self._deliver = None
+
+
+class PostgresBackend:
+    """Fan-out across workers through LISTEN/NOTIFY (one dedicated connection per worker)."""
+
+    name = "postgres"
+
+    def __init__(self, dsn: str):
+        # asyncpg takes a plain postgresql:// DSN
+        self.dsn = dsn.replace("postgresql+asyncpg://", "postgresql://", 1)
+        self._deliver: Optional[Deliver] = None
+        self._connection = None
+        self._lock = asyncio.Lock()
+        self._task: Optional[asyncio.Task] = None
+
+    def _on_notify(self, connection, pid, channel, payload: str) -> None:
+        user_id, _, frame = payload.partition(":")
+        if self._deliver is not None and user_id.isdigit():
+            self._deliver(int(user_id), frame)
+
+    async def _listen(self) -> None:
+        import asyncpg
+
+        while True:
+            try:
+                connection = await asyncpg.connect(self.dsn)
+                lost = asyncio.Event()
+                connection.add_termination_listener(lambda _: lost.set())
+                await connection.add_listener(NOTIFY_CHANNEL, self._on_notify)
+                self._connection = connection
+                await lost.wait()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"Event listener connection failed: {str(e)}")
+            self._connection = None
+            await asyncio.sleep(RECONNECT_DELAY)
+
+    async def start(self, deliver: Deliver) -> None:
+        self._deliver = deliver
+        if self._task is None:
+            self._task = asyncio.create_task(self._listen(), name="event-listener")
+
+    async def publish(self, user_id: int, frame: str) -> None:
+        connection = self._connection
+        if connection is None:
+            raise RuntimeError("Event listener is not connected")
+        # One connection, one query at a time
+        async with self._lock:
+            await connection.execute("SELECT pg_notify($1, $2)", NOTIFY_CHANNEL, f"{user_id}:{frame}")
+
+    async def close(self) -> None:
+        self._deliver = None
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if self._connection is not None:
+            await self._connection.close()
+            self._connection = None
+
+
+class EventHub:
+    """Per-user pub/sub for SSE streams."""
+
+    def __init__(self):
+        self._streams: Dict[int, Set[asyncio.Queue]] = defaultdict(set)
+        self.backend = LocalBackend()
+        self.published = 0
+        self.dropped = 0
+        self.failed = 0
+
+    async def start(self) -> None:
+        if settings.EVENT_BACKEND == "postgres":
+            self.backend = PostgresBackend(settings.DATABASE_URL)
+        await self.backend.start(self._deliver)
+
+    async def close(self) -> None:
+        await self.backend.close()
+        # End open streams so shutdown does not wait for clients to disconnect
+        for queues in self._streams.values():
+            for queue in queues:
+                self._put(queue, None)
+
+    def _put(self, queue: asyncio.Queue, frame: Optional[str]) -> None:
+        if queue.full():
+            queue.get_nowait()
+            self.dropped += 1
+        queue.put_nowait(frame)
+
+    def _deliver(self, user_id: int, frame: str) -> None:
+        for queue in self._streams.get(user_id, ()):
+            self._put(queue, frame)
+
+    async def publish(self, user_id: Optional[int], event: str, data: Dict[str, Any]) -> None:
+        """Send an event to every open stream of the user (best-effort)."""
+        if user_id is None:
+            return
+        try:
+            await self.backend.publish(user_id, format_event(event, data))
+            self.published += 1
+        except Exception as e:
+            self.failed += 1
+            print(f"Failed to publish event '{event}': {str(e)}")
+
+    def stream_count(self, user_id: int) -> int:
+        return len(self._streams.get(user_id, ()))
+
+    @asynccontextmanager
+    async def subscribe(self, user_id: int) -> AsyncIterator[asyncio.Queue]:
+        """Queue of SSE frames for one stream; a None item means the hub is shutting down."""
+        queue: asyncio.Queue = asyncio.Queue(maxsize=STREAM_QUEUE_SIZE)
+        self._streams[user_id].add(queue)
+        try:
+            yield queue
+        finally:
+            queues = self._streams.get(user_id)
+            if queues is not None:
+                queues.discard(queue)
+                if not queues:
+                    del self._streams[user_id]
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "backend": self.backend.name,
+            "users": len(self._streams),
+            "streams": sum(len(q) for q in self._streams.values()),
+            "published": self.published,
+            "dropped": self.dropped,
+            "failed": self.failed,
+        }
+
+
+# Singleton instance
+event_hub = EventHub()
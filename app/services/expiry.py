@@ -0,0 +1,285 @@
+"""
+Subscription expiry and trial rollover.
+Plan end dates are otherwise only checked at read time (entitlements). A
+periodic job walks two watermarks forward through time:
+- "expiry_subscriptions": ACTIVE / TRIAL subscriptions whose end_date has
+  passed are set to EXPIRED
+- "expiry_trials": clients on the signup trial whose trial_ends_at passed
+Each pass works in chunks of at most EXPIRY_CHUNK_SIZE rows, ordered by the
+end date (partial indexes on (end date, id)); one short transaction per
+chunk applies the set-based UPDATE, takes users whose plan has now ended
+off their tier (users.subscription_tier = NULL, subscription_ends_at = the
+end date) and feeds the change into the manager portfolio stats,
+disconnects channels above what the user's plan now allows, queues the
+notice emails and moves the watermark. Users who are still covered (e.g. a
+newer active subscription) are left alone. On the first run a pass starts EXPIRY_BACKFILL back from now; older
+lapses are still enforced at read time. An end date written into an
+already-processed past window is not picked up.
+"""
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from sqlalchemy import select, update, func, values, column, Integer, DateTime
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.db.session import AsyncSessionLocal
+from app.models.analytics import RollupWatermark
+from app.models.channel import Channel, ChannelPlatform, ChannelStatus
+from app.models.subscription import Subscription, SubscriptionStatus
+from app.models.user import User, UserRole, SubscriptionTier
+from app.services.email_outbox import enqueue_many
+from app.services.entitlements import entitlements, OPEN_STATUSES
+from app.services.events import event_hub
+from app.services.manager_stats import TRACKED, PortfolioDeltas, apply_deltas
+from app.services.waha_sessions import waha_sessions
+from app.services.waha_sync import channel_status_event
+
+# Seconds between expiry runs
+EXPIRY_INTERVAL = 300.0
+
+# Rows per chunk transaction, chunks per pass per run (the rest waits for the next run)
+EXPIRY_CHUNK_SIZE = 1000
+EXPIRY_MAX_CHUNKS_PER_RUN = 50
+
+# How far back a pass starts when it has no watermark yet
+EXPIRY_BACKFILL = timedelta(days=1)
+
+EXPIRED_CHANNEL_ERROR = "Subscription expired"
+
+Window = List[Any]
+
+
+async def _expire_subscriptions(db: AsyncSession, window: Window) -> Dict[int, datetime]:
+    result = await db.execute(
+        update(Subscription)
+        .where(*window)
+        .values(status=SubscriptionStatus.EXPIRED, updated_at=func.now())
+        .returning(Subscription.user_id, Subscription.end_date)
+    )
+    return dict(result.all())
+
+
+async def _ended_trials(db: AsyncSession, window: Window) -> Dict[int, datetime]:
+    result = await db.execute(select(User.id, User.trial_ends_at).where(*window))
+    return dict(result.all())
+
+
+@dataclass(frozen=True)
+class ExpiryPass:
+    """One watermark-driven pass: rows whose `ends_at` falls in (watermark, now]."""
+
+    name: str
+    ends_at: Any
+    filters: Window
+    # Applies the pass to a chunk; returns {user_id: end date that passed}
+    apply: Callable[[AsyncSession, Window], Awaitable[Dict[int, datetime]]]
+    email_kind: str
+
+
+PASSES = (
+    ExpiryPass(
+        "expiry_subscriptions",
+        Subscription.end_date,
+        [Subscription.status.in_(OPEN_STATUSES)],
+        _expire_subscriptions,
+        "subscription_expired",
+    ),
+    ExpiryPass(
+        "expiry_trials",
+        User.trial_ends_at,
+        # Matches ix_users_trial_clients_ends_at
+        [User.role == UserRole.CLIENT, User.subscription_tier == SubscriptionTier.TRIAL],
+        _ended_trials,
+        "trial_expired",
+    ),
+)
+
+
+def _limits_values(limits: Dict[int, int]):
+    return values(
+        column("user_id", Integer),
+        column("max_channels", Integer),
+        name="limits",
+    ).data(list(limits.items()))
+
+
+def _ended_values(ended: Dict[int, datetime]):
+    return values(
+        column("user_id", Integer),
+        column("ended_at", DateTime(timezone=True)),
+        name="ended",
+    ).data(sorted(ended.items()))
+
+
+class ExpiryScheduler:
+    """Runs the expiry passes in chunks (one short transaction each)."""
+
+    def __init__(self):
+        self.last_run: Optional[datetime] = None
+        self.processed: Dict[str, int] = {expiry_pass.name: 0 for expiry_pass in PASSES}
+        self.disconnected_channels = 0
+        self.queued_emails = 0
+
+    async def run(self) -> None:
+        """Periodic job: catch every pass up to now."""
+        now = datetime.now(timezone.utc)
+        for expiry_pass in PASSES:
+            for _ in range(EXPIRY_MAX_CHUNKS_PER_RUN):
+                if not await self._run_chunk(expiry_pass, now):
+                    break
+        self.last_run = now
+
+    async def _run_chunk(self, expiry_pass: ExpiryPass, now: datetime) -> bool:
+        """Process the next chunk of a pass. Returns False once the pass has reached `now`."""
+        ends_at = expiry_pass.ends_at
+        async with AsyncSessionLocal() as db:
+            mark = await db.get(RollupWatermark, expiry_pass.name, with_for_update=True)
+            since = mark.watermark if mark else now - EXPIRY_BACKFILL
+            if since >= now:
+                return False
+
+            window = [*expiry_pass.filters, ends_at > since, ends_at <= now]
+            # End date of the chunk's last row; the chunk is (since, until]
+            boundary = await db.scalar(
+                select(ends_at).where(*window).order_by(ends_at).offset(EXPIRY_CHUNK_SIZE - 1).limit(1)
+            )
+            until = boundary or now
+
+            ended_at = await expiry_pass.apply(
+                db, [*expiry_pass.filters, ends_at > since, ends_at <= until]
+            )
+            disconnected = []
+            if ended_at:
+                resolved = await entitlements.resolve_many(db, ended_at)
+                limits = {
+                    user_id: ent.allowed_channels
+                    for user_id, ent in resolved.items()
+                    if ent.allowed_channels is not None and ent.connected_channels > ent.allowed_channels
+                }
+                disconnected = await self._disconnect_over_limit(db, limits)
+                await self._end_plans(db, {
+                    user_id: ent.plan_ends_at for user_id, ent in resolved.items() if ent.trial_expired
+                })
+                # Notify only when this end date is what ended the plan (not e.g. an old
+                # signup trial of a user whose subscription expired earlier)
+                ended = {
+                    user_id: ent.plan_ends_at
+                    for user_id, ent in resolved.items()
+                    if ent.trial_expired and ent.plan_ends_at == ended_at[user_id]
+                }
+                self.queued_emails += await self._queue_notices(db, ended, expiry_pass.email_kind)
+
+            stmt = insert(RollupWatermark).values(name=expiry_pass.name, watermark=until)
+            await db.execute(
+                stmt.on_conflict_do_update(
+                    index_elements=["name"],
+                    set_={"watermark": stmt.excluded.watermark, "updated_at": func.now()},
+                )
+            )
+            await db.commit()
+
+        self.processed[expiry_pass.name] += len(ended_at)
+        self.disconnected_channels += len(disconnected)
+        entitlements.invalidate(*ended_at)
+        await self._after_disconnect(disconnected)
+        return boundary is not None
+
+    async def _end_plans(self, db: AsyncSession, ended: Dict[int, datetime]) -> None:
+        """
+        Take users whose plan has ended off their tier in one UPDATE ({user_id: ended_at})
+        and apply the resulting manager stats deltas (the ORM hooks don't see Core UPDATEs).
+        """
+        if not ended:
+            return
+        tracked = [getattr(User, name) for name in TRACKED]
+        # Old values for the deltas; rows locked in id order like the UPDATE below
+        result = await db.execute(
+            select(User.id, *tracked).where(User.id.in_(list(ended))).order_by(User.id).with_for_update()
+        )
+        old = {row[0]: tuple(row[1:]) for row in result.all()}
+
+        lapsed = _ended_values(ended)
+        result = await db.execute(
+            update(User)
+            .where(
+                User.id == lapsed.c.user_id,
+                (User.subscription_tier.is_not(None))
+                | User.subscription_ends_at.is_distinct_from(lapsed.c.ended_at),
+            )
+            .values(subscription_tier=None, subscription_ends_at=lapsed.c.ended_at, updated_at=func.now())
+            .returning(User.id, *tracked)
+        )
+        deltas = PortfolioDeltas()
+        for row in result.all():
+            deltas.change(old[row[0]], tuple(row[1:]))
+        await apply_deltas(db, deltas)
+
+    async def _disconnect_over_limit(self, db: AsyncSession, limits: Dict[int, int]) -> List[Any]:
+        """Disconnect each user's connected channels beyond their limit (newest first), in one UPDATE."""
+        if not limits:
+            return []
+        allowed = _limits_values(limits)
+        ranked = (
+            select(
+                Channel.id,
+                func.row_number().over(partition_by=Channel.user_id, order_by=Channel.id).label("position"),
+                allowed.c.max_channels,
+            )
+            .join(allowed, allowed.c.user_id == Channel.user_id)
+            .where(Channel.status == ChannelStatus.CONNECTED)
+            .subquery()
+        )
+        result = await db.execute(
+            update(Channel)
+            .where(Channel.id == ranked.c.id, ranked.c.position > ranked.c.max_channels)
+            .values(status=ChannelStatus.DISCONNECTED, last_error=EXPIRED_CHANNEL_ERROR, updated_at=func.now())
+            .returning(Channel.id, Channel.user_id, Channel.company_id, Channel.platform, Channel.config)
+        )
+        return result.all()
+
+    async def _queue_notices(self, db: AsyncSession, ended: Dict[int, Optional[datetime]], kind: str) -> int:
+        """Queue one notice per user whose plan has now ended ({user_id: ended_at})."""
+        if not ended:
+            return 0
+        result = await db.execute(select(User.id, User.email, User.full_name).where(User.id.in_(list(ended))))
+        return await enqueue_many(db, [
+            {
+                "kind": kind,
+                "recipient": email,
+                "payload": {
+                    "full_name": full_name,
+                    "ended_at": ended[user_id].isoformat() if ended[user_id] else None,
+                },
+            }
+            for user_id, email, full_name in result.all()
+        ])
+
+    async def _after_disconnect(self, disconnected: List[Any]) -> None:
+        """Notify dashboards and tear down WAHA sessions (otherwise the status sync reconnects them)."""
+        for channel in disconnected:
+            await event_hub.publish(channel.user_id, "channel.status", channel_status_event(
+                channel.company_id, channel.id, ChannelStatus.DISCONNECTED, platform=channel.platform
+            ))
+            if (
+                channel.platform == ChannelPlatform.WHATSAPP
+                and (channel.config or {}).get("session_id")
+                and waha_sessions.is_configured()
+            ):
+                try:
+                    await waha_sessions.release(channel.config)
+                except Exception as e:
+                    print(f"WAHA session release for channel {channel.id} failed: {str(e)}")
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "last_run": self.last_run.isoformat() if self.last_run else None,
+            "processed": dict(self.processed),
+            "disconnected_channels": self.disconnected_channels,
+            "queued_emails": self.queued_emails,
+        }
+
+
+# Singleton instance
+expiry_scheduler = ExpiryScheduler()
@@ -0,0 +1,188 @@
+"""
+Shared outbound HTTP clients.
+One pooled httpx.AsyncClient per upstream (WAHA, n8n, Supabase, Google, Facebook),
+opened in the FastAPI lifespan handler and reused by every request, so
+connections and TLS sessions are kept alive between calls.
+"""
+import asyncio
+import time
+from collections import deque
+from dataclasses import dataclass
+from typing import Dict, Any, Optional
+from urllib.parse import urlsplit
+
+import httpx
+
+from app.services.resilience import upstream_guards
+
+try:
+    import h2  # noqa: F401  (enables HTTP/2 in httpx)
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+
+@dataclass(frozen=True)
+class UpstreamConfig:
+    max_connections: int = 20
+    max_keepalive_connections: int = 10
+    keepalive_expiry: float = 30.0
+    timeout: float = 10.0
+    connect_timeout: float = 5.0
+    http2: bool = False
+    # Connect errors are always retried by the transport (request never left);
+    # idempotent requests are also retried on these statuses
+    retries: int = 2
+    retry_statuses: tuple = (502, 503, 504)
+    retry_backoff: float = 0.2
+
+
+UPSTREAMS: Dict[str, UpstreamConfig] = {
+    "waha": UpstreamConfig(max_connections=50, max_keepalive_connections=20, timeout=30.0),
+    "n8n": UpstreamConfig(max_connections=20, max_keepalive_connections=10, timeout=30.0, http2=True),
+    "supabase": UpstreamConfig(max_connections=20, max_keepalive_connections=10, http2=True),
+    "google": UpstreamConfig(max_connections=10, max_keepalive_connections=5, http2=True),
+    "facebook": UpstreamConfig(max_connections=10, max_keepalive_connections=5, http2=True),
+}
+
+IDEMPOTENT_METHODS = {"GET", "HEAD", "OPTIONS", "PUT", "DELETE"}
+
+# Number of recent samples kept per host for percentiles
+LATENCY_WINDOW = 500
+
+
+class HostMetrics:
+    """Latency and error counters for one upstream host."""
+
+    def __init__(self):
+        self.requests = 0
+        self.errors = 0
+        self.retries = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+        self.samples = deque(maxlen=LATENCY_WINDOW)
+
+    def observe(self, elapsed_ms: float, error: bool = False) -> None:
+        self.requests += 1
+        self.total_ms += elapsed_ms
+        self.max_ms = max(self.max_ms, elapsed_ms)
+        self.samples.append(elapsed_ms)
+        if error:
+            self.errors += 1
+
+    def snapshot(self) -> Dict[str, Any]:
+        ordered = sorted(self.samples)
+
+        def percentile(p: float) -> Optional[float]:
+            if not ordered:
+                return None
+            return round(ordered[min(len(ordered) - 1, int(p * len(ordered)))], 2)
+
+        return {
+            "requests": self.requests,
+            "errors": self.errors,
+            "retries": self.retries,
+            "avg_ms": round(self.total_ms / self.requests, 2) if self.requests else None,
+            "p50_ms": percentile(0.50),
+            "p95_ms": percentile(0.95),
+            "p99_ms": percentile(0.99),
+            "max_ms": round(self.max_ms, 2),
+        }
+
+
+class HTTPClientRegistry:
+    """Application-scoped registry of pooled httpx clients, one per upstream."""
+
+    def __init__(self, upstreams: Dict[str, UpstreamConfig]):
+        self.upstreams = upstreams
+        self._clients: Dict[str, httpx.AsyncClient] = {}
+        self._metrics: Dict[str, HostMetrics] = {}
+
+    def _create_client(self, config: UpstreamConfig) -> httpx.AsyncClient:
+        http2 = config.http2 and HTTP2_AVAILABLE
+        limits = httpx.Limits(
+            max_connections=config.max_connections,
+            max_keepalive_connections=config.max_keepalive_connections,
+            keepalive_expiry=config.keepalive_expiry,
+        )
+        transport = httpx.AsyncHTTPTransport(
+            http2=http2,
+            limits=limits,
+            retries=config.retries,
+        )
+        return httpx.AsyncClient(
+            transport=transport,
+            http2=http2,
+            timeout=httpx.Timeout(config.timeout, connect=config.connect_timeout),
+        )
+
+    async def start(self) -> None:
+        """Open one client per upstream. Called from the app lifespan."""
+        for name, config in self.upstreams.items():
+            if name not in self._clients:
+                self._clients[name] = self._create_client(config)
+
+    async def close(self) -> None:
+        """Close all clients and their connection pools."""
+        clients, self._clients = self._clients, {}
+        for client in clients.values():
+            await client.aclose()
+
+    def get(self, upstream: str) -> httpx.AsyncClient:
+        """
+        Return the shared client for an upstream.
+        Created lazily when used outside the app lifespan (scripts, shell).
+        """
+        client = self._clients.get(upstream)
+        if client is None:
+            client = self._create_client(self.upstreams[upstream])
+            self._clients[upstream] = client
+        return client
+
+    async def request(self, upstream: str, method: str, url: str, **kwargs) -> httpx.Response:
+        """
+        Send a request through the upstream's pooled client.
+        The call is guarded by the upstream's circuit breaker and bulkhead
+        (raises UpstreamUnavailable without sending anything when open/full).
+        Idempotent methods are retried on gateway errors with linear backoff.
+        Latency is recorded per upstream host.
+        """
+        config = self.upstreams[upstream]
+        client = self.get(upstream)
+        host = urlsplit(url).netloc or upstream
+        metrics = self._metrics.setdefault(host, HostMetrics())
+
+        attempts = 1 + (config.retries if method.upper() in IDEMPOTENT_METHODS else 0)
+
+        async with upstream_guards.protect(upstream, failure_exceptions=(httpx.HTTPError,)) as call:
+            for attempt in range(attempts):
+                started = time.perf_counter()
+                try:
+                    response = await client.request(method, url, **kwargs)
+                except httpx.HTTPError:
+                    metrics.observe((time.perf_counter() - started) * 1000, error=True)
+                    raise
+
+                elapsed_ms = (time.perf_counter() - started) * 1000
+                retryable = response.status_code in config.retry_statuses
+                metrics.observe(elapsed_ms, error=response.status_code >= 500)
+
+                if not retryable or attempt == attempts - 1:
+                    break
+
+                metrics.retries += 1
+                await response.aclose()
+                await asyncio.sleep(config.retry_backoff * (attempt + 1))
+
+            if response.status_code >= 500:
+                call.mark_failure()
+
+        return response
+
+    def metrics(self) -> Dict[str, Any]:
+        """Per-host latency metrics for the status endpoint."""
+        return {host: m.snapshot() for host, m in self._metrics.items()}
+
+
+# Singleton instance
+http_clients = HTTPClientRegistry(UPSTREAMS)
@@ -0,0 +1,231 @@
+"""
+Message ingestion.
+Batches of message events from the channel webhooks (n8n / WAHA) are
+written to `messages` with multi-row INSERT ... ON CONFLICT statements,
+one transaction per batch. Events with an external_id first claim their
+(company_id, channel, external_id) key in `message_keys`; a new key
+records the created_at (partition key) of the row about to be inserted,
+an existing key hands back the created_at of the stored row. Retried
+webhooks are therefore free whatever timestamps they carry: already
+stored messages are skipped, or updated in place when `upsert` is set.
+Company message counters are updated in the same transaction; response
+times of written rows go to the quantile sketches and the new counters to
+the owners' event streams after commit.
+"""
+from datetime import datetime, timezone
+from typing import Dict, List, Tuple
+
+from sqlalchemy import select, func, literal_column, or_, tuple_
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.company import Company
+from app.models.message import Message, MessageKey
+from app.schemas.message import MessageEvent
+from app.services.message_counters import CounterDeltas, apply_deltas, publish_counters
+from app.services.sketches import response_time_sketches
+
+# Rows per INSERT ... VALUES statement (10 columns -> well under the
+# 32767 bind-parameter limit of the Postgres protocol)
+INSERT_CHUNK_SIZE = 500
+
+DedupeKey = Tuple[int, str, str]
+
+# Columns returned for every written row (feed the company counters and sketches)
+RETURNED = (
+    Message.id,
+    Message.company_id,
+    Message.channel,
+    Message.created_at,
+    Message.message_type,
+    Message.status,
+    Message.response_time_seconds,
+)
+
+KEY_COLUMNS = (MessageKey.company_id, MessageKey.channel, MessageKey.external_id)
+
+# Conflict target: the partial unique index uq_messages_company_channel_external_id
+# (includes created_at, the partition key of `messages`, taken from message_keys)
+CONFLICT_TARGET = dict(
+    index_elements=[Message.company_id, Message.channel, Message.external_id, Message.created_at],
+    index_where=Message.external_id.isnot(None),
+)
+
+
+class MessageIngestor:
+    """Validates, deduplicates and upserts message events."""
+
+    @staticmethod
+    def _created_at(event: MessageEvent, now: datetime) -> datetime:
+        """
+        created_at of a new message: the event's own timestamp, clamped to now.
+        Future timestamps (sender clock skew) would otherwise land in the
+        default partition, ahead of the monthly partitions.
+        """
+        moment = event.received_at or event.sent_at or now
+        if moment.tzinfo is None:
+            moment = moment.replace(tzinfo=timezone.utc)
+        return min(moment, now)
+
+    @staticmethod
+    def _row(event: MessageEvent, created_at: datetime) -> Dict[str, object]:
+        return {
+            "created_at": created_at,
+            "company_id": event.company_id,
+            "channel": event.channel,
+            "external_id": event.external_id,
+            "message_type": event.message_type,
+            "status": event.status,
+            "content": event.content,
+            "sent_at": event.sent_at,
+            "received_at": event.received_at,
+            "response_time_seconds": event.response_time_seconds,
+        }
+
+    async def _claim_keys(
+        self,
+        db: AsyncSession,
+        keyed: Dict[DedupeKey, MessageEvent],
+        now: datetime,
+    ) -> Dict[DedupeKey, datetime]:
+        """Insert the keys not seen before; returns {key: created_at} of the new ones."""
+        claimed: Dict[DedupeKey, datetime] = {}
+        # Sorted, so concurrent batches lock shared keys in the same order
+        keys = sorted(keyed)
+        for start in range(0, len(keys), INSERT_CHUNK_SIZE):
+            stmt = insert(MessageKey).values([
+                {
+                    "company_id": key[0],
+                    "channel": key[1],
+                    "external_id": key[2],
+                    "created_at": self._created_at(keyed[key], now),
+                }
+                for key in keys[start:start + INSERT_CHUNK_SIZE]
+            ])
+            result = await db.execute(stmt.on_conflict_do_nothing().returning(*KEY_COLUMNS, MessageKey.created_at))
+            claimed.update({(row[0], row[1], row[2]): row.created_at for row in result})
+        return claimed
+
+    @staticmethod
+    def _statement(rows: List[Dict[str, object]], upsert: bool):
+        stmt = insert(Message).values(rows)
+        if not upsert:
+            return stmt.on_conflict_do_nothing(**CONFLICT_TARGET).returning(*RETURNED)
+
+        excluded = stmt.excluded
+        stmt = stmt.on_conflict_do_update(
+            **CONFLICT_TARGET,
+            set_={
+                "status": excluded.status,
+                "sent_at": func.coalesce(excluded.sent_at, Message.sent_at),
+                "received_at": func.coalesce(excluded.received_at, Message.received_at),
+                "response_time_seconds": func.coalesce(
+                    excluded.response_time_seconds, Message.response_time_seconds
+                ),
+                "updated_at": func.now(),
+            },
+            # Skip no-op updates so unchanged retries don't write new row versions
+            where=or_(
+                Message.status.is_distinct_from(excluded.status),
+                Message.sent_at.is_distinct_from(func.coalesce(excluded.sent_at, Message.sent_at)),
+                Message.received_at.is_distinct_from(func.coalesce(excluded.received_at, Message.received_at)),
+                Message.response_time_seconds.is_distinct_from(
+                    func.coalesce(excluded.response_time_seconds, Message.response_time_seconds)
+                ),
+            ),
+        )
+        # xmax = 0 only for freshly inserted row versions
+        return stmt.returning(*RETURNED, literal_column("xmax = 0").label("inserted"))
+
+    async def ingest(
+        self,
+        db: AsyncSession,
+        events: List[MessageEvent],
+        upsert: bool = False,
+    ) -> Dict[str, int]:
+        # 1. Dedupe inside the batch: one statement may not touch the same row twice.
+        #    With upsert the latest event wins, otherwise the first one.
+        keyed: Dict[DedupeKey, MessageEvent] = {}
+        keyless: List[MessageEvent] = []
+        for event in events:
+            if not event.external_id:
+                keyless.append(event)
+                continue
+            key = (event.company_id, event.channel, event.external_id)
+            if upsert or key not in keyed:
+                keyed[key] = event
+
+        # 2. Drop events for unknown companies (one query for the whole batch)
+        company_ids = {e.company_id for e in list(keyed.values()) + keyless}
+        result = await db.execute(select(Company.id).where(Company.id.in_(company_ids)))
+        known = set(result.scalars().all())
+        keyed = {key: e for key, e in keyed.items() if e.company_id in known}
+        keyless = [e for e in keyless if e.company_id in known]
+        rejected = sum(1 for e in events if e.company_id not in known)
+
+        # 3. Claim dedupe keys. Keys seen before are duplicates, or with upsert are
+        #    locked until commit and resolved to the stored row's created_at
+        now = datetime.now(timezone.utc)
+        claimed = await self._claim_keys(db, keyed, now)
+        stored: Dict[DedupeKey, datetime] = {}
+        seen = [key for key in keyed if key not in claimed]
+        if upsert and seen:
+            result = await db.execute(
+                select(*KEY_COLUMNS, MessageKey.created_at)
+                .where(tuple_(*KEY_COLUMNS).in_(seen))
+                .with_for_update()
+            )
+            stored = {(row[0], row[1], row[2]): row.created_at for row in result}
+
+        rows = [self._row(keyed[key], created_at) for key, created_at in {**claimed, **stored}.items()]
+        rows += [self._row(e, self._created_at(e, now)) for e in keyless]
+
+        # 4. Old values of rows the upsert may change, for counter deltas
+        previous = {}
+        if stored:
+            result = await db.execute(
+                select(*RETURNED).where(
+                    tuple_(Message.company_id, Message.channel, Message.external_id, Message.created_at)
+                    .in_([(*key, created_at) for key, created_at in stored.items()])
+                )
+            )
+            previous = {row.id: (row.message_type, row.status, row.response_time_seconds) for row in result}
+
+        # 5. Multi-row upserts; conflicts on the unique index are resolved by Postgres
+        deltas = CounterDeltas()
+        timings = []
+        inserted = updated = 0
+        for start in range(0, len(rows), INSERT_CHUNK_SIZE):
+            result = await db.execute(self._statement(rows[start:start + INSERT_CHUNK_SIZE], upsert))
+            for row in result.all():
+                new = (row.message_type, row.status, row.response_time_seconds)
+                if not upsert or row.inserted:
+                    inserted += 1
+                    deltas.add(row.company_id, *new)
+                    timings.append(row)
+                else:
+                    updated += 1
+                    if row.id in previous:
+                        deltas.change(row.company_id, previous[row.id], new)
+                        # Response time arriving in a later event (never overwritten, see set_)
+                        if previous[row.id][2] is None:
+                            timings.append(row)
+
+        await apply_deltas(db, deltas)
+        await db.commit()
+
+        for row in timings:
+            response_time_sketches.observe(row.company_id, row.channel, row.created_at, row.response_time_seconds)
+        await publish_counters(db, deltas.by_company)
+
+        return {
+            "received": len(events),
+            "inserted": inserted,
+            "updated": updated,
+            "duplicates": len(events) - rejected - inserted - updated,
+            "rejected": rejected,
+        }
+
+
+# Singleton instance
+message_ingestor = MessageIngestor()
@@ -0,0 +1,269 @@
+"""
+Materialized manager portfolio stats.
+`manager_stats` holds each manager's client counts per subscription tier,
+`manager_expiry_buckets` the number of trial expiries / paid renewals per
+UTC day. Both are kept in sync incrementally: ORM flushes that create or
+delete a client, or change its role, manager_id, subscription_tier,
+trial_ends_at or subscription_ends_at, are turned into per-manager deltas
+applied in the same transaction with `count = count + delta` upserts.
+Core bulk UPDATEs on `users` bypass the hooks; they collect their own
+PortfolioDeltas and pass them to `apply_deltas()` (or run `reconcile()`).
+"""
+from collections import defaultdict
+from datetime import date, datetime, timedelta, timezone
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+from sqlalchemy import select, delete, func, bindparam, event, literal_column, union_all, Date, cast
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, attributes
+
+from app.models.manager_stats import ManagerStats, ManagerExpiryBucket
+from app.models.user import User, UserRole, SubscriptionTier
+
+TIER_COUNTERS = {
+    SubscriptionTier.TRIAL: "trial_count",
+    SubscriptionTier.BASIC: "basic_count",
+    SubscriptionTier.PRO: "pro_count",
+    SubscriptionTier.ENTERPRISE: "enterprise_count",
+}
+COUNTERS = tuple(TIER_COUNTERS.values())
+PAID_TIERS = (SubscriptionTier.BASIC, SubscriptionTier.PRO, SubscriptionTier.ENTERPRISE)
+
+TRIAL_BUCKET = "trial"
+RENEWAL_BUCKET = "renewal"
+
+# User attributes the stats depend on, in PortfolioDeltas state order
+TRACKED = ("role", "manager_id", "subscription_tier", "trial_ends_at", "subscription_ends_at")
+
+# session.info key for deltas collected during a flush
+PENDING_KEY = "manager_stats_deltas"
+
+BucketKey = Tuple[int, str, date]
+
+
+def _day(moment: datetime) -> date:
+    if moment.tzinfo is None:
+        moment = moment.replace(tzinfo=timezone.utc)
+    return moment.astimezone(timezone.utc).date()
+
+
+class PortfolioDeltas:
+    """Per-manager tier counter and expiry bucket deltas accumulated during a flush."""
+
+    def __init__(self):
+        self.counts: Dict[int, Dict[str, int]] = defaultdict(lambda: dict.fromkeys(COUNTERS, 0))
+        self.buckets: Dict[BucketKey, int] = defaultdict(int)
+
+    def __bool__(self) -> bool:
+        return any(any(d.values()) for d in self.counts.values()) or any(self.buckets.values())
+
+    def add(self, state: tuple, sign: int = 1) -> None:
+        """Add (or with sign=-1 remove) one user in the given TRACKED state."""
+        role, manager_id, tier, trial_ends_at, subscription_ends_at = state
+        if role != UserRole.CLIENT or manager_id is None:
+            return
+        if tier in TIER_COUNTERS:
+            self.counts[manager_id][TIER_COUNTERS[tier]] += sign
+        if tier == SubscriptionTier.TRIAL and trial_ends_at is not None:
+            self.buckets[(manager_id, TRIAL_BUCKET, _day(trial_ends_at))] += sign
+        elif tier in PAID_TIERS and subscription_ends_at is not None:
+            self.buckets[(manager_id, RENEWAL_BUCKET, _day(subscription_ends_at))] += sign
+
+    def change(self, old: tuple, new: tuple) -> None:
+        if old == new:
+            return
+        self.add(old, sign=-1)
+        self.add(new)
+
+    def count_params(self):
+        # Sorted keys so concurrent transactions lock rows in the same order
+        for manager_id in sorted(self.counts):
+            deltas = self.counts[manager_id]
+            if any(deltas.values()):
+                yield {"manager": manager_id, **{f"d_{name}": deltas[name] for name in COUNTERS}}
+
+    def bucket_params(self):
+        for (manager_id, kind, day) in sorted(self.buckets):
+            delta = self.buckets[(manager_id, kind, day)]
+            if delta:
+                yield {"manager": manager_id, "kind": kind, "day": day, "delta": delta}
+
+
+def _count_upsert():
+    t = ManagerStats.__table__
+    stmt = insert(t).values(
+        manager_id=bindparam("manager"),
+        **{name: bindparam(f"d_{name}") for name in COUNTERS},
+    )
+    return stmt.on_conflict_do_update(
+        index_elements=[t.c.manager_id],
+        set_={**{name: t.c[name] + stmt.excluded[name] for name in COUNTERS}, "updated_at": func.now()},
+    )
+
+
+def _bucket_upsert():
+    t = ManagerExpiryBucket.__table__
+    stmt = insert(t).values(
+        manager_id=bindparam("manager"),
+        kind=bindparam("kind"),
+        day=bindparam("day"),
+        client_count=bindparam("delta"),
+    )
+    return stmt.on_conflict_do_update(
+        index_elements=[t.c.manager_id, t.c.kind, t.c.day],
+        set_={"client_count": t.c.client_count + stmt.excluded.client_count},
+    )
+
+
+COUNT_UPSERT = _count_upsert()
+BUCKET_UPSERT = _bucket_upsert()
+
+
+def _prune_statement(manager_ids):
+    t = ManagerExpiryBucket.__table__
+    return delete(t).where(t.c.manager_id.in_(manager_ids), t.c.client_count <= 0)
+
+
+def _state(user: User) -> tuple:
+    return tuple(getattr(user, name) for name in TRACKED)
+
+
+def _utc_day(column):
+    # Inlined 'UTC' literal: the SELECT and GROUP BY expressions must be identical
+    return cast(func.timezone(literal_column("'UTC'"), column), Date)
+
+
+async def reconcile(db: AsyncSession, manager_ids: Optional[Iterable[int]] = None) -> int:
+    """
+    Rebuild the stats of the given managers (all if None) from `users` in grouped passes.
+    Returns the number of managers with clients.
+    """
+    stats = ManagerStats.__table__
+    buckets = ManagerExpiryBucket.__table__
+    clients = [User.role == UserRole.CLIENT, User.manager_id.is_not(None)]
+    if manager_ids is not None:
+        manager_ids = list(manager_ids)
+        clients.append(User.manager_id.in_(manager_ids))
+        await db.execute(delete(stats).where(stats.c.manager_id.in_(manager_ids)))
+        await db.execute(delete(buckets).where(buckets.c.manager_id.in_(manager_ids)))
+    else:
+        await db.execute(delete(stats))
+        await db.execute(delete(buckets))
+
+    counts = select(
+        User.manager_id,
+        *(func.count().filter(User.subscription_tier == tier).label(name) for tier, name in TIER_COUNTERS.items()),
+    ).where(*clients).group_by(User.manager_id)
+    result = await db.execute(insert(stats).from_select(["manager_id", *COUNTERS], counts))
+    updated = result.rowcount
+
+    trial_day = _utc_day(User.trial_ends_at)
+    renewal_day = _utc_day(User.subscription_ends_at)
+    # Literal kinds: untyped bound parameters in a UNION select list can't be typed by Postgres
+    expiries = union_all(
+        select(User.manager_id, literal_column(f"'{TRIAL_BUCKET}'"), trial_day, func.count())
+        .where(*clients, User.subscription_tier == SubscriptionTier.TRIAL, User.trial_ends_at.is_not(None))
+        .group_by(User.manager_id, trial_day),
+        select(User.manager_id, literal_column(f"'{RENEWAL_BUCKET}'"), renewal_day, func.count())
+        .where(*clients, User.subscription_tier.in_(PAID_TIERS), User.subscription_ends_at.is_not(None))
+        .group_by(User.manager_id, renewal_day),
+    )
+    await db.execute(insert(buckets).from_select(["manager_id", "kind", "day", "client_count"], expiries))
+
+    await db.commit()
+    return updated
+
+
+async def portfolio(db: AsyncSession, manager_id: int, horizon_days: int) -> Dict[str, Any]:
+    """Tier counts and per-day expiries/renewals for the next `horizon_days` (two PK lookups)."""
+    stats = await db.get(ManagerStats, manager_id)
+    tiers = {tier.value: getattr(stats, name) if stats else 0 for tier, name in TIER_COUNTERS.items()}
+
+    today = datetime.now(timezone.utc).date()
+    b = ManagerExpiryBucket
+    result = await db.execute(
+        select(b.kind, b.day, b.client_count)
+        .where(
+            b.manager_id == manager_id,
+            b.day >= today,
+            b.day < today + timedelta(days=horizon_days),
+        )
+        .order_by(b.kind, b.day)
+    )
+    upcoming = {TRIAL_BUCKET: [], RENEWAL_BUCKET: []}
+    for kind, day, clients in result.all():
+        upcoming[kind].append({"day": day, "days_until": (day - today).days, "clients": clients})
+
+    return {
+        "clients_total": sum(tiers.values()),
+        "clients_with_subscription": sum(tiers[tier.value] for tier in PAID_TIERS),
+        "clients_on_trial": tiers[SubscriptionTier.TRIAL.value],
+        "tier_counts": tiers,
+        "horizon_days": horizon_days,
+        "trial_expiries": upcoming[TRIAL_BUCKET],
+        "renewals": upcoming[RENEWAL_BUCKET],
+    }
+
+
+# ORM path: collect deltas for User rows in the flush, apply them in the same transaction
+@event.listens_for(Session, "before_flush")
+def _collect_portfolio_deltas(session: Session, flush_context, instances) -> None:
+    deltas = session.info.get(PENDING_KEY) or PortfolioDeltas()
+
+    for obj in session.new:
+        if isinstance(obj, User):
+            role, manager_id, tier, trial_ends_at, subscription_ends_at = _state(obj)
+            deltas.add((
+                role if role is not None else UserRole.CLIENT,
+                manager_id,
+                tier if tier is not None else SubscriptionTier.TRIAL,
+                trial_ends_at,
+                subscription_ends_at,
+            ))
+
+    for obj in session.dirty:
+        if isinstance(obj, User) and session.is_modified(obj, include_collections=False):
+            old = []
+            changed = False
+            for name in TRACKED:
+                history = attributes.get_history(obj, name)
+                if history.has_changes():
+                    old.append(history.deleted[0] if history.deleted else None)
+                    changed = True
+                else:
+                    old.append(getattr(obj, name))
+            if changed:
+                deltas.change(tuple(old), _state(obj))
+
+    for obj in session.deleted:
+        if isinstance(obj, User):
+            deltas.add(_state(obj), sign=-1)
+
+    if deltas:
+        session.info[PENDING_KEY] = deltas
+
+
+async def apply_deltas(db: AsyncSession, deltas: PortfolioDeltas) -> None:
+    """Apply deltas collected outside the ORM hooks, in the caller's transaction."""
+    counts = list(deltas.count_params())
+    if counts:
+        await db.execute(COUNT_UPSERT, counts)
+    buckets = list(deltas.bucket_params())
+    if buckets:
+        await db.execute(BUCKET_UPSERT, buckets)
+        await db.execute(_prune_statement(sorted({p["manager"] for p in buckets})))
+
+
+@event.listens_for(Session, "after_flush")
+def _apply_portfolio_deltas(session: Session, flush_context) -> None:
+    deltas = session.info.pop(PENDING_KEY, None)
+    if not deltas:
+        return
+    counts = list(deltas.count_params())
+    if counts:
+        session.execute(COUNT_UPSERT, counts)
+    buckets = list(deltas.bucket_params())
+    if buckets:
+        session.execute(BUCKET_UPSERT, buckets)
+        session.execute(_prune_statement(sorted({p["manager"] for p in buckets})))
@@ -0,0 +1,226 @@
+"""
+Denormalized per-company message counters.
+Company.total_messages / typeN_count / type2_unpaid / type3_paid /
+avg_response_time are kept in sync with `messages` incrementally:
+every change is turned into per-company deltas which are applied with one
+atomic `UPDATE companies SET x = x + :dx` per company per flush. ORM
+flushes are picked up by session events; bulk paths (ingestion) feed the
+deltas explicitly. `reconcile()` recomputes everything in one grouped pass.
+`publish_counters()` pushes the new values to the owners' event streams.
+"""
+from collections import defaultdict
+from typing import Dict, Iterable, Optional
+
+from sqlalchemy import select, update, func, bindparam, event
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, attributes
+
+from app.models.company import Company
+from app.models.message import Message, MessageType, MessageStatus
+from app.services.events import event_hub
+
+COUNTERS = (
+    "total_messages",
+    "type1_count",
+    "type2_count",
+    "type2_unpaid",
+    "type3_count",
+    "type3_paid",
+    "response_count",
+    "response_time_total",
+)
+
+TYPE_COUNTERS = {
+    MessageType.TYPE1: "type1_count",
+    MessageType.TYPE2: "type2_count",
+    MessageType.TYPE3: "type3_count",
+}
+
+# session.info key for deltas collected during a flush
+PENDING_KEY = "message_counter_deltas"
+
+
+def contribution(
+    message_type: Optional[MessageType],
+    message_status: Optional[MessageStatus],
+    response_time_seconds: Optional[int],
+) -> Dict[str, int]:
+    """What one message adds to its company's counters."""
+    values = {"total_messages": 1}
+    if message_type in TYPE_COUNTERS:
+        values[TYPE_COUNTERS[message_type]] = 1
+    if message_type == MessageType.TYPE2 and message_status != MessageStatus.PAID:
+        values["type2_unpaid"] = 1
+    if message_type == MessageType.TYPE3 and message_status == MessageStatus.PAID:
+        values["type3_paid"] = 1
+    if response_time_seconds is not None:
+        values["response_count"] = 1
+        values["response_time_total"] = response_time_seconds
+    return values
+
+
+class CounterDeltas:
+    """Per-company counter deltas accumulated before one UPDATE per company."""
+
+    def __init__(self):
+        self.by_company: Dict[int, Dict[str, int]] = defaultdict(lambda: dict.fromkeys(COUNTERS, 0))
+
+    def __bool__(self) -> bool:
+        return any(any(d.values()) for d in self.by_company.values())
+
+    def add(self, company_id: int, message_type, message_status, response_time_seconds, sign: int = 1) -> None:
+        deltas = self.by_company[company_id]
+        for name, value in contribution(message_type, message_status, response_time_seconds).items():
+            deltas[name] += sign * value
+
+    def change(self, company_id: int, old: tuple, new: tuple) -> None:
+        """A stored message changed from old to new (message_type, status, response_time_seconds)."""
+        if old == new:
+            return
+        self.add(company_id, *old, sign=-1)
+        self.add(company_id, *new)
+
+    def params(self):
+        # Sorted by company id so concurrent batches lock rows in the same order
+        for company_id in sorted(self.by_company):
+            deltas = self.by_company[company_id]
+            if any(deltas.values()):
+                yield {"company": company_id, **{f"d_{name}": deltas[name] for name in COUNTERS}}
+
+
+def _average(total, count):
+    return func.coalesce(total / func.nullif(count, 0), 0)
+
+
+def _increment_statement():
+    c = Company.__table__.c
+    values = {name: func.coalesce(c[name], 0) + bindparam(f"d_{name}") for name in COUNTERS}
+    # Running mean: SET expressions see the old row, so use old + delta
+    values["avg_response_time"] = _average(
+        values["response_time_total"],
+        values["response_count"],
+    )
+    return update(Company.__table__).where(c.id == bindparam("company")).values(**values)
+
+
+INCREMENT = _increment_statement()
+
+
+async def apply_deltas(db: AsyncSession, deltas: CounterDeltas) -> None:
+    """Apply accumulated deltas (one atomic UPDATE per company, executemany)."""
+    params = list(deltas.params())
+    if params:
+        await db.execute(INCREMENT, params)
+
+
+async def reconcile(db: AsyncSession, company_ids: Optional[Iterable[int]] = None) -> int:
+    """
+    Recompute counters from `messages` in one grouped pass
+    (companies without messages are reset to zero).
+    Returns the number of companies updated.
+    """
+    m = Message
+    paid = m.status == MessageStatus.PAID
+    query = select(
+        m.company_id.label("company_id"),
+        func.count().label("total_messages"),
+        func.count().filter(m.message_type == MessageType.TYPE1).label("type1_count"),
+        func.count().filter(m.message_type == MessageType.TYPE2).label("type2_count"),
+        func.count().filter(m.message_type == MessageType.TYPE2, m.status.is_distinct_from(MessageStatus.PAID)).label("type2_unpaid"),
+        func.count().filter(m.message_type == MessageType.TYPE3).label("type3_count"),
+        func.count().filter(m.message_type == MessageType.TYPE3, paid).label("type3_paid"),
+        func.count(m.response_time_seconds).label("response_count"),
+        func.coalesce(func.sum(m.response_time_seconds), 0).label("response_time_total"),
+    ).group_by(m.company_id)
+    if company_ids is not None:
+        company_ids = list(company_ids)
+        query = query.where(m.company_id.in_(company_ids))
+    agg = query.subquery()
+
+    c = Company.__table__.c
+    result = await db.execute(
+        update(Company.__table__)
+        .where(c.id == agg.c.company_id)
+        .values(
+            **{name: agg.c[name] for name in COUNTERS},
+            avg_response_time=_average(agg.c.response_time_total, agg.c.response_count),
+        )
+    )
+    updated = result.rowcount
+
+    no_messages = ~select(m.id).where(m.company_id == c.id).exists()
+    reset = update(Company.__table__).where(no_messages).values(
+        **{name: 0 for name in COUNTERS},
+        avg_response_time=0,
+    )
+    if company_ids is not None:
+        reset = reset.where(c.id.in_(company_ids))
+    result = await db.execute(reset)
+
+    await db.commit()
+    return updated + result.rowcount
+
+
+async def publish_counters(db: AsyncSession, company_ids: Iterable[int]) -> None:
+    """Send current counters of the companies to their owners (`company.counters` event)."""
+    company_ids = sorted(set(company_ids))
+    if not company_ids:
+        return
+    c = Company.__table__.c
+    result = await db.execute(
+        select(c.id, c.user_id, c.avg_response_time, *(c[name] for name in COUNTERS))
+        .where(c.id.in_(company_ids))
+    )
+    for row in result.mappings().all():
+        data = {name: row[name] for name in COUNTERS if name not in ("response_count", "response_time_total")}
+        await event_hub.publish(row["user_id"], "company.counters", {
+            "company_id": row["id"],
+            **data,
+            "avg_response_time": row["avg_response_time"],
+        })
+
+
+# ORM path: collect deltas for Message rows in the flush, apply them in the same transaction
+@event.listens_for(Session, "before_flush")
+def _collect_message_deltas(session: Session, flush_context, instances) -> None:
+    deltas = session.info.get(PENDING_KEY) or CounterDeltas()
+
+    for obj in session.new:
+        if isinstance(obj, Message):
+            company_id = obj.company_id if obj.company_id is not None else getattr(obj.company, "id", None)
+            if company_id is not None:
+                deltas.add(
+                    company_id,
+                    obj.message_type,
+                    obj.status if obj.status is not None else MessageStatus.NO_PAYMENT_LINK,
+                    obj.response_time_seconds,
+                )
+
+    for obj in session.dirty:
+        if isinstance(obj, Message) and session.is_modified(obj, include_collections=False):
+            old = []
+            changed = False
+            for name in ("message_type", "status", "response_time_seconds"):
+                history = attributes.get_history(obj, name)
+                if history.deleted:
+                    old.append(history.deleted[0])
+                    changed = True
+                else:
+                    old.append(getattr(obj, name))
+            if changed:
+                new = (obj.message_type, obj.status, obj.response_time_seconds)
+                deltas.change(obj.company_id, tuple(old), new)
+
+    for obj in session.deleted:
+        if isinstance(obj, Message):
+            deltas.add(obj.company_id, obj.message_type, obj.status, obj.response_time_seconds, sign=-1)
+
+    if deltas:
+        session.info[PENDING_KEY] = deltas
+
+
+@event.listens_for(Session, "after_flush")
+def _apply_message_deltas(session: Session, flush_context) -> None:
+    deltas = session.info.pop(PENDING_KEY, None)
+    if deltas:
+        session.execute(INCREMENT, list(deltas.params()))
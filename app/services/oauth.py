@@ -1,9 +1,9 @@
 from typing import Optional, Dict, Any
-import httpx
 from authlib.integrations.starlette_client import OAuth
 from authlib.jose import jwt
 from fastapi import HTTPException, status
 from app.core.config import settings
+from app.services.http_client import http_clients
 from sqlalchemy.ext.asyncio import AsyncSession
 from app.models.user import User
 from app.services.auth import create_user, get_user_by_id
@@ -40,27 +40,29 @@ oauth.register(
 
 async def get_google_user_info(token: str) -> Dict[str, Any]:
     """Fetch user info from Google"""
-    async with httpx.AsyncClient() as client:
-        response = await client.get(
-            'https://www.googleapis.com/oauth2/v2/userinfo',
-            headers={'Authorization': f'Bearer {token}'}
-        )
-        response.raise_for_status()
-        return response.json()
+    response = await http_clients.request(
+        'google',
+        'GET',
+        'https://www.googleapis.com/oauth2/v2/userinfo',
+        headers={'Authorization': f'Bearer {token}'}
+    )
+    response.raise_for_status()
+    return response.json()
 
 
 async def get_facebook_user_info(token: str) -> Dict[str, Any]:
     """Fetch user info from Facebook"""
-    async with httpx.AsyncClient() as client:
-        response = await client.get(
-            'https://graph.facebook.com/me',
-            params={
-                'fields': 'id,name,email',
-                'access_token': token
-            }
-        )
-        response.raise_for_status()
-        return response.json()
+    response = await http_clients.request(
+        'facebook',
+        'GET',
+        'https://graph.facebook.com/me',
+        params={
+            'fields': 'id,name,email',
+            'access_token': token
+        }
+    )
+    response.raise_for_status()
+    return response.json()
 
 
 async def get_or_create_oauth_user(
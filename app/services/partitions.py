@@ -0,0 +1,175 @@
+"""
+Monthly partitions of the `messages` table.
+`messages` is range-partitioned by created_at, one partition per calendar
+month (messages_y2026m01, ...). A periodic job keeps a few months of
+partitions ahead of time and applies the retention policy by detaching
+whole partitions, which is O(1) compared to a mass DELETE. Rows outside
+every partition land in messages_default; when their month's partition is
+created later they are moved out of it first (Postgres refuses to create a
+partition whose range matches rows in the default partition).
+
+Retention (settings):
+    MESSAGE_RETENTION_MONTHS  - months to keep online (0 = keep forever)
+    MESSAGE_RETENTION_MODE    - "archive" (detach and rename to archived_*,
+                                to be dumped/dropped by ops) or "drop"
+Company counters and the analytics rollups keep their totals after
+partitions are removed; don't run the counter reconciliation over a
+retention-trimmed table unless you want the totals trimmed too.
+"""
+import re
+from datetime import date, datetime, timezone
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.db.session import AsyncSessionLocal
+
+# Seconds between partition maintenance runs
+PARTITION_MAINTENANCE_INTERVAL = 6 * 3600.0
+
+# Future monthly partitions kept ready (besides the current month)
+PARTITIONS_AHEAD = 3
+
+PARENT_TABLE = "messages"
+DEFAULT_PARTITION = "messages_default"
+KEYS_TABLE = "message_keys"
+PARTITION_NAME = re.compile(r"^messages_y(\d{4})m(\d{2})$")
+
+
+def month_start(moment: date) -> date:
+    return date(moment.year, moment.month, 1)
+
+
+def add_months(month: date, count: int) -> date:
+    index = month.year * 12 + month.month - 1 + count
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def partition_name(month: date) -> str:
+    return f"{PARENT_TABLE}_y{month.year:04d}m{month.month:02d}"
+
+
+class MessagePartitions:
+    """Creates upcoming partitions and retires old ones."""
+
+    def __init__(self):
+        self.last_run: Optional[datetime] = None
+        self.created: List[str] = []
+        self.retired: List[str] = []
+
+    @property
+    def retention_months(self) -> int:
+        return settings.MESSAGE_RETENTION_MONTHS
+
+    @property
+    def retention_mode(self) -> str:
+        return settings.MESSAGE_RETENTION_MODE
+
+    async def list_partitions(self, db: AsyncSession) -> List[str]:
+        result = await db.execute(
+            text(
+                "SELECT child.relname FROM pg_inherits "
+                "JOIN pg_class parent ON parent.oid = pg_inherits.inhparent "
+                "JOIN pg_class child ON child.oid = pg_inherits.inhrelid "
+                "WHERE parent.relname = :parent"
+            ),
+            {"parent": PARENT_TABLE},
+        )
+        return sorted(result.scalars().all())
+
+    async def ensure_partitions(
+        self,
+        db: AsyncSession,
+        today: Optional[date] = None,
+        since: Optional[date] = None,
+    ) -> List[str]:
+        """
+        Create partitions for the current month and PARTITIONS_AHEAD months after it
+        (and for every month from `since`, e.g. before a backfill).
+        """
+        current = month_start(today or datetime.now(timezone.utc).date())
+        first = month_start(since) if since and since < current else current
+        existing = set(await self.list_partitions(db))
+
+        created = []
+        last = add_months(current, PARTITIONS_AHEAD)
+        month = first
+        while month <= last:
+            name = partition_name(month)
+            if name not in existing:
+                await self._create_partition(db, name, month, DEFAULT_PARTITION in existing)
+                created.append(name)
+            month = add_months(month, 1)
+        return created
+
+    async def _create_partition(self, db: AsyncSession, name: str, month: date, has_default: bool) -> None:
+        lower, upper = month.isoformat(), add_months(month, 1).isoformat()
+        in_range = f"created_at >= '{lower}' AND created_at < '{upper}'"
+        bounds = f"FOR VALUES FROM ('{lower}') TO ('{upper}')"
+
+        stray = False
+        if has_default:
+            result = await db.execute(text(f"SELECT EXISTS (SELECT 1 FROM {DEFAULT_PARTITION} WHERE {in_range})"))
+            stray = result.scalar()
+        if not stray:
+            await db.execute(text(f'CREATE TABLE IF NOT EXISTS "{name}" PARTITION OF {PARENT_TABLE} {bounds}'))
+            return
+
+        # Move the month's rows out of the default partition, then attach the
+        # filled table (its indexes are created to match the parent's on ATTACH)
+        await db.execute(text(
+            f'CREATE TABLE "{name}" (LIKE {PARENT_TABLE} INCLUDING DEFAULTS INCLUDING CONSTRAINTS)'
+        ))
+        await db.execute(text(f'INSERT INTO "{name}" SELECT * FROM {DEFAULT_PARTITION} WHERE {in_range}'))
+        await db.execute(text(f"DELETE FROM {DEFAULT_PARTITION} WHERE {in_range}"))
+        await db.execute(text(f'ALTER TABLE {PARENT_TABLE} ATTACH PARTITION "{name}" {bounds}'))
+
+    async def apply_retention(self, db: AsyncSession, today: Optional[date] = None) -> List[str]:
+        """Detach (and archive or drop) partitions entirely older than the retention window."""
+        if self.retention_months <= 0:
+            return []
+
+        cutoff = add_months(month_start(today or datetime.now(timezone.utc).date()), -self.retention_months)
+
+        retired = []
+        for name in await self.list_partitions(db):
+            match = PARTITION_NAME.match(name)
+            if not match:
+                continue  # default partition or foreign naming
+            month = date(int(match.group(1)), int(match.group(2)), 1)
+            if add_months(month, 1) > cutoff:
+                continue
+
+            await db.execute(text(f'ALTER TABLE {PARENT_TABLE} DETACH PARTITION "{name}"'))
+            if self.retention_mode == "drop":
+                await db.execute(text(f'DROP TABLE "{name}"'))
+            else:
+                await db.execute(text(f'ALTER TABLE "{name}" RENAME TO "archived_{name}"'))
+            retired.append(name)
+
+        # Dedupe keys of the retired months (a retry of such a message is a new message now)
+        await db.execute(text(f"DELETE FROM {KEYS_TABLE} WHERE created_at < '{cutoff.isoformat()}'"))
+        return retired
+
+    async def run(self) -> None:
+        """Periodic job: create upcoming partitions, then apply retention."""
+        async with AsyncSessionLocal() as db:
+            self.created = await self.ensure_partitions(db)
+            self.retired = await self.apply_retention(db)
+            await db.commit()
+        self.last_run = datetime.now(timezone.utc)
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "last_run": self.last_run.isoformat() if self.last_run else None,
+            "created": self.created,
+            "retired": self.retired,
+            "retention_months": self.retention_months,
+            "retention_mode": self.retention_mode,
+        }
+
+
+# Singleton instance
+message_partitions = MessagePartitions()
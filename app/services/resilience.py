@@ -0,0 +1,188 @@
+"""
+Circuit breakers and bulkheads for outbound dependencies.
+Each upstream (WAHA, n8n, Supabase, Stripe) gets a breaker that opens after
+consecutive failures and a cap on in-flight calls, so a slow or broken
+dependency fails fast with 503 instead of tying up workers and DB sessions.
+"""
+import asyncio
+import time
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from typing import Dict, Any, Optional, Tuple, Type
+
+from fastapi import HTTPException, status
+
+
+class BreakerState:
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+
+@dataclass(frozen=True)
+class GuardConfig:
+    failure_threshold: int = 5      # consecutive failures before opening
+    reset_timeout: float = 30.0     # seconds open before a trial call is let through
+    max_concurrent: int = 20        # bulkhead size (in-flight calls)
+    max_wait: float = 0.5           # seconds to wait for a bulkhead slot before failing fast
+
+
+GUARDS: Dict[str, GuardConfig] = {
+    "waha": GuardConfig(failure_threshold=5, reset_timeout=30.0, max_concurrent=20),
+    "n8n": GuardConfig(failure_threshold=5, reset_timeout=30.0, max_concurrent=10),
+    "supabase": GuardConfig(failure_threshold=5, reset_timeout=20.0, max_concurrent=20),
+    "stripe": GuardConfig(failure_threshold=5, reset_timeout=20.0, max_concurrent=10),
+    "google": GuardConfig(failure_threshold=5, reset_timeout=30.0, max_concurrent=10),
+    "facebook": GuardConfig(failure_threshold=5, reset_timeout=30.0, max_concurrent=10),
+}
+
+
+class UpstreamUnavailable(HTTPException):
+    """Raised without calling the upstream when its breaker is open or its bulkhead is full."""
+
+    def __init__(self, upstream: str, reason: str, retry_after: int = 5):
+        super().__init__(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=f"{upstream} is temporarily unavailable ({reason}). Please try again later.",
+            headers={"Retry-After": str(retry_after)},
+        )
+        self.upstream = upstream
+
+
+class CircuitBreaker:
+    """Consecutive-failure circuit breaker with a single half-open trial call."""
+
+    def __init__(self, failure_threshold: int, reset_timeout: float):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+        self.trial_in_flight = False
+        self.times_opened = 0
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return BreakerState.CLOSED
+        if time.monotonic() - self.opened_at >= self.reset_timeout:
+            return BreakerState.HALF_OPEN
+        return BreakerState.OPEN
+
+    def retry_after(self) -> int:
+        if self.opened_at is None:
+            return 0
+        remaining = self.reset_timeout - (time.monotonic() - self.opened_at)
+        return max(1, int(remaining) + 1)
+
+    def allow(self) -> bool:
+        current = self.state
+        if current == BreakerState.CLOSED:
+            return True
+        if current == BreakerState.HALF_OPEN and not self.trial_in_flight:
+            self.trial_in_flight = True
+            return True
+        return False
+
+    def record_success(self) -> None:
+        self.failures = 0
+        self.opened_at = None
+        self.trial_in_flight = False
+
+    def record_failure(self) -> None:
+        self.failures += 1
+        if self.trial_in_flight or self.failures >= self.failure_threshold:
+            if self.opened_at is None or self.trial_in_flight:
+                self.times_opened += 1
+            self.opened_at = time.monotonic()
+        self.trial_in_flight = False
+
+
+class CallHandle:
+    """Lets the caller report a failed response (e.g. HTTP 5xx) that did not raise."""
+
+    def __init__(self):
+        self.failed = False
+
+    def mark_failure(self) -> None:
+        self.failed = True
+
+
+class UpstreamGuard:
+    """Circuit breaker + bulkhead for one upstream."""
+
+    def __init__(self, name: str, config: GuardConfig):
+        self.name = name
+        self.config = config
+        self.breaker = CircuitBreaker(config.failure_threshold, config.reset_timeout)
+        self.semaphore = asyncio.Semaphore(config.max_concurrent)
+        self.in_flight = 0
+        self.rejected = 0
+
+    @asynccontextmanager
+    async def protect(self, failure_exceptions: Tuple[Type[BaseException], ...] = (Exception,)):
+        if not self.breaker.allow():
+            self.rejected += 1
+            raise UpstreamUnavailable(self.name, "circuit open", self.breaker.retry_after())
+
+        try:
+            await asyncio.wait_for(self.semaphore.acquire(), timeout=self.config.max_wait)
+        except asyncio.TimeoutError:
+            self.rejected += 1
+            # The half-open trial never ran; let the next caller try
+            self.breaker.trial_in_flight = False
+            raise UpstreamUnavailable(self.name, "too many concurrent requests")
+
+        self.in_flight += 1
+        handle = CallHandle()
+        try:
+            yield handle
+        except failure_exceptions:
+            self.breaker.record_failure()
+            raise
+        except BaseException:
+            # Not an upstream fault (e.g. validation in the caller)
+            self.breaker.trial_in_flight = False
+            raise
+        else:
+            if handle.failed:
+                self.breaker.record_failure()
+            else:
+                self.breaker.record_success()
+        finally:
+            self.in_flight -= 1
+            self.semaphore.release()
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "state": self.breaker.state,
+            "consecutive_failures": self.breaker.failures,
+            "times_opened": self.breaker.times_opened,
+            "retry_after": self.breaker.retry_after(),
+            "in_flight": self.in_flight,
+            "max_concurrent": self.config.max_concurrent,
+            "rejected": self.rejected,
+        }
+
+
+class UpstreamGuards:
+    """Registry of per-upstream guards."""
+
+    def __init__(self, configs: Dict[str, GuardConfig]):
+        self._guards = {name: UpstreamGuard(name, config) for name, config in configs.items()}
+
+    def get(self, upstream: str) -> UpstreamGuard:
+        guard = self._guards.get(upstream)
+        if guard is None:
+            guard = UpstreamGuard(upstream, GuardConfig())
+            self._guards[upstream] = guard
+        return guard
+
+    def protect(self, upstream: str, failure_exceptions: Tuple[Type[BaseException], ...] = (Exception,)):
+        return self.get(upstream).protect(failure_exceptions)
+
+    def status(self) -> Dict[str, Any]:
+        return {name: guard.snapshot() for name, guard in self._guards.items()}
+
+
+# Singleton instance
+upstream_guards = UpstreamGuards(GUARDS)
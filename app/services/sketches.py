@@ -0,0 +1,302 @@
+"""
+Response-time percentiles from streaming quantile sketches.
+Every ingested message with a response time is added to an in-memory
+DDSketch for its (company, channel, hour) bucket. A periodic job merges
+the pending sketches into `response_time_sketches` rows, so p50/p90/p99
+for any range are answered by merging a handful of small sketches instead
+of scanning `messages`.
+
+DDSketch (Masson et al., VLDB 2019): values are counted in logarithmic
+bins of ratio gamma, so every quantile is within `relative_accuracy` of
+the true value, sketches merge exactly by adding bin counts, and the size
+depends on the value range, not on the number of values.
+"""
+import asyncio
+import math
+import struct
+from collections import defaultdict
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import select
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.db.session import AsyncSessionLocal
+from app.models.analytics import ResponseTimeSketch
+
+# Quantiles are within 1% of the true value
+DEFAULT_RELATIVE_ACCURACY = 0.01
+
+# Bin cap per sketch; the lowest bins are collapsed beyond it (low quantiles lose accuracy first)
+MAX_BINS = 2048
+
+# Values below this are counted as zero (response times are whole seconds)
+MIN_INDEXABLE_VALUE = 1e-9
+
+# Seconds between flushes of pending sketches to the database
+SKETCH_FLUSH_INTERVAL = 30.0
+
+REPORTED_QUANTILES = (0.5, 0.9, 0.99)
+
+SERIAL_VERSION = 1
+HEADER = struct.Struct(">BdQddd")  # version, accuracy, zero_count, min, max, sum
+
+SketchKey = Tuple[int, str, datetime]
+EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+
+
+def _write_varint(out: bytearray, value: int) -> None:
+    while True:
+        byte = value & 0x7F
+        value >>= 7
+        if value:
+            out.append(byte | 0x80)
+        else:
+            out.append(byte)
+            return
+
+
+def _read_varint(data: bytes, pos: int) -> Tuple[int, int]:
+    result = shift = 0
+    while True:
+        byte = data[pos]
+        pos += 1
+        result |= (byte & 0x7F) << shift
+        if not byte & 0x80:
+            return result, pos
+        shift += 7
+
+
+class DDSketch:
+    """Mergeable quantile sketch with relative-error guarantees (non-negative values)."""
+
+    def __init__(self, relative_accuracy: float = DEFAULT_RELATIVE_ACCURACY):
+        if not 0 < relative_accuracy < 1:
+            raise ValueError("relative_accuracy must be between 0 and 1")
+        self.relative_accuracy = relative_accuracy
+        self.gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self._log_gamma = math.log(self.gamma)
+        self.bins: Dict[int, int] = {}
+        self.zero_count = 0
+        self.min = math.inf
+        self.max = -math.inf
+        self.sum = 0.0
+
+    @property
+    def count(self) -> int:
+        return self.zero_count + sum(self.bins.values())
+
+    def _index(self, value: float) -> int:
+        return math.ceil(math.log(value) / self._log_gamma)
+
+    def _bin_value(self, index: int) -> float:
+        # Midpoint (in relative terms) of (gamma^(i-1), gamma^i]
+        return 2 * self.gamma ** index / (self.gamma + 1)
+
+    def add(self, value: float, weight: int = 1) -> None:
+        if value < 0:
+            raise ValueError("DDSketch only accepts non-negative values")
+        if value < MIN_INDEXABLE_VALUE:
+            self.zero_count += weight
+        else:
+            index = self._index(value)
+            self.bins[index] = self.bins.get(index, 0) + weight
+            if len(self.bins) > MAX_BINS:
+                self._collapse()
+        self.min = min(self.min, value)
+        self.max = max(self.max, value)
+        self.sum += value * weight
+
+    def _collapse(self) -> None:
+        ordered = sorted(self.bins)
+        excess = ordered[: len(ordered) - MAX_BINS + 1]
+        folded = sum(self.bins.pop(i) for i in excess)
+        target = ordered[len(excess)]
+        self.bins[target] = self.bins.get(target, 0) + folded
+
+    def merge(self, other: "DDSketch") -> None:
+        if not math.isclose(self.gamma, other.gamma):
+            raise ValueError("Cannot merge sketches with different accuracy")
+        for index, count in other.bins.items():
+            self.bins[index] = self.bins.get(index, 0) + count
+        if len(self.bins) > MAX_BINS:
+            self._collapse()
+        self.zero_count += other.zero_count
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        self.sum += other.sum
+
+    def quantile(self, q: float) -> Optional[float]:
+        total = self.count
+        if total == 0:
+            return None
+        if not 0 <= q <= 1:
+            raise ValueError("q must be between 0 and 1")
+
+        rank = q * (total - 1)
+        if rank < self.zero_count:
+            return 0.0
+        seen = self.zero_count
+        for index in sorted(self.bins):
+            seen += self.bins[index]
+            if seen > rank:
+                return min(max(self._bin_value(index), self.min), self.max)
+        return self.max
+
+    def to_bytes(self) -> bytes:
+        """Compact binary form: fixed header + varint (index delta, count) pairs."""
+        out = bytearray(HEADER.pack(
+            SERIAL_VERSION, self.relative_accuracy, self.zero_count,
+            self.min if self.count else 0.0, self.max if self.count else 0.0, self.sum,
+        ))
+        _write_varint(out, len(self.bins))
+        previous = 0
+        for index in sorted(self.bins):
+            delta = index - previous
+            _write_varint(out, (delta << 1) ^ (delta >> 63))  # zigzag: indexes may be negative
+            _write_varint(out, self.bins[index])
+            previous = index
+        return bytes(out)
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> "DDSketch":
+        version, accuracy, zero_count, minimum, maximum, total = HEADER.unpack_from(data)
+        if version != SERIAL_VERSION:
+            raise ValueError(f"Unsupported sketch version {version}")
+        sketch = cls(accuracy)
+        sketch.zero_count = zero_count
+        sketch.sum = total
+
+        pos = HEADER.size
+        size, pos = _read_varint(data, pos)
+        index = 0
+        for _ in range(size):
+            zigzag, pos = _read_varint(data, pos)
+            count, pos = _read_varint(data, pos)
+            index += (zigzag >> 1) ^ -(zigzag & 1)
+            sketch.bins[index] = count
+
+        if sketch.count:
+            sketch.min, sketch.max = minimum, maximum
+        return sketch
+
+
+def _hour(moment: datetime) -> datetime:
+    return moment.astimezone(timezone.utc).replace(minute=0, second=0, microsecond=0)
+
+
+class ResponseTimeSketches:
+    """Per-(company, channel, hour) sketches: buffered in memory, merged into the DB periodically."""
+
+    def __init__(self):
+        self._pending: Dict[SketchKey, DDSketch] = {}
+        self._lock = asyncio.Lock()
+        self.flushed = 0
+        self.last_flush: Optional[datetime] = None
+
+    def observe(self, company_id: int, channel: str, at: datetime, seconds: Optional[int]) -> None:
+        if seconds is None:
+            return
+        key = (company_id, channel, _hour(at))
+        sketch = self._pending.get(key)
+        if sketch is None:
+            sketch = self._pending[key] = DDSketch()
+        sketch.add(seconds)
+
+    async def flush(self) -> int:
+        """Merge pending sketches into their rows. Returns the number of buckets written."""
+        async with self._lock:
+            pending, self._pending = self._pending, {}
+            if not pending:
+                return 0
+            try:
+                async with AsyncSessionLocal() as db:
+                    # Create missing rows, then lock all of them (key order avoids deadlocks
+                    # between workers flushing the same buckets) and merge
+                    keys = sorted(pending)
+                    await db.execute(
+                        insert(ResponseTimeSketch)
+                        .values([
+                            {"company_id": c, "channel": ch, "bucket_start": b,
+                             "sketch": DDSketch().to_bytes(), "count": 0}
+                            for c, ch, b in keys
+                        ])
+                        .on_conflict_do_nothing()
+                    )
+                    for company_id, channel, bucket in keys:
+                        row = await db.get(
+                            ResponseTimeSketch, (company_id, channel, bucket), with_for_update=True
+                        )
+                        merged = DDSketch.from_bytes(row.sketch)
+                        merged.merge(pending[(company_id, channel, bucket)])
+                        row.sketch = merged.to_bytes()
+                        row.count = merged.count
+                    await db.commit()
+            except Exception:
+                # Keep the observations for the next flush
+                for key, sketch in pending.items():
+                    current = self._pending.get(key)
+                    if current is None:
+                        self._pending[key] = sketch
+                    else:
+                        current.merge(sketch)
+                raise
+
+            self.flushed += len(pending)
+            self.last_flush = datetime.now(timezone.utc)
+            return len(pending)
+
+    async def quantiles(
+        self,
+        db: AsyncSession,
+        company_id: int,
+        step: timedelta,
+        start: datetime,
+        end: datetime,
+        channel: Optional[str] = None,
+        quantiles: Iterable[float] = REPORTED_QUANTILES,
+    ) -> Dict[str, List[Dict[str, Any]]]:
+        """Per-channel quantiles per bucket of `step` (hourly sketches merged into wider buckets)."""
+        s = ResponseTimeSketch
+        query = select(s.channel, s.bucket_start, s.sketch).where(
+            s.company_id == company_id,
+            s.bucket_start >= start,
+            s.bucket_start < end,
+        )
+        if channel:
+            query = query.where(s.channel == channel)
+        result = await db.execute(query.order_by(s.channel, s.bucket_start))
+
+        merged: Dict[str, Dict[datetime, DDSketch]] = defaultdict(dict)
+        for row_channel, bucket_start, data in result.all():
+            # Buckets aligned to the epoch, so daily buckets are UTC days like the rollups
+            bucket = EPOCH + (bucket_start - EPOCH) // step * step
+            sketch = DDSketch.from_bytes(data)
+            if bucket in merged[row_channel]:
+                merged[row_channel][bucket].merge(sketch)
+            else:
+                merged[row_channel][bucket] = sketch
+
+        series: Dict[str, List[Dict[str, Any]]] = {}
+        for row_channel, buckets in merged.items():
+            series[row_channel] = [
+                {
+                    "bucket_start": bucket,
+                    "count": sketch.count,
+                    **{f"p{round(q * 100)}": sketch.quantile(q) for q in quantiles},
+                }
+                for bucket, sketch in sorted(buckets.items())
+            ]
+        return series
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "pending_buckets": len(self._pending),
+            "flushed_buckets": self.flushed,
+            "last_flush": self.last_flush.isoformat() if self.last_flush else None,
+        }
+
+
+# Singleton instance
+response_time_sketches = ResponseTimeSketches()
@@ -0,0 +1,213 @@
+"""
+Queued Stripe webhook processing.
+The webhook endpoint only verifies the signature, stores the event in
+`stripe_events` keyed by the Stripe event id (redeliveries are no-ops) and
+acknowledges it. The periodic worker applies stored events with the
+handler registered for their type:
+- events of one customer are applied in Stripe order, one customer per
+  transaction under a Postgres advisory lock, so every API worker can
+  drain the queue without reordering a customer's events
+- a failing event is retried with exponential backoff and holds back the
+  customer's later events; after MAX_ATTEMPTS it is marked "failed" and
+  the customer's queue moves on
+Handlers get (stripe object, db) and must not commit: their writes and the
+"processed" mark are committed together. They return the id of the user
+whose plan changed (or None) so cached entitlements can be dropped.
+"""
+from datetime import datetime, timedelta, timezone
+from typing import Any, Awaitable, Callable, Dict, Optional, Set
+
+import stripe
+from sqlalchemy import select, update, delete, func, text
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.db.session import AsyncSessionLocal
+from app.models.stripe_event import StripeEvent
+from app.services.entitlements import entitlements
+
+PENDING = "pending"
+PROCESSED = "processed"
+FAILED = "failed"
+
+# Worker poll interval, seconds
+STRIPE_EVENT_POLL_INTERVAL = 2.0
+
+# Customers drained per run, events applied per customer transaction
+CUSTOMERS_PER_RUN = 50
+EVENTS_PER_CUSTOMER = 20
+
+# Retry backoff: RETRY_BASE_DELAY * 2^(attempt-1), capped; failed for good after MAX_ATTEMPTS
+MAX_ATTEMPTS = 8
+RETRY_BASE_DELAY = 10.0
+RETRY_MAX_DELAY = 3600.0
+
+# Processed events are kept this long (dedupe window; Stripe retries for 3 days)
+STRIPE_EVENT_RETENTION_DAYS = 30
+STRIPE_EVENT_PURGE_INTERVAL = 3600.0
+
+Handler = Callable[[Any, AsyncSession], Awaitable[Optional[int]]]
+
+
+def retry_delay(attempts: int) -> timedelta:
+    return timedelta(seconds=min(RETRY_BASE_DELAY * 2 ** (attempts - 1), RETRY_MAX_DELAY))
+
+
+class StripeEventQueue:
+    """Stores webhook events and applies them in per-customer order."""
+
+    def __init__(self):
+        self._handlers: Dict[str, Handler] = {}
+        self.received = 0
+        self.duplicates = 0
+        self.processed = 0
+        self.retried = 0
+        self.failed = 0
+        self.last_error: Optional[str] = None
+
+    def register(self, event_type: str, handler: Handler) -> None:
+        self._handlers[event_type] = handler
+
+    def handles(self, event_type: Optional[str]) -> bool:
+        return event_type in self._handlers
+
+    async def store(self, db: AsyncSession, event: Dict[str, Any]) -> bool:
+        """Persist a verified webhook event. Returns False if it was already received."""
+        obj = (event.get("data") or {}).get("object") or {}
+        stmt = insert(StripeEvent).values(
+            id=event["id"],
+            type=event["type"],
+            customer_id=obj.get("customer"),
+            payload=event,
+            stripe_created_at=datetime.fromtimestamp(event["created"], tz=timezone.utc),
+            status=PENDING,
+            attempts=0,
+        ).on_conflict_do_nothing(index_elements=[StripeEvent.id])
+        result = await db.execute(stmt)
+        await db.commit()
+
+        if result.rowcount:
+            self.received += 1
+            return True
+        self.duplicates += 1
+        return False
+
+    async def run(self) -> None:
+        """Periodic job: apply due events, one customer transaction at a time."""
+        # Each customer's earliest pending event (ix_stripe_events_pending order). Only
+        # customers whose earliest event is due can make progress: process_customer
+        # stops at an event that is backing off, whatever comes after it
+        heads = (
+            select(StripeEvent.customer_id, StripeEvent.next_attempt_at)
+            .where(StripeEvent.status == PENDING)
+            .distinct(StripeEvent.customer_id)
+            .order_by(StripeEvent.customer_id, StripeEvent.stripe_created_at, StripeEvent.id)
+            .subquery()
+        )
+        async with AsyncSessionLocal() as db:
+            result = await db.execute(
+                select(heads.c.customer_id)
+                .where(heads.c.next_attempt_at <= func.now())
+                .order_by(heads.c.next_attempt_at)
+                .limit(CUSTOMERS_PER_RUN)
+            )
+            customers = result.scalars().all()
+
+        for customer_id in customers:
+            await self.process_customer(customer_id)
+
+    async def process_customer(self, customer_id: Optional[str]) -> int:
+        """Apply a customer's pending events in order. Returns events processed."""
+        changed_users: Set[int] = set()
+        done = 0
+
+        async with AsyncSessionLocal() as db:
+            # Held until commit; another worker on the same customer skips it
+            locked = await db.scalar(
+                text("SELECT pg_try_advisory_xact_lock(hashtext(:key))"),
+                {"key": f"stripe_events:{customer_id or ''}"},
+            )
+            if not locked:
+                return 0
+
+            same_customer = (
+                StripeEvent.customer_id == customer_id if customer_id is not None
+                else StripeEvent.customer_id.is_(None)
+            )
+            result = await db.execute(
+                select(StripeEvent.id, StripeEvent.type, StripeEvent.payload, StripeEvent.attempts,
+                       (StripeEvent.next_attempt_at > func.now()).label("waiting"))
+                .where(StripeEvent.status == PENDING, same_customer)
+                .order_by(StripeEvent.stripe_created_at, StripeEvent.id)
+                .limit(EVENTS_PER_CUSTOMER)
+            )
+            now = datetime.now(timezone.utc)
+
+            for event_id, event_type, payload, attempts, waiting in result.all():
+                if waiting:
+                    # Backing off: later events of this customer wait for it
+                    break
+
+                attempts += 1
+                handler = self._handlers.get(event_type)
+                try:
+                    async with db.begin_nested():
+                        user_id = None
+                        if handler is not None:
+                            obj = stripe.Event.construct_from(payload, stripe.api_key).data.object
+                            user_id = await handler(obj, db)
+                except Exception as e:
+                    self.last_error = f"{event_id}: {str(e)}"
+                    print(f"Stripe event {event_id} ({event_type}) failed: {str(e)}")
+                    values = {"attempts": attempts, "last_error": str(e)[:1000]}
+                    if attempts >= MAX_ATTEMPTS:
+                        self.failed += 1
+                        await db.execute(
+                            update(StripeEvent).where(StripeEvent.id == event_id)
+                            .values(status=FAILED, **values)
+                        )
+                        continue
+                    self.retried += 1
+                    await db.execute(
+                        update(StripeEvent).where(StripeEvent.id == event_id)
+                        .values(next_attempt_at=now + retry_delay(attempts), **values)
+                    )
+                    break
+
+                await db.execute(
+                    update(StripeEvent).where(StripeEvent.id == event_id)
+                    .values(status=PROCESSED, attempts=attempts, processed_at=func.now(), last_error=None)
+                )
+                if user_id is not None:
+                    changed_users.add(user_id)
+                done += 1
+
+            await db.commit()
+
+        self.processed += done
+        entitlements.invalidate(*changed_users)
+        return done
+
+    async def purge(self) -> None:
+        """Periodic job: delete processed events past the retention window."""
+        cutoff = datetime.now(timezone.utc) - timedelta(days=STRIPE_EVENT_RETENTION_DAYS)
+        async with AsyncSessionLocal() as db:
+            await db.execute(
+                delete(StripeEvent).where(StripeEvent.status == PROCESSED, StripeEvent.processed_at < cutoff)
+            )
+            await db.commit()
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "handled_types": sorted(self._handlers),
+            "received": self.received,
+            "duplicates": self.duplicates,
+            "processed": self.processed,
+            "retried": self.retried,
+            "failed": self.failed,
+            "last_error": self.last_error,
+        }
+
+
+# Singleton instance
+stripe_events = StripeEventQueue()
@@ -1,13 +1,37 @@
 from supabase import create_client, Client
 from uuid import UUID
 from app.core.config import settings
-from typing import Optional, Dict, List, Any
+from typing import Optional, Dict, List, Any, Callable, Awaitable
 import pandas as pd
 import re
 from decimal import Decimal
 from datetime import datetime
 import json
 import asyncio
+import httpx
+from app.services.resilience import upstream_guards, UpstreamUnavailable
+
+# Records per insert/upsert request when importing a knowledge base
+KB_UPLOAD_BATCH_SIZE = 500
+
+# Errors that count against the Supabase circuit breaker (PostgREST errors such as
+# a missing table are answers, not outages)
+SUPABASE_UPSTREAM_ERRORS = (httpx.HTTPError,)
+
+# Cloudinary public_ids per media-reference cleanup request (they go in the query string)
+MEDIA_REFERENCE_BATCH_SIZE = 50
+
+# progress(stage, details) callback of create_kb_table
+ImportProgress = Callable[[str, Dict[str, Any]], Awaitable[None]]
+
+
+def _media_url_pattern(public_ids: List[str]) -> str:
+    """
+    Postgres regex matching the Cloudinary delivery URL of any of the public_ids
+    (every character except [A-Za-z0-9_] is escaped, so ids match literally).
+    """
+    escaped = "|".join(re.sub(r"([^A-Za-z0-9_])", r"\\\1", public_id) for public_id in public_ids)
+    return f"/(upload|v[0-9]+)/({escaped})\\.[A-Za-z0-9]+$"
 
 
 class SupabaseService:
@@ -21,6 +45,11 @@ class SupabaseService:
                 settings.SUPABASE_SERVICE_ROLE_KEY
             )
 
+    async def _execute(self, query: Any) -> Any:
+        """Run a blocking supabase-py request in a worker thread, behind the circuit breaker."""
+        async with upstream_guards.protect("supabase", failure_exceptions=SUPABASE_UPSTREAM_ERRORS):
+            return await asyncio.to_thread(query.execute)
+
     def is_configured(self) -> bool:
         """Check if Supabase is properly configured."""
         return self.client is not None
@@ -63,13 +92,15 @@ class SupabaseService:
         try:
             table_name = self.generate_table_name(company_name, kb_type)
             # Try to query the table - if it exists, we'll get a response
-            response = self.client.table(table_name).select('*', count='exact').limit(1).execute()
+            response = await self._execute(self.client.table(table_name).select('*', count='exact').limit(1))
 
             # Table exists
             return {
                 "count": 1,
                 "existing": [{"table_name": table_name}]
             }
+        except UpstreamUnavailable:
+            raise
         except Exception as e:
             # Table doesn't exist or error accessing it
             error_msg = str(e).lower()
@@ -346,23 +377,31 @@ class SupabaseService:
         df: pd.DataFrame,
         kb_type: str,
         user_id: int,
-        company_name: str
+        company_name: str,
+        progress: Optional[ImportProgress] = None
     ) -> Dict[str, Any]:
         """
         Create a new knowledge base table and upload CSV data.
         If table already exists, upsert the data instead.
         Uses Supabase RPC to create the table dynamically.
+        `progress` is awaited at each stage and after every uploaded batch.
         """
         if not self.is_configured():
             raise Exception("Supabase is not configured")
 
+        async def report(stage: str, **details) -> None:
+            if progress is not None:
+                await progress(stage, details)
+
         try:
             # Step 1: Check if table already exists by trying to query it
             table_exists = False
             try:
-                test_query = self.client.table(table_name).select('*').limit(1).execute()
+                test_query = await self._execute(self.client.table(table_name).select('*').limit(1))
                 table_exists = True
                 print(f"Table '{table_name}' already exists. Will upsert data.")
+            except UpstreamUnavailable:
+                raise
             except Exception as e:
                 error_msg = str(e).lower()
                 if 'not found' in error_msg or 'does not exist' in error_msg or 'pgrst205' in error_msg:
@@ -373,10 +412,11 @@ class SupabaseService:
 
             # Step 2: Create table if it doesn't exist
             if not table_exists:
+                await report("creating_table")
                 if kb_type == "Product":
-                    rpc_result = self.client.rpc('admin_create_catalog_table', {'p_table': table_name}).execute()
+                    rpc_result = await self._execute(self.client.rpc('admin_create_catalog_table', {'p_table': table_name}))
                 else:  # Service
-                    rpc_result = self.client.rpc('admin_create_service_table', {'p_service_table': table_name}).execute()
+                    rpc_result = await self._execute(self.client.rpc('admin_create_service_table', {'p_service_table': table_name}))
 
                 if not rpc_result.data.get('ok'):
                     raise Exception(f"Failed to create table: {rpc_result.data.get('error', 'Unknown error')}")
@@ -410,6 +450,7 @@ class SupabaseService:
                 print(f"📊 Original DataFrame rows: {len(df)}, After cleaning: {len(df_cleaned)}")
 
             # Step 4: Convert DataFrame rows to match schema
+            await report("converting", rows_total=len(df_cleaned))
             records = []
             for idx, row in df_cleaned.iterrows():
                 try:
@@ -429,21 +470,26 @@ class SupabaseService:
 
             print(f"✅ Valid records to insert: {len(records)}")
 
-            # Step 4: Insert or upsert data based on SKU field
-            if records:
+            # Step 4: Insert or upsert data based on SKU field (in batches, reporting progress)
+            await report("uploading", rows_uploaded=0, rows_total=len(records))
+            for start in range(0, len(records), KB_UPLOAD_BATCH_SIZE):
+                batch = records[start:start + KB_UPLOAD_BATCH_SIZE]
                 if table_exists:
                     # Table exists - UPSERT the data (update existing by SKU or insert new)
                     # Supabase upsert() uses ON CONFLICT to handle duplicates
                     # The 'sku' field will be used as the conflict resolution key
-                    response = self.client.table(table_name).upsert(
-                        records,
+                    response = await self._execute(self.client.table(table_name).upsert(
+                        batch,
                         on_conflict='sku'  # If SKU matches, update; otherwise insert
-                    ).execute()
-                    print(f"✅ UPSERT completed: {len(records)} records processed (updated existing or inserted new)")
+                    ))
                 else:
                     # New table - insert data
-                    response = self.client.table(table_name).insert(records).execute()
-                    print(f"✅ INSERT completed: {len(records)} records inserted")
+                    response = await self._execute(self.client.table(table_name).insert(batch))
+                await report("uploading", rows_uploaded=start + len(batch), rows_total=len(records))
+
+            if records:
+                action = "UPSERT" if table_exists else "INSERT"
+                print(f"✅ {action} completed: {len(records)} records processed")
 
             # No kb_registry needed - tables are just named "DB {kb_type} {company_name}"
 
@@ -453,6 +499,8 @@ class SupabaseService:
                 "table_name": table_name
             }
 
+        except UpstreamUnavailable:
+            raise
         except Exception as e:
             raise Exception(f"Failed to create KB table: {str(e)}")
 
@@ -488,7 +536,7 @@ class SupabaseService:
 
                 try:
                     # Try to query the table and get row count
-                    response = self.client.table(table_name).select('*', count='exact').limit(1).execute()
+                    response = await self._execute(self.client.table(table_name).select('*', count='exact').limit(1))
 
                     # Table exists - get the count
                     row_count = response.count if hasattr(response, 'count') else 0
@@ -504,6 +552,8 @@ class SupabaseService:
                         })
                         print(f"✅ Found KB table: {table_name} with {row_count} rows")
 
+                except UpstreamUnavailable:
+                    raise
                 except Exception as e:
                     # Table doesn't exist or error - skip it
                     error_msg = str(e).lower()
@@ -526,20 +576,23 @@ class SupabaseService:
 
         try:
             # Get total count
-            count_response = self.client.table(table_name).select('*', count='exact').execute()
+            count_response = await self._execute(self.client.table(table_name).select('*', count='exact'))
             total_count = count_response.count if hasattr(count_response, 'count') else len(count_response.data)
 
             # Get paginated data
-            response = self.client.table(table_name)\
-                .select('*')\
-                .range(offset, offset + limit - 1)\
-                .execute()
+            response = await self._execute(
+                self.client.table(table_name)
+                .select('*')
+                .range(offset, offset + limit - 1)
+            )
 
             return {
                 "rows": response.data,
                 "total_count": total_count
             }
 
+        except UpstreamUnavailable:
+            raise
         except Exception as e:
             raise Exception(f"Failed to retrieve KB data: {str(e)}")
 
@@ -553,14 +606,17 @@ class SupabaseService:
             # You would need to use admin SQL or manual deletion
             # For now, we'll just remove from registry
 
-            self.client.table('kb_registry')\
-                .delete()\
-                .eq('table_name', table_name)\
-                .eq('user_id', user_id)\
-                .execute()
+            await self._execute(
+                self.client.table('kb_registry')
+                .delete()
+                .eq('table_name', table_name)
+                .eq('user_id', user_id)
+            )
 
             return {"success": True}
 
+        except UpstreamUnavailable:
+            raise
         except Exception as e:
             raise Exception(f"Failed to delete KB: {str(e)}")
 
@@ -579,7 +635,7 @@ class SupabaseService:
             row_data['source_updated_at'] = datetime.now().isoformat()
 
             # Insert the row
-            response = self.client.table(table_name).insert(row_data).execute()
+            response = await self._execute(self.client.table(table_name).insert(row_data))
 
             if response.data and len(response.data) > 0:
                 # Update row count in registry
@@ -588,6 +644,8 @@ class SupabaseService:
             else:
                 raise Exception("No data returned from insert")
 
+        except UpstreamUnavailable:
+            raise
         except Exception as e:
             raise Exception(f"Failed to add row: {str(e)}")
 
@@ -607,16 +665,19 @@ class SupabaseService:
             row_data['source_updated_at'] = datetime.now().isoformat()
 
             # Update the row
-            response = self.client.table(table_name)\
-                .update(row_data)\
-                .eq('id', row_id)\
-                .execute()
+            response = await self._execute(
+                self.client.table(table_name)
+                .update(row_data)
+                .eq('id', row_id)
+            )
 
             if response.data and len(response.data) > 0:
                 return response.data[0]
             else:
                 raise Exception("No data returned from update")
 
+        except UpstreamUnavailable:
+            raise
         except Exception as e:
             raise Exception(f"Failed to update row: {str(e)}")
 
@@ -632,32 +693,68 @@ class SupabaseService:
 
         try:
             # Delete the row
-            response = self.client.table(table_name)\
-                .delete()\
-                .eq('id', row_id)\
-                .execute()
+            response = await self._execute(
+                self.client.table(table_name)
+                .delete()
+                .eq('id', row_id)
+            )
 
             # Update row count in registry
             await self._update_registry_row_count(table_name, user_id)
 
             return {"success": True}
 
+        except UpstreamUnavailable:
+            raise
         except Exception as e:
             raise Exception(f"Failed to delete row: {str(e)}")
 
+    async def clear_media_references(
+        self,
+        table_name: str,
+        public_ids: List[str]
+    ) -> int:
+        """
+        Clear image_url/video_url values that point at deleted Cloudinary assets.
+        A value matches when it is the asset's delivery URL, i.e. ends with
+        /v<version>/<public_id>.<format> (or /upload/<public_id>.<format>);
+        matching columns are set to NULL, one request per column per batch.
+        Returns the number of column values cleared.
+        """
+        if not self.is_configured():
+            raise Exception("Supabase is not configured")
+
+        try:
+            updated = 0
+            for start in range(0, len(public_ids), MEDIA_REFERENCE_BATCH_SIZE):
+                pattern = _media_url_pattern(public_ids[start:start + MEDIA_REFERENCE_BATCH_SIZE])
+                for column in ("image_url", "video_url"):
+                    response = await self._execute(
+                        self.client.table(table_name)
+                        .update({column: None})
+                        .filter(column, 'match', pattern)
+                    )
+                    updated += len(response.data or [])
+            return updated
+        except UpstreamUnavailable:
+            raise
+        except Exception as e:
+            raise Exception(f"Failed to clear media references: {str(e)}")
+
     async def _update_registry_row_count(self, table_name: str, user_id: int):
         """Update the row count in kb_registry after add/delete operations."""
         try:
             # Get current row count
-            count_response = self.client.table(table_name).select('*', count='exact').execute()
+            count_response = await self._execute(self.client.table(table_name).select('*', count='exact'))
             total_count = count_response.count if hasattr(count_response, 'count') else len(count_response.data)
 
             # Update registry
-            self.client.table('kb_registry')\
-                .update({'row_count': total_count})\
-                .eq('table_name', table_name)\
-                .eq('user_id', user_id)\
-                .execute()
+            await self._execute(
+                self.client.table('kb_registry')
+                .update({'row_count': total_count})
+                .eq('table_name', table_name)
+                .eq('user_id', user_id)
+            )
 
         except Exception as e:
             # Don't fail the operation if registry update fails
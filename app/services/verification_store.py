@@ -0,0 +1,97 @@
+"""
+Verification codes and magic link tokens.
+Only an HMAC of the code (keyed with SECRET_KEY) is stored, in the indexed
+`code_hash` column, so lookups are index probes and a leaked table does
+not reveal live codes. Issuing replaces the email's previous codes in one
+transaction; consuming is a single UPDATE ... RETURNING, so a code cannot
+be used twice by concurrent requests. Expired rows (used ones included)
+are deleted by a periodic job in small batches.
+"""
+import hashlib
+import hmac
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Optional
+
+from sqlalchemy import select, update, delete
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.db.session import AsyncSessionLocal
+from app.models.verification_code import VerificationCode
+
+# Purge job: interval (seconds), rows per DELETE and DELETEs per run
+VERIFICATION_PURGE_INTERVAL = 600.0
+PURGE_BATCH_SIZE = 5000
+PURGE_MAX_BATCHES = 20
+
+
+def hash_code(code: str) -> str:
+    return hmac.new(settings.SECRET_KEY.encode(), code.encode(), hashlib.sha256).hexdigest()
+
+
+class VerificationStore:
+    """Issues, consumes and purges hashed verification codes."""
+
+    def __init__(self):
+        self.purged = 0
+        self.last_purge: Optional[datetime] = None
+
+    async def issue(self, db: AsyncSession, email: str, code: str, ttl: timedelta) -> None:
+        """Replace the email's codes with `code` (delete + insert, one commit)."""
+        await db.execute(delete(VerificationCode).where(VerificationCode.email == email))
+        db.add(VerificationCode(
+            email=email,
+            code_hash=hash_code(code),
+            expires_at=datetime.now(timezone.utc) + ttl,
+        ))
+        await db.commit()
+
+    async def consume(self, db: AsyncSession, code: str, email: Optional[str] = None) -> Optional[str]:
+        """Mark a valid code as used and return its email (None if unknown, used or expired)."""
+        conditions = [
+            VerificationCode.code_hash == hash_code(code),
+            VerificationCode.is_used == False,
+            VerificationCode.expires_at > datetime.now(timezone.utc),
+        ]
+        if email is not None:
+            conditions.append(VerificationCode.email == email)
+
+        # Short codes can repeat across emails (those lookups pass the email); tokens are unique
+        target = select(VerificationCode.id).where(*conditions).limit(1).scalar_subquery()
+        result = await db.execute(
+            update(VerificationCode)
+            .where(VerificationCode.id == target, VerificationCode.is_used == False)
+            .values(is_used=True)
+            .returning(VerificationCode.email)
+        )
+        consumed = result.scalar_one_or_none()
+        await db.commit()
+        return consumed
+
+    async def purge(self) -> None:
+        """Periodic job: delete expired codes in batches (one short transaction each)."""
+        now = datetime.now(timezone.utc)
+        for _ in range(PURGE_MAX_BATCHES):
+            batch = (
+                select(VerificationCode.id)
+                .where(VerificationCode.expires_at < now)
+                .limit(PURGE_BATCH_SIZE)
+                .scalar_subquery()
+            )
+            async with AsyncSessionLocal() as db:
+                result = await db.execute(delete(VerificationCode).where(VerificationCode.id.in_(batch)))
+                await db.commit()
+            self.purged += result.rowcount
+            if result.rowcount < PURGE_BATCH_SIZE:
+                break
+        self.last_purge = now
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "purged": self.purged,
+            "last_purge": self.last_purge.isoformat() if self.last_purge else None,
+        }
+
+
+# Singleton instance
+verification_store = VerificationStore()
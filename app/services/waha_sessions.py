@@ -0,0 +1,201 @@
+"""
+WAHA session manager.
+Every WhatsApp channel gets its own WAHA session ("channel-{id}") instead of
+sharing "default", so tenants can pair in parallel. Sessions are spread over
+one or more WAHA nodes (least-loaded first, capped per node) and tracked in
+Channel.config as {"session_id": ..., "waha_node": ...}.
+"""
+import asyncio
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional
+
+import httpx
+from fastapi import HTTPException, status
+from sqlalchemy import select, func
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.models.channel import Channel, ChannelPlatform
+from app.services.http_client import http_clients
+
+# Max sessions allocated on one WAHA node
+MAX_SESSIONS_PER_NODE = 50
+
+# Sessions created before per-channel sessions existed
+LEGACY_SESSION_ID = "default"
+
+# Session statuses after which there is no point waiting any longer
+# (SCAN_QR_CODE = ready for a pairing-code request, WORKING = already paired)
+SESSION_SETTLED = {"SCAN_QR_CODE", "WORKING"}
+SESSION_START_POLLS = 20
+SESSION_START_POLL_INTERVAL = 0.5
+
+
+@dataclass(frozen=True)
+class WahaNode:
+    url: str
+    api_key: str
+
+    def headers(self) -> Dict[str, str]:
+        return {
+            "X-Api-Key": self.api_key,
+            "Accept": "application/json",
+            "Content-Type": "application/json",
+        }
+
+
+def configured_nodes() -> List[WahaNode]:
+    """
+    WAHA_API_URL is the primary node. Extra nodes (same API key) can be listed
+    comma-separated in the optional WAHA_EXTRA_URLS setting.
+    """
+    if not settings.WAHA_API_URL or not settings.WAHA_API_KEY:
+        return []
+
+    urls = [settings.WAHA_API_URL]
+    urls.extend(u.strip() for u in settings.WAHA_EXTRA_URLS.split(",") if u.strip())
+
+    return [WahaNode(url=u.rstrip("/"), api_key=settings.WAHA_API_KEY) for u in dict.fromkeys(urls)]
+
+
+class WahaSessionManager:
+    """Allocates and drives per-channel WAHA sessions."""
+
+    def __init__(self, nodes: Optional[List[WahaNode]] = None):
+        self._nodes = nodes
+
+    @property
+    def nodes(self) -> List[WahaNode]:
+        return self._nodes if self._nodes is not None else configured_nodes()
+
+    def is_configured(self) -> bool:
+        return bool(self.nodes)
+
+    @staticmethod
+    def session_name(channel_id: int) -> str:
+        return f"channel-{channel_id}"
+
+    def node_for(self, config: Optional[Dict[str, Any]]) -> Optional[WahaNode]:
+        """Node a channel's session lives on (primary node for legacy sessions)."""
+        nodes = self.nodes
+        if not nodes:
+            return None
+        url = (config or {}).get("waha_node")
+        for node in nodes:
+            if node.url == url:
+                return node
+        return nodes[0]
+
+    async def pick_node(self, db: AsyncSession) -> WahaNode:
+        """Least-loaded node that is still under MAX_SESSIONS_PER_NODE."""
+        nodes = self.nodes
+        node_column = Channel.config["waha_node"].as_string()
+        result = await db.execute(
+            select(node_column, func.count())
+            .where(
+                Channel.platform == ChannelPlatform.WHATSAPP,
+                node_column.is_not(None),
+            )
+            .group_by(node_column)
+        )
+        load = dict(result.all())
+
+        candidates = [n for n in nodes if load.get(n.url, 0) < MAX_SESSIONS_PER_NODE]
+        if not candidates:
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="No WhatsApp capacity available right now. Please try again later.",
+            )
+        return min(candidates, key=lambda n: load.get(n.url, 0))
+
+    async def _call(self, node: WahaNode, method: str, path: str, **kwargs):
+        return await http_clients.request(
+            "waha",
+            method,
+            f"{node.url}{path}",
+            headers=node.headers(),
+            **kwargs,
+        )
+
+    async def get_session(self, node: WahaNode, session_id: str) -> Optional[Dict[str, Any]]:
+        resp = await self._call(node, "GET", f"/api/sessions/{session_id}", timeout=10.0)
+        if resp.status_code == 404:
+            return None
+        resp.raise_for_status()
+        return resp.json()
+
+    async def list_sessions(self, node: WahaNode) -> List[Dict[str, Any]]:
+        resp = await self._call(node, "GET", "/api/sessions", params={"all": "true"}, timeout=10.0)
+        resp.raise_for_status()
+        data = resp.json()
+        if isinstance(data, dict):
+            return data.get("data") or data.get("sessions") or []
+        return data
+
+    async def create_session(self, node: WahaNode, session_id: str) -> None:
+        payload: Dict[str, Any] = {"name": session_id, "start": True}
+        if settings.WAHA_WEBHOOK_URL:
+            payload["config"] = {
+                "webhooks": [{
+                    "url": settings.WAHA_WEBHOOK_URL,
+                    "events": ["session.status"],
+                    "hmac": {"key": settings.WAHA_API_KEY},
+                }]
+            }
+        resp = await self._call(node, "POST", "/api/sessions", json=payload, timeout=30.0)
+        # 422 = already exists
+        if resp.status_code >= 400 and resp.status_code != 422:
+            resp.raise_for_status()
+
+    async def start_session(self, node: WahaNode, session_id: str) -> None:
+        resp = await self._call(node, "POST", f"/api/sessions/{session_id}/start", timeout=30.0)
+        if resp.status_code >= 400 and resp.status_code != 422:
+            resp.raise_for_status()
+
+    async def stop_session(self, node: WahaNode, session_id: str) -> None:
+        await self._call(node, "POST", f"/api/sessions/{session_id}/stop", timeout=10.0)
+
+    async def delete_session(self, node: WahaNode, session_id: str) -> None:
+        await self._call(node, "DELETE", f"/api/sessions/{session_id}", timeout=10.0)
+
+    async def logout(self, node: WahaNode, session_id: str) -> None:
+        await self._call(node, "POST", f"/api/{session_id}/logout", timeout=10.0)
+
+    async def ensure_started(self, node: WahaNode, session_id: str) -> None:
+        """Create/start the session and wait until it is ready for a pairing-code request."""
+        info = await self.get_session(node, session_id)
+        if info is None:
+            await self.create_session(node, session_id)
+        elif (info.get("status") or "").upper() in {"STOPPED", "FAILED"}:
+            await self.start_session(node, session_id)
+
+        for _ in range(SESSION_START_POLLS):
+            info = await self.get_session(node, session_id)
+            if info and (info.get("status") or "").upper() in SESSION_SETTLED:
+                return
+            await asyncio.sleep(SESSION_START_POLL_INTERVAL)
+
+    async def request_pairing_code(self, node: WahaNode, session_id: str, phone_digits: str) -> httpx.Response:
+        return await self._call(
+            node,
+            "POST",
+            f"/api/{session_id}/auth/request-code",
+            json={"phoneNumber": phone_digits},
+            timeout=30.0,
+        )
+
+    async def release(self, config: Optional[Dict[str, Any]]) -> None:
+        """Log out and tear down a channel's session (legacy 'default' is only logged out)."""
+        session_id = (config or {}).get("session_id")
+        node = self.node_for(config)
+        if not session_id or node is None:
+            return
+
+        await self.logout(node, session_id)
+        if session_id != LEGACY_SESSION_ID:
+            await self.stop_session(node, session_id)
+            await self.delete_session(node, session_id)
+
+
+# Singleton instance
+waha_sessions = WahaSessionManager()
@@ -0,0 +1,215 @@
+"""
+WAHA session-state sync.
+A background task fetches all sessions from every WAHA node once per interval (and WAHA
+session.status webhooks push changes in between) and writes the resulting
+WhatsApp channel states to the DB in one bulk UPDATE. Status endpoints
+then read the channel row instead of calling WAHA per dashboard poll, and
+changes are pushed to the owners' event streams.
+"""
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import select, update
+
+from app.db.session import AsyncSessionLocal
+from app.models.channel import Channel, ChannelPlatform, ChannelStatus
+from app.services.entitlements import entitlements
+from app.services.events import event_hub
+from app.services.waha_sessions import waha_sessions
+
+# Seconds between full WAHA session refreshes
+WAHA_SYNC_INTERVAL = 15.0
+
+# WAHA session statuses of a session that is starting or waiting to be paired;
+# every other status that is not WORKING (STOPPED, FAILED, ...) means disconnected
+SESSION_PENDING = {"STARTING", "SCAN_QR_CODE"}
+
+
+@dataclass
+class SessionState:
+    session_id: str
+    status: str
+    phone: Optional[str]
+    updated_at: datetime
+
+    @property
+    def connected(self) -> bool:
+        # подключен ТОЛЬКО если сессия WORKING и реально есть номер
+        # (WAHA шлёт `me` и для STOPPED / FAILED сессий привязанного аккаунта)
+        return self.status == "WORKING" and bool(self.phone)
+
+    @property
+    def channel_status(self) -> ChannelStatus:
+        if self.connected:
+            return ChannelStatus.CONNECTED
+        if self.status in SESSION_PENDING or self.status == "WORKING":
+            return ChannelStatus.CONNECTING
+        return ChannelStatus.DISCONNECTED
+
+
+def parse_session(data: Dict[str, Any]) -> Optional[SessionState]:
+    """Build a SessionState from one item of WAHA's /api/sessions response."""
+    session_id = (
+        data.get("id")
+        or data.get("name")
+        or data.get("sessionId")
+        or data.get("session_id")
+    )
+    if not session_id:
+        return None
+
+    account = data.get("account") or {}
+    me = data.get("me") or {}
+    phone = (
+        account.get("phoneNumber")
+        or data.get("phoneNumber")
+        or data.get("phone")
+        or (me.get("id") or "").split("@")[0]
+        or None
+    )
+
+    return SessionState(
+        session_id=session_id,
+        status=(data.get("status") or data.get("state") or "").upper(),
+        phone=phone,
+        updated_at=datetime.now(timezone.utc),
+    )
+
+
+def channel_status_event(
+    company_id: int,
+    channel_id: Optional[int],
+    channel_status: ChannelStatus,
+    phone: Optional[str] = None,
+    platform: ChannelPlatform = ChannelPlatform.WHATSAPP,
+) -> Dict[str, Any]:
+    return {
+        "company_id": company_id,
+        "channel_id": channel_id,
+        "platform": platform.value,
+        "status": channel_status.value,
+        "phone_number": phone,
+    }
+
+
+class WahaSessionSync:
+    """Keeps Channel rows in line with WAHA session states."""
+
+    def __init__(self):
+        self.states: Dict[str, SessionState] = {}
+        self.last_refresh: Optional[datetime] = None
+
+    async def fetch_sessions(self) -> List[SessionState]:
+        """One /api/sessions call per WAHA node; a failing node does not hide the others."""
+        states = []
+        for node in waha_sessions.nodes:
+            try:
+                sessions = await waha_sessions.list_sessions(node)
+            except Exception as e:
+                print(f"WAHA session sync failed for {node.url}: {str(e)}")
+                continue
+            for item in sessions:
+                state = parse_session(item)
+                if state is not None:
+                    states.append(state)
+        return states
+
+    async def refresh(self) -> None:
+        """Periodic job: one WAHA call per node, one bulk UPDATE for all changes."""
+        if not waha_sessions.is_configured():
+            return
+
+        states = await self.fetch_sessions()
+        for state in states:
+            self.states[state.session_id] = state
+        self.last_refresh = datetime.now(timezone.utc)
+
+        await self.apply(states)
+
+    async def apply(self, states: List[SessionState]) -> int:
+        """Write changed session states to their WhatsApp channels. Returns rows updated."""
+        if not states:
+            return 0
+
+        by_session = {state.session_id: state for state in states}
+
+        async with AsyncSessionLocal() as db:
+            result = await db.execute(
+                select(
+                    Channel.id,
+                    Channel.user_id,
+                    Channel.company_id,
+                    Channel.config,
+                    Channel.status,
+                    Channel.platform_account_id,
+                ).where(
+                    Channel.platform == ChannelPlatform.WHATSAPP,
+                    Channel.config["session_id"].as_string().in_(list(by_session)),
+                )
+            )
+
+            updates = []
+            owners = {}
+            for channel_id, user_id, company_id, config, current_status, account_id in result.all():
+                state = by_session.get((config or {}).get("session_id"))
+                if state is None:
+                    continue
+
+                new_status = state.channel_status
+                if current_status == new_status and (not state.phone or state.phone == account_id):
+                    continue
+
+                values = {"id": channel_id, "status": new_status}
+                if state.connected:
+                    values["qr_code"] = None
+                    values["qr_code_expires_at"] = None
+                if state.phone:
+                    values["platform_account_id"] = state.phone
+                updates.append(values)
+                owners[channel_id] = (user_id, company_id)
+
+            if updates:
+                await db.execute(update(Channel), updates)
+                await db.commit()
+                # Connected channel counts changed
+                entitlements.invalidate(*(owner for owner, _ in owners.values()))
+
+        for values in updates:
+            user_id, company_id = owners[values["id"]]
+            await event_hub.publish(user_id, "channel.status", channel_status_event(
+                company_id, values["id"], values["status"], values.get("platform_account_id")
+            ))
+
+        return len(updates)
+
+    async def handle_webhook(self, event: Dict[str, Any]) -> int:
+        """
+        Apply a WAHA `session.status` webhook event.
+        Payload: {"event": "session.status", "session": "...", "me": {...}, "payload": {"status": "..."}}
+        """
+        if event.get("event") != "session.status" or not event.get("session"):
+            return 0
+
+        payload = event.get("payload") or {}
+        state = parse_session({
+            "name": event["session"],
+            "status": payload.get("status"),
+            "me": event.get("me") or payload.get("me"),
+        })
+        if state is None:
+            return 0
+
+        self.states[state.session_id] = state
+        return await self.apply([state])
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "sessions": len(self.states),
+            "connected": sum(1 for s in self.states.values() if s.connected),
+            "last_refresh": self.last_refresh.isoformat() if self.last_refresh else None,
+        }
+
+
+# Singleton instance
+waha_session_sync = WahaSessionSync()
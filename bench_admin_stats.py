@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+"""
+Synthetic dataset + benchmark for the admin statistics endpoint.
+
+Seed 100k clients (a quarter on each tier, trial/renewal dates spread over
+the next 60 days), compare the old ORM approach (load every trial and paid
+client, compute days in Python) with the aggregate query + keyset pages
+used by GET /api/v1/admin/stats, then remove the synthetic users:
+    python bench_admin_stats.py seed --clients 100000
+    python bench_admin_stats.py bench
+    python bench_admin_stats.py cleanup
+"""
+import argparse
+import asyncio
+import time
+import tracemalloc
+from datetime import datetime, timezone
+
+from sqlalchemy import select, func, text
+
+from app.db.session import AsyncSessionLocal
+from app.models.user import User, UserRole, SubscriptionTier
+from app.services.client_lists import PAID_TIERS, trial_clients_page, paid_clients_page
+
+EMAIL_PREFIX = "bench-client-"
+
+
+async def seed(clients: int) -> None:
+    async with AsyncSessionLocal() as session:
+        started = time.perf_counter()
+        await session.execute(text("""
+            INSERT INTO users (email, hashed_password, full_name, role, subscription_tier,
+                               trial_ends_at, subscription_ends_at, is_active, is_superuser)
+            SELECT :prefix || g || '@example.com', 'x', 'Bench Client ' || g, 'CLIENT',
+                   (ARRAY['TRIAL', 'BASIC', 'PRO', 'ENTERPRISE'])[1 + (g % 4)]::subscriptiontier,
+                   CASE WHEN g % 4 = 0 THEN now() + (g % 60) * interval '1 day' END,
+                   CASE WHEN g % 4 <> 0 THEN now() + (g % 60) * interval '1 day' END,
+                   true, false
+            FROM generate_series(1, :clients) AS g
+            ON CONFLICT (email) DO NOTHING
+        """), {"prefix": EMAIL_PREFIX, "clients": clients})
+        await session.commit()
+        await session.execute(text("ANALYZE users"))
+        await session.commit()
+    print(f"seeded {clients:,} clients ({time.perf_counter() - started:.1f}s)")
+
+
+async def legacy_stats(session) -> dict:
+    """What get_system_stats did before: two counts, every client row loaded, days in Python."""
+    managers = await session.scalar(
+        select(func.count()).select_from(User).where(User.role == UserRole.MANAGER)
+    )
+    paid_count = await session.scalar(
+        select(func.count()).select_from(User).where(
+            User.role == UserRole.CLIENT, User.subscription_tier.in_(PAID_TIERS)
+        )
+    )
+    trial = (await session.execute(select(User).where(
+        User.role == UserRole.CLIENT, User.subscription_tier == SubscriptionTier.TRIAL
+    ))).scalars().all()
+    paid = (await session.execute(select(User).where(
+        User.role == UserRole.CLIENT, User.subscription_tier.in_(PAID_TIERS)
+    ))).scalars().all()
+
+    now = datetime.now(timezone.utc)
+    trial_list = [
+        {"id": u.id, "days_remaining": max(0, (u.trial_ends_at - now).days)}
+        for u in trial if u.trial_ends_at
+    ]
+    paid_list = [
+        {"id": u.id, "days_until_renewal": max(0, (u.subscription_ends_at - now).days)}
+        for u in paid if u.subscription_ends_at
+    ]
+    return {"managers": managers, "paid": paid_count, "trial": trial_list, "paid_list": paid_list}
+
+
+async def aggregate_stats(session, limit: int) -> dict:
+    """What get_system_stats does now: one aggregate query + first page of each list."""
+    is_client = User.role == UserRole.CLIENT
+    counts = (await session.execute(select(
+        func.count().filter(User.role == UserRole.MANAGER),
+        func.count().filter(is_client, User.subscription_tier.in_(PAID_TIERS)),
+        func.count().filter(is_client, User.subscription_tier == SubscriptionTier.TRIAL),
+    ).select_from(User))).one()
+    trial = await trial_clients_page(session, limit)
+    paid = await paid_clients_page(session, limit)
+    return {"counts": tuple(counts), "trial": trial, "paid": paid}
+
+
+async def measure(label: str, job, runs: int) -> None:
+    timings = []
+    peak = 0
+    for _ in range(runs):
+        async with AsyncSessionLocal() as session:
+            tracemalloc.start()
+            started = time.perf_counter()
+            await job(session)
+            timings.append((time.perf_counter() - started) * 1000)
+            peak = max(peak, tracemalloc.get_traced_memory()[1])
+            tracemalloc.stop()
+    timings.sort()
+    print(f"{label:<24} median {timings[len(timings) // 2]:8.1f} ms   "
+          f"max {timings[-1]:8.1f} ms   peak Python memory {peak / 1024 / 1024:7.1f} MiB")
+
+
+async def bench(limit: int, runs: int) -> None:
+    await measure("legacy (load all)", legacy_stats, runs)
+    await measure(f"aggregate + page {limit}", lambda s: aggregate_stats(s, limit), runs)
+
+    async with AsyncSessionLocal() as session:
+        # Deep page: keyset cost does not depend on the position
+        page = await paid_clients_page(session, limit)
+        for _ in range(100):
+            if not page.next_cursor:
+                break
+            page = await paid_clients_page(session, limit, page.next_cursor)
+        started = time.perf_counter()
+        await paid_clients_page(session, limit, page.next_cursor)
+        print(f"{'paid page #101':<24} {(time.perf_counter() - started) * 1000:8.1f} ms")
+
+
+async def cleanup() -> None:
+    async with AsyncSessionLocal() as session:
+        result = await session.execute(
+            text("DELETE FROM users WHERE email LIKE :pattern"), {"pattern": f"{EMAIL_PREFIX}%"}
+        )
+        await session.commit()
+    print(f"deleted {result.rowcount:,} synthetic clients")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Admin statistics benchmark")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    seed_cmd = sub.add_parser("seed")
+    seed_cmd.add_argument("--clients", type=int, default=100_000)
+
+    bench_cmd = sub.add_parser("bench")
+    bench_cmd.add_argument("--limit", type=int, default=50)
+    bench_cmd.add_argument("--runs", type=int, default=5)
+
+    sub.add_parser("cleanup")
+
+    args = parser.parse_args()
+    if args.command == "seed":
+        asyncio.run(seed(args.clients))
+    elif args.command == "bench":
+        asyncio.run(bench(args.limit, args.runs))
+    else:
+        asyncio.run(cleanup())
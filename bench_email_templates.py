@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+"""
+Email template benchmark.
+
+Measures compiling the templates without and with the on-disk bytecode
+cache (what a worker pays at startup), then rendering every kind / locale
+(subject + text + HTML) and building the full MIME message the delivery
+worker sends:
+    python bench_email_templates.py --iterations 20000
+"""
+import argparse
+import statistics
+import tempfile
+import time
+
+from app.services.email_delivery import build_message
+from app.services.email_templates import LOCALES, EmailTemplates, email_templates
+
+PAYLOADS = {
+    "verification_code": {"code": "483920"},
+    "password_reset": {"code": "120455"},
+    "magic_link": {"magic_link_url": "https://app.example.com/auth/magic-link?token=" + "x" * 32},
+    "trial_expired": {"full_name": "Bench Client", "ended_at": "2026-10-19T00:00:00+00:00"},
+    "subscription_expired": {"full_name": "Bench Client", "ended_at": "2026-10-19T00:00:00+00:00"},
+}
+
+
+def timed(fn, iterations: int):
+    samples = []
+    for _ in range(iterations):
+        started = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - started) * 1_000_000)
+    samples.sort()
+    return statistics.mean(samples), samples[int(len(samples) * 0.99) - 1]
+
+
+def bench_load() -> None:
+    with tempfile.TemporaryDirectory() as cache_dir:
+        started = time.perf_counter()
+        count = EmailTemplates(cache_dir=cache_dir).load()
+        cold = (time.perf_counter() - started) * 1000
+        started = time.perf_counter()
+        EmailTemplates(cache_dir=cache_dir).load()
+        warm = (time.perf_counter() - started) * 1000
+    print(f"compile {count} templates: {cold:.1f} ms cold, {warm:.1f} ms from bytecode cache")
+
+
+def bench_render(iterations: int) -> None:
+    email_templates.load()
+    print(f"{'kind':<22} {'locale':<7} {'render mean':>12} {'p99':>9} {'MIME mean':>11}")
+    for kind in email_templates.kinds():
+        payload = PAYLOADS.get(kind, {})
+        for locale in LOCALES:
+            mean, p99 = timed(lambda: email_templates.render(kind, payload, locale), iterations)
+            mime_payload = {**payload, "locale": locale}
+            mime_mean, _ = timed(lambda: build_message(kind, "bench@example.com", mime_payload), iterations // 10 or 1)
+            print(f"{kind:<22} {locale:<7} {mean:>9.1f} us {p99:>6.1f} us {mime_mean:>8.1f} us")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Email template benchmark")
+    parser.add_argument("--iterations", type=int, default=20_000, help="renders per kind and locale")
+    args = parser.parse_args()
+    bench_load()
+    bench_render(args.iterations)
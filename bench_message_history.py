@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+"""
+Synthetic dataset + query benchmark for the message history endpoint.
+
+Seed 5M messages for one company (spread over the last year), then compare
+keyset pages against OFFSET pages at increasing depth:
+    python bench_message_history.py seed --company-id 1 --rows 5000000
+    python bench_message_history.py bench --company-id 1
+
+`bench` prints the plan shape and timing of each query (EXPLAIN ANALYZE);
+keyset pages should stay on an Index (Only) Scan of ix_messages_company_history
+with flat latency, OFFSET pages grow linearly with depth.
+"""
+import argparse
+import asyncio
+import time
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import text
+
+from app.db.session import AsyncSessionLocal
+from app.services.partitions import message_partitions
+
+SEED_CHUNK = 500_000
+
+COMPACT_COLUMNS = (
+    "id, channel, message_type, status, external_id, sent_at, received_at, "
+    "response_time_seconds, created_at"
+)
+
+
+async def seed(company_id: int, rows: int, days: int) -> None:
+    async with AsyncSessionLocal() as session:
+        # Monthly partitions for the whole seeded range (rows would land in messages_default otherwise)
+        created = await message_partitions.ensure_partitions(
+            session, since=(datetime.now(timezone.utc) - timedelta(days=days)).date()
+        )
+        await session.commit()
+        print(f"created partitions: {', '.join(created) or 'none'}")
+
+    async with AsyncSessionLocal() as session:
+        for start in range(0, rows, SEED_CHUNK):
+            count = min(SEED_CHUNK, rows - start)
+            started = time.perf_counter()
+            await session.execute(text("""
+                INSERT INTO messages (company_id, channel, message_type, status, content, external_id,
+                                      received_at, sent_at, response_time_seconds, created_at)
+                SELECT :company_id,
+                       (ARRAY['WhatsApp', 'Telegram', 'Instagram'])[1 + (g % 3)],
+                       (ARRAY['TYPE1', 'TYPE2', 'TYPE3'])[1 + (g % 7 % 3)]::messagetype,
+                       (ARRAY['NO_PAYMENT_LINK', 'PAYMENT_LINK_SENT', 'PAID'])[1 + (g % 5 % 3)]::messagestatus,
+                       'synthetic message ' || g,
+                       'bench-' || g,
+                       ts, ts + interval '5 seconds', (g % 120) + 1, ts
+                FROM (
+                    SELECT g, now() - (random() * :days * interval '1 day') AS ts
+                    FROM generate_series(:first, :last) AS g
+                ) AS source
+            """), {"company_id": company_id, "days": days, "first": start, "last": start + count - 1})
+            await session.commit()
+            print(f"inserted {start + count:,}/{rows:,} rows ({time.perf_counter() - started:.1f}s)")
+
+        await session.execute(text("ANALYZE messages"))
+        await session.commit()
+
+    print("Run `VACUUM messages` (visibility map -> index-only scans) and "
+          "`python reconcile_message_counters.py` before benchmarking.")
+
+
+async def explain(session, label: str, sql: str, params: dict) -> None:
+    result = await session.execute(text(f"EXPLAIN (ANALYZE, BUFFERS) {sql}"), params)
+    plan = [row[0] for row in result.all()]
+    scan = next((line.strip() for line in plan if "Scan" in line), plan[0].strip())
+    timing = next((line.strip() for line in plan if line.strip().startswith("Execution Time")), "")
+    print(f"{label:<34} {timing:<28} {scan[:90]}")
+
+
+async def bench(company_id: int, limit: int, depths: list) -> None:
+    async with AsyncSessionLocal() as session:
+        for depth in depths:
+            # Cursor of the row at `depth` (what a client holds after depth/limit pages)
+            result = await session.execute(text(
+                "SELECT created_at, id FROM messages WHERE company_id = :company_id "
+                "ORDER BY created_at DESC, id DESC OFFSET :depth LIMIT 1"
+            ), {"company_id": company_id, "depth": depth})
+            cursor = result.first()
+            if cursor is None:
+                print(f"depth {depth:,}: beyond dataset")
+                continue
+
+            params = {"company_id": company_id, "limit": limit, "ts": cursor[0], "id": cursor[1], "depth": depth}
+            await explain(session, f"keyset compact @ {depth:,}", (
+                f"SELECT {COMPACT_COLUMNS} FROM messages WHERE company_id = :company_id "
+                "AND (created_at, id) < (:ts, :id) ORDER BY created_at DESC, id DESC LIMIT :limit"
+            ), params)
+            await explain(session, f"keyset full @ {depth:,}", (
+                f"SELECT {COMPACT_COLUMNS}, content FROM messages WHERE company_id = :company_id "
+                "AND (created_at, id) < (:ts, :id) ORDER BY created_at DESC, id DESC LIMIT :limit"
+            ), params)
+            await explain(session, f"keyset channel filter @ {depth:,}", (
+                f"SELECT {COMPACT_COLUMNS} FROM messages WHERE company_id = :company_id "
+                "AND channel = 'WhatsApp' AND (created_at, id) < (:ts, :id) "
+                "ORDER BY created_at DESC, id DESC LIMIT :limit"
+            ), params)
+            await explain(session, f"offset (old style) @ {depth:,}", (
+                f"SELECT {COMPACT_COLUMNS} FROM messages WHERE company_id = :company_id "
+                "ORDER BY created_at DESC, id DESC OFFSET :depth LIMIT :limit"
+            ), params)
+            print()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Message history benchmark")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    seed_cmd = sub.add_parser("seed")
+    seed_cmd.add_argument("--company-id", type=int, required=True)
+    seed_cmd.add_argument("--rows", type=int, default=5_000_000)
+    seed_cmd.add_argument("--days", type=int, default=365)
+
+    bench_cmd = sub.add_parser("bench")
+    bench_cmd.add_argument("--company-id", type=int, required=True)
+    bench_cmd.add_argument("--limit", type=int, default=50)
+    bench_cmd.add_argument("--depths", type=int, nargs="+", default=[0, 10_000, 1_000_000, 4_000_000])
+
+    args = parser.parse_args()
+    if args.command == "seed":
+        asyncio.run(seed(args.company_id, args.rows, args.days))
+    else:
+        asyncio.run(bench(args.company_id, args.limit, args.depths))
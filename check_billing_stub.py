@@ -0,0 +1,192 @@
+#!/usr/bin/env python3
+"""
+Plan catalog / payment link check against a local Stripe stub.
+
+Starts an in-process HTTP server that implements the few Stripe endpoints
+app.services.billing uses (prices, customers, payment links), points the
+stripe SDK at it and checks that:
+- the first sync creates one Price per plan and a second sync creates none
+- changing a plan's amount creates one new Price and archives the old one
+- a user's payment link is created once and then served from the cache
+- slow Stripe calls do not block the event loop
+    python check_billing_stub.py --latency 0.2
+"""
+import argparse
+import asyncio
+import copy
+import itertools
+import json
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from types import SimpleNamespace
+from urllib.parse import parse_qsl, urlparse
+
+import stripe
+
+from app.core.config import settings
+from app.services.billing import SUBSCRIPTION_PLANS, PlanCatalog, PaymentLinks
+
+
+def unflatten(pairs):
+    """Stripe form encoding (a[b][0]=x) -> nested dicts (lists stay dicts keyed by index)."""
+    result = {}
+    for key, value in pairs:
+        parts = key.replace("]", "").split("[")
+        node = result
+        for part in parts[:-1]:
+            node = node.setdefault(part, {})
+        node[parts[-1]] = value
+    return result
+
+
+class StripeStub:
+    """In-memory Stripe: prices, customers, payment links."""
+
+    def __init__(self, latency: float):
+        self.latency = latency
+        self.ids = itertools.count(1)
+        self.prices = {}
+        self.calls = []
+        self.lock = threading.Lock()
+
+    def handle(self, method: str, path: str, params: dict):
+        time.sleep(self.latency)
+        with self.lock:
+            self.calls.append((method, path))
+            if method == "GET" and path == "/v1/prices":
+                keys = set((params.get("lookup_keys") or {}).values())
+                data = [p for p in self.prices.values() if p["lookup_key"] in keys and p["active"]]
+                return {"object": "list", "data": data, "has_more": False, "url": path}
+            if method == "POST" and path == "/v1/prices":
+                key = params.get("lookup_key")
+                if key and params.get("transfer_lookup_key") == "true":
+                    for price in self.prices.values():
+                        if price["lookup_key"] == key:
+                            price["lookup_key"] = None
+                price = {
+                    "id": f"price_{next(self.ids)}",
+                    "object": "price",
+                    "active": True,
+                    "currency": params["currency"],
+                    "unit_amount": int(params["unit_amount"]),
+                    "lookup_key": key,
+                    "metadata": params.get("metadata", {}),
+                }
+                self.prices[price["id"]] = price
+                return price
+            if method == "POST" and path.startswith("/v1/prices/"):
+                price = self.prices[path.rsplit("/", 1)[1]]
+                if "active" in params:
+                    price["active"] = params["active"] == "true"
+                return price
+            if method == "POST" and path == "/v1/customers":
+                return {"id": f"cus_{next(self.ids)}", "object": "customer"}
+            if method == "POST" and path == "/v1/payment_links":
+                link_id = next(self.ids)
+                return {"id": f"plink_{link_id}", "object": "payment_link", "url": f"https://stub.local/{link_id}"}
+        return None
+
+    def count(self, method: str, path: str) -> int:
+        return sum(1 for call in self.calls if call == (method, path))
+
+
+def serve(stub: StripeStub) -> ThreadingHTTPServer:
+    class Handler(BaseHTTPRequestHandler):
+        def _respond(self, method: str):
+            url = urlparse(self.path)
+            body = self.rfile.read(int(self.headers.get("Content-Length") or 0)).decode()
+            params = unflatten(parse_qsl(url.query) + parse_qsl(body))
+            result = stub.handle(method, url.path, params)
+            payload = json.dumps(result if result is not None else {"error": {"message": "not found"}}).encode()
+            self.send_response(200 if result is not None else 404)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def do_GET(self):
+            self._respond("GET")
+
+        def do_POST(self):
+            self._respond("POST")
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+async def max_loop_stall(job) -> float:
+    """Run `job` while measuring the longest gap between 10 ms ticks of the event loop."""
+    stall = 0.0
+    running = True
+
+    async def ticker():
+        nonlocal stall
+        last = time.perf_counter()
+        while running:
+            await asyncio.sleep(0.01)
+            now = time.perf_counter()
+            stall = max(stall, now - last - 0.01)
+            last = now
+
+    tick = asyncio.create_task(ticker())
+    await job()
+    running = False
+    await tick
+    return stall
+
+
+async def check(latency: float) -> int:
+    stub = StripeStub(latency)
+    server = serve(stub)
+    stripe.api_base = f"http://127.0.0.1:{server.server_port}"
+    stripe.api_key = settings.STRIPE_SECRET_KEY = "sk_test_stub"
+    failures = 0
+
+    def expect(label: str, ok: bool, detail: str = "") -> None:
+        nonlocal failures
+        print(f"[{'ok' if ok else 'FAIL':>4}] {label} {detail}")
+        failures += 0 if ok else 1
+
+    plans = copy.deepcopy(SUBSCRIPTION_PLANS)
+    catalog = PlanCatalog(plans)
+    stall = await max_loop_stall(catalog.sync)
+    expect("first sync creates one Price per plan", stub.count("POST", "/v1/prices") == len(plans),
+           f"({stub.count('POST', '/v1/prices')} created)")
+    expect("event loop keeps running during Stripe calls", stall < latency / 2, f"(max stall {stall * 1000:.0f} ms)")
+
+    restarted = PlanCatalog(plans)
+    await restarted.sync()
+    expect("sync after restart reuses Prices", stub.count("POST", "/v1/prices") == len(plans))
+    expect("same Price ids", restarted.snapshot()["prices"] == catalog.snapshot()["prices"])
+
+    plans["single"]["amount"] += 100
+    old_price = catalog.snapshot()["prices"]["single"]
+    await restarted.sync()
+    new_price = restarted.snapshot()["prices"]["single"]
+    expect("changed plan gets a new Price", new_price != old_price and stub.count("POST", "/v1/prices") == len(plans) + 1)
+    expect("old Price archived", stub.prices[old_price]["active"] is False)
+
+    links = PaymentLinks(restarted)
+    user = SimpleNamespace(id=7, email="stub@example.com", full_name="Stub", stripe_customer_id="cus_stub")
+    first = await links.get(user, "double")
+    second = await links.get(user, "double")
+    expect("payment link cached per user", first == second and stub.count("POST", "/v1/payment_links") == 1)
+    await links.get(SimpleNamespace(id=8), "double")
+    expect("other users get their own link", stub.count("POST", "/v1/payment_links") == 2)
+
+    server.shutdown()
+    print(f"{failures} failed, {len(stub.calls)} Stripe calls")
+    return failures
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Billing check against a local Stripe stub")
+    parser.add_argument("--latency", type=float, default=0.2, help="seconds the stub takes per call")
+    args = parser.parse_args()
+    sys.exit(1 if asyncio.run(check(args.latency)) else 0)
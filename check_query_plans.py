@@ -0,0 +1,181 @@
+#!/usr/bin/env python3
+"""
+Query plan regression check for the hot lookup paths.
+
+Seeds synthetic users / companies / channels / subscriptions / verification
+codes inside one transaction, runs ANALYZE, then EXPLAINs the lookups the
+API issues on every request (built with the same SQLAlchemy expressions as
+the endpoints) and fails if any of them sequentially scans a table larger
+than --threshold rows. Everything is rolled back at the end:
+    python check_query_plans.py --rows 20000
+    python check_query_plans.py --show-plans
+"""
+import argparse
+import asyncio
+import json
+import sys
+
+from sqlalchemy import select, text, func
+from sqlalchemy.dialects import postgresql
+
+from app.db.session import AsyncSessionLocal
+from app.models.channel import Channel, ChannelPlatform, ChannelStatus
+from app.models.company import Company
+from app.models.subscription import Subscription, SubscriptionStatus
+from app.models.user import User
+from app.models.verification_code import VerificationCode
+from app.services.verification_store import hash_code
+
+EMAIL_PREFIX = "plan-check-"
+
+# One company, one WhatsApp channel and two subscriptions per synthetic user
+SEED_STATEMENTS = (
+    """
+    INSERT INTO users (email, hashed_password, full_name, role, subscription_tier,
+                       stripe_customer_id, is_active, is_superuser)
+    SELECT :prefix || g || '@example.com', 'x', 'Plan Check ' || g, 'CLIENT', 'TRIAL',
+           'cus_plan_check_' || g, true, false
+    FROM generate_series(1, :rows) AS g
+    """,
+    """
+    INSERT INTO companies (company_id, name, user_id, company_type, shop_type, status)
+    SELECT 'plan-check-' || u.id, 'Plan Check ' || u.id, u.id, 'shop', 'service', 'ACTIVE'
+    FROM users u WHERE u.email LIKE :prefix || '%'
+    """,
+    """
+    INSERT INTO channels (company_id, user_id, platform, is_active, status, config, error_count)
+    SELECT c.id, c.user_id, 'WHATSAPP', true,
+           (ARRAY['CONNECTED', 'DISCONNECTED'])[1 + (c.id % 2)]::channelstatus,
+           json_build_object('session_id', 'plan-check-session-' || c.id), 0
+    FROM companies c WHERE c.company_id LIKE 'plan-check-%'
+    """,
+    """
+    INSERT INTO subscriptions (user_id, plan, status, stripe_subscription_id, amount, currency, created_at)
+    SELECT u.id, 'BASIC', (ARRAY['ACTIVE', 'CANCELLED'])[s]::subscriptionstatus,
+           'sub_plan_check_' || u.id || '_' || s, 0, 'USD', now() - s * interval '30 days'
+    FROM users u CROSS JOIN generate_series(1, 2) AS s
+    WHERE u.email LIKE :prefix || '%'
+    """,
+    """
+    INSERT INTO verification_codes (email, code_hash, is_used, expires_at)
+    SELECT :prefix || g || '@example.com', encode(sha256(g::text::bytea), 'hex'), g % 3 = 0,
+           now() + CASE WHEN g % 20 = 0 THEN interval '-1 minute' ELSE interval '10 minutes' END
+    FROM generate_series(1, :rows) AS g
+    """,
+)
+
+ANALYZED_TABLES = ("users", "companies", "channels", "subscriptions", "verification_codes")
+
+
+def hot_queries():
+    """(name, statement) pairs mirroring the endpoint lookups; ids/values are arbitrary."""
+    user_id, company_id = 42, 42
+    return [
+        ("channel by company/user/platform (integrations)", select(Channel).where(
+            Channel.company_id == company_id,
+            Channel.user_id == user_id,
+            Channel.platform == ChannelPlatform.WHATSAPP,
+        )),
+        ("channels of a company (integrations)", select(Channel).where(Channel.company_id == company_id)),
+        ("channels of a user", select(Channel).where(Channel.user_id == user_id)),
+        ("connected channels of a user (channel limit)", select(Channel).where(
+            Channel.user_id == user_id,
+            Channel.status == ChannelStatus.CONNECTED,
+        )),
+        ("channels by WAHA session (waha_sync)", select(Channel.id, Channel.config).where(
+            Channel.platform == ChannelPlatform.WHATSAPP,
+            Channel.config["session_id"].as_string().in_(["plan-check-session-1", "plan-check-session-2"]),
+        )),
+        ("companies of a user (companies)", select(Company).where(Company.user_id == user_id)),
+        ("company of a user by id (companies)", select(Company).where(
+            Company.id == company_id,
+            Company.user_id == user_id,
+        )),
+        ("latest subscription of a user (integrations)", select(Subscription.plan)
+            .where(Subscription.user_id == user_id)
+            .order_by(Subscription.created_at.desc())
+            .limit(1)),
+        ("active subscription of a user (subscriptions)", select(Subscription).where(
+            Subscription.user_id == user_id,
+            Subscription.status == SubscriptionStatus.ACTIVE,
+        )),
+        ("user by Stripe customer (webhook)", select(User).where(User.stripe_customer_id == "cus_plan_check_1")),
+        ("subscription by Stripe id (webhook)", select(Subscription).where(
+            Subscription.stripe_subscription_id == "sub_plan_check_1_1"
+        )),
+        ("verification code by email (email)", select(VerificationCode.id).where(
+            VerificationCode.email == f"{EMAIL_PREFIX}1@example.com",
+            VerificationCode.code_hash == hash_code("123456"),
+            VerificationCode.is_used == False,
+        )),
+        ("magic link token (email)", select(VerificationCode.id).where(
+            VerificationCode.code_hash == hash_code("c4ca4238a0b923820dcc509a6f75849b"),
+            VerificationCode.is_used == False,
+        )),
+        ("expired verification codes (purge)", select(VerificationCode.id)
+            .where(VerificationCode.expires_at < func.now())
+            .limit(5000)),
+    ]
+
+
+def compile_sql(statement) -> str:
+    return str(statement.compile(dialect=postgresql.dialect(), compile_kwargs={"literal_binds": True}))
+
+
+def seq_scans(plan: dict):
+    """Relations scanned sequentially anywhere in the plan tree."""
+    if plan.get("Node Type") == "Seq Scan":
+        yield plan["Relation Name"]
+    for child in plan.get("Plans", []):
+        yield from seq_scans(child)
+
+
+async def check(rows: int, threshold: int, show_plans: bool) -> int:
+    failures = 0
+    async with AsyncSessionLocal() as session:
+        try:
+            for statement in SEED_STATEMENTS:
+                await session.execute(text(statement), {"prefix": EMAIL_PREFIX, "rows": rows})
+            for table in ANALYZED_TABLES:
+                await session.execute(text(f"ANALYZE {table}"))
+
+            result = await session.execute(
+                text("SELECT relname, reltuples FROM pg_class WHERE relname = ANY(:names)"),
+                {"names": list(ANALYZED_TABLES)},
+            )
+            sizes = {name: int(tuples) for name, tuples in result.all()}
+            print("table sizes: " + ", ".join(f"{name}={sizes.get(name, 0):,}" for name in ANALYZED_TABLES))
+
+            for name, statement in hot_queries():
+                sql = compile_sql(statement)
+                result = await session.execute(text(f"EXPLAIN (FORMAT JSON) {sql}"))
+                plan = result.scalar()
+                if isinstance(plan, str):
+                    plan = json.loads(plan)
+                root = plan[0]["Plan"]
+
+                offending = sorted({rel for rel in seq_scans(root) if sizes.get(rel, 0) > threshold})
+                status = "FAIL" if offending else "ok"
+                detail = f"seq scan on {', '.join(offending)}" if offending else root["Node Type"]
+                print(f"[{status:>4}] {name:<50} {detail}")
+                if offending:
+                    failures += 1
+                if show_plans or offending:
+                    print("       " + sql.replace("\n", " "))
+                    print("       " + json.dumps(root)[:2000])
+        finally:
+            await session.rollback()
+
+    print(f"{failures} of {len(hot_queries())} queries scan large tables sequentially")
+    return failures
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Hot lookup query plan check")
+    parser.add_argument("--rows", type=int, default=20_000, help="synthetic users to seed")
+    parser.add_argument("--threshold", type=int, default=1_000, help="largest table a seq scan may read")
+    parser.add_argument("--show-plans", action="store_true")
+    args = parser.parse_args()
+
+    failed = asyncio.run(check(args.rows, args.threshold, args.show_plans))
+    sys.exit(1 if failed else 0)
@@ -0,0 +1,154 @@
+#!/usr/bin/env python3
+"""
+DB pool hold-time check for the WhatsApp endpoints against a slow WAHA.
+
+Starts waha_stub.py in-process with every response delayed by --latency
+seconds, seeds --clients throwaway clients (one company each) and runs the
+connect / status / disconnect endpoints for all of them concurrently, the
+way the API serves them (one session per request, user loaded first). The
+endpoints hand their pooled connection back before calling WAHA, so the
+longest checkout (pool_stats max_held_ms) must stay well below the WAHA
+latency. The seeded rows are deleted at the end:
+    python check_waha_pool_hold.py --latency 2 --clients 16
+"""
+import argparse
+import asyncio
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+from typing import List, Tuple
+
+import uvicorn
+from sqlalchemy import delete, select
+
+import waha_stub
+from app.api.v1.integrations import connect_whatsapp, disconnect_whatsapp, get_whatsapp_status
+from app.core.config import settings
+from app.db.session import AsyncSessionLocal, engine, pool_stats
+from app.models.channel import Channel
+from app.models.company import Company
+from app.models.user import User, UserRole, SubscriptionTier
+from app.schemas.integration import WhatsAppConnectRequest
+from app.services.http_client import http_clients
+
+EMAIL_PREFIX = "pool-check-"
+
+
+async def start_stub(latency: float) -> Tuple[uvicorn.Server, asyncio.Task]:
+    waha_stub.LATENCY = latency
+    server = uvicorn.Server(uvicorn.Config(
+        waha_stub.app, host="127.0.0.1", port=0, log_level="warning", lifespan="off"
+    ))
+    serving = asyncio.create_task(server.serve())
+    while not server.started:
+        await asyncio.sleep(0.05)
+    port = server.servers[0].sockets[0].getsockname()[1]
+    settings.WAHA_API_URL = f"http://127.0.0.1:{port}"
+    settings.WAHA_API_KEY = "pool-check"
+    return server, serving
+
+
+async def seed(clients: int) -> List[Tuple[int, int]]:
+    trial_ends_at = datetime.now(timezone.utc) + timedelta(days=7)
+    async with AsyncSessionLocal() as db:
+        users = [
+            User(
+                email=f"{EMAIL_PREFIX}{n}@example.com",
+                hashed_password="x",
+                full_name=f"Pool Check {n}",
+                role=UserRole.CLIENT,
+                subscription_tier=SubscriptionTier.TRIAL,
+                trial_ends_at=trial_ends_at,
+                is_active=True,
+            )
+            for n in range(clients)
+        ]
+        db.add_all(users)
+        await db.flush()
+        companies = [
+            Company(company_id=f"{EMAIL_PREFIX}{user.id}", name=f"Pool Check {user.id}",
+                    user_id=user.id, company_type="shop", shop_type="service")
+            for user in users
+        ]
+        db.add_all(companies)
+        await db.flush()
+        pairs = [(user.id, company.id) for user, company in zip(users, companies)]
+        await db.commit()
+    return pairs
+
+
+async def cleanup() -> None:
+    async with AsyncSessionLocal() as db:
+        user_ids = select(User.id).where(User.email.like(f"{EMAIL_PREFIX}%")).scalar_subquery()
+        await db.execute(delete(Channel).where(Channel.user_id.in_(user_ids)))
+        await db.execute(delete(Company).where(Company.user_id.in_(user_ids)))
+        await db.execute(delete(User).where(User.email.like(f"{EMAIL_PREFIX}%")))
+        await db.commit()
+
+
+async def client_flow(user_id: int, company_id: int) -> None:
+    """connect -> status -> disconnect, each in its own request session like get_db."""
+    async with AsyncSessionLocal() as db:
+        user = await db.get(User, user_id)
+        await connect_whatsapp(
+            WhatsAppConnectRequest(company_id=company_id, business_number=f"+1555{user_id:07d}"),
+            current_user=user, db=db,
+        )
+    async with AsyncSessionLocal() as db:
+        user = await db.get(User, user_id)
+        await get_whatsapp_status(company_id, current_user=user, db=db)
+    async with AsyncSessionLocal() as db:
+        user = await db.get(User, user_id)
+        await disconnect_whatsapp(company_id, current_user=user, db=db)
+
+
+async def check(latency: float, clients: int, max_hold: float) -> int:
+    engine.echo = False
+    server, serving = await start_stub(latency)
+    failures = 0
+
+    def expect(label: str, ok: bool, detail: str = "") -> None:
+        nonlocal failures
+        print(f"[{'ok' if ok else 'FAIL':>4}] {label} {detail}")
+        failures += 0 if ok else 1
+
+    await cleanup()
+    pairs = await seed(clients)
+    try:
+        pool_stats.reset()
+        started = time.perf_counter()
+        results = await asyncio.gather(*(client_flow(*pair) for pair in pairs), return_exceptions=True)
+        elapsed = time.perf_counter() - started
+        errors = [r for r in results if isinstance(r, BaseException)]
+        for error in errors[:5]:
+            print(f"       {type(error).__name__}: {error}")
+
+        stats = pool_stats.snapshot()
+        bound_ms = latency * max_hold * 1000
+        expect("every flow completed", not errors, f"({len(errors)} of {clients} failed)")
+        expect("WAHA was slow", elapsed >= latency, f"({elapsed:.1f} s for {clients} concurrent flows)")
+        expect(
+            "connections are not held across WAHA calls",
+            stats["max_held_ms"] < bound_ms,
+            f"(max held {stats['max_held_ms']:.0f} ms, avg {stats['avg_held_ms']} ms, "
+            f"bound {bound_ms:.0f} ms, {stats['checkouts']} checkouts)",
+        )
+    finally:
+        await cleanup()
+        await http_clients.close()
+        server.should_exit = True
+        await serving
+
+    print(f"{failures} failed")
+    return failures
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="DB pool hold-time check against a slow WAHA stub")
+    parser.add_argument("--latency", type=float, default=2.0, help="seconds the stub takes per WAHA call")
+    # Stay under the WAHA bulkhead (20 in-flight calls) so no flow is rejected with 503
+    parser.add_argument("--clients", type=int, default=16, help="concurrent connect/status/disconnect flows")
+    parser.add_argument("--max-hold", type=float, default=0.25,
+                        help="longest allowed checkout, as a fraction of --latency")
+    args = parser.parse_args()
+    sys.exit(1 if asyncio.run(check(args.latency, args.clients, args.max_hold)) else 0)
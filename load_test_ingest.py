@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+Load test for the message ingestion webhook.
+Run: python load_test_ingest.py --company-id 1 --secret <INGEST_WEBHOOK_SECRET>
+
+Sends `--batches` batches of `--batch-size` messages with `--concurrency`
+requests in flight and prints throughput and latency percentiles.
+Use --duplicate-ratio to resend part of each batch (simulates webhook retries).
+"""
+import argparse
+import asyncio
+import random
+import time
+import uuid
+from datetime import datetime, timezone
+
+import httpx
+
+BASE_URL = "http://localhost:8000"
+
+
+def make_batch(company_id: int, size: int, previous: list, duplicate_ratio: float) -> list:
+    batch = []
+    for _ in range(size):
+        if previous and random.random() < duplicate_ratio:
+            batch.append(random.choice(previous))
+            continue
+        now = datetime.now(timezone.utc).isoformat()
+        batch.append({
+            "company_id": company_id,
+            "channel": random.choice(["WhatsApp", "Telegram", "Instagram"]),
+            "external_id": uuid.uuid4().hex,
+            "message_type": random.choice(["type1", "type2", "type3"]),
+            "status": "no_payment_link",
+            "content": "load test message",
+            "received_at": now,
+            "sent_at": now,
+            "response_time_seconds": random.randint(1, 120),
+        })
+    return batch
+
+
+async def run(args):
+    headers = {"X-Webhook-Secret": args.secret}
+    latencies = []
+    totals = {"received": 0, "inserted": 0, "updated": 0, "duplicates": 0, "rejected": 0, "errors": 0}
+    semaphore = asyncio.Semaphore(args.concurrency)
+    previous: list = []
+
+    async with httpx.AsyncClient(base_url=args.url, timeout=60.0) as client:
+
+        async def send(batch):
+            async with semaphore:
+                started = time.perf_counter()
+                response = await client.post("/api/v1/ingest/messages", json={"messages": batch}, headers=headers)
+                latencies.append((time.perf_counter() - started) * 1000)
+                if response.status_code != 200:
+                    totals["errors"] += 1
+                    print(f"❌ {response.status_code}: {response.text[:200]}")
+                    return
+                for key, value in response.json().items():
+                    totals[key] += value
+
+        batches = []
+        for _ in range(args.batches):
+            batch = make_batch(args.company_id, args.batch_size, previous, args.duplicate_ratio)
+            previous = batch
+            batches.append(batch)
+
+        started = time.perf_counter()
+        await asyncio.gather(*(send(batch) for batch in batches))
+        elapsed = time.perf_counter() - started
+
+    latencies.sort()
+
+    def percentile(p):
+        return latencies[min(len(latencies) - 1, int(p * len(latencies)))] if latencies else 0
+
+    print(f"\n📊 {totals['received']} messages in {elapsed:.2f}s -> {totals['received'] / elapsed:.0f} msg/s")
+    print(f"   inserted={totals['inserted']} updated={totals['updated']} duplicates={totals['duplicates']} "
+          f"rejected={totals['rejected']} failed_requests={totals['errors']}")
+    print(f"   request latency p50={percentile(0.5):.1f}ms p95={percentile(0.95):.1f}ms "
+          f"p99={percentile(0.99):.1f}ms")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Ingestion webhook load test")
+    parser.add_argument("--url", default=BASE_URL)
+    parser.add_argument("--secret", required=True)
+    parser.add_argument("--company-id", type=int, required=True)
+    parser.add_argument("--batches", type=int, default=200)
+    parser.add_argument("--batch-size", type=int, default=500)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--duplicate-ratio", type=float, default=0.0)
+    asyncio.run(run(parser.parse_args()))
@@ -0,0 +1,20 @@
+"""
+Rebuild the materialized manager portfolio stats from `users`.
+Run after bulk (Core) updates of users, and whenever drift is suspected.
+Usage: python reconcile_manager_stats.py [manager_id ...]
+"""
+import asyncio
+import sys
+
+from app.db.session import AsyncSessionLocal
+from app.services.manager_stats import reconcile
+
+
+async def main(manager_ids):
+    async with AsyncSessionLocal() as session:
+        updated = await reconcile(session, manager_ids or None)
+    print(f"Reconciled portfolio stats for {updated} managers")
+
+
+if __name__ == "__main__":
+    asyncio.run(main([int(arg) for arg in sys.argv[1:]]))
@@ -0,0 +1,20 @@
+"""
+Recompute the denormalized message counters on companies from `messages`.
+Run once after deploying the counters migration, and whenever drift is suspected.
+Usage: python reconcile_message_counters.py [company_id ...]
+"""
+import asyncio
+import sys
+
+from app.db.session import AsyncSessionLocal
+from app.services.message_counters import reconcile
+
+
+async def main(company_ids):
+    async with AsyncSessionLocal() as session:
+        updated = await reconcile(session, company_ids or None)
+    print(f"Reconciled message counters for {updated} companies")
+
+
+if __name__ == "__main__":
+    asyncio.run(main([int(arg) for arg in sys.argv[1:]]))
@@ -4,7 +4,8 @@ Usage: python test_email.py your-email@example.com
 """
 import asyncio
 import sys
-from app.services.email import send_verification_email, generate_verification_code
+from app.services.email import generate_verification_code
+from app.services.email_delivery import email_delivery, build_message
 from app.core.config import settings
 
 
@@ -36,16 +37,14 @@ async def test_email(recipient_email: str):
     test_code = generate_verification_code()
 
     try:
-        success = await send_verification_email(recipient_email, test_code)
+        # Sent directly (not through the outbox) so SMTP errors show up here
+        await email_delivery.send(build_message("verification_code", recipient_email, {"code": test_code}))
+        await email_delivery.close()
 
-        if success:
-            print("\n✅ Email sent successfully!")
-            print(f"\n📨 Check your inbox at: {recipient_email}")
-            print("   (Also check your spam/junk folder)")
-            print(f"\n🔑 Test code was: {test_code}")
-        else:
-            print("\n❌ Failed to send email")
-            print("   Check the error messages above")
+        print("\n✅ Email sent successfully!")
+        print(f"\n📨 Check your inbox at: {recipient_email}")
+        print("   (Also check your spam/junk folder)")
+        print(f"\n🔑 Test code was: {test_code}")
 
     except Exception as e:
         print(f"\n❌ Error: {str(e)}")
@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+"""
+Local WAHA stub for development and manual tests of the WhatsApp flow.
+Implements the WAHA session endpoints used by app/services/waha_sessions.py.
+
+Run one or more nodes:
+    uvicorn waha_stub:app --port 3001
+    uvicorn waha_stub:app --port 3002
+
+Then point the API at them:
+    WAHA_API_URL=http://localhost:3001
+    WAHA_EXTRA_URLS=http://localhost:3002
+    WAHA_API_KEY=<any value>
+
+A session becomes WORKING (paired) once POST /api/{session}/stub/pair is called.
+WAHA_STUB_LATENCY=<seconds> delays every response (simulates a slow WAHA node).
+"""
+import asyncio
+import os
+import random
+from typing import Dict, Any
+
+from fastapi import FastAPI, HTTPException, Request
+
+app = FastAPI(title="WAHA stub")
+
+sessions: Dict[str, Dict[str, Any]] = {}
+
+# Seconds added to every response
+LATENCY = float(os.environ.get("WAHA_STUB_LATENCY", "0"))
+
+
+@app.middleware("http")
+async def slow_down(request: Request, call_next):
+    if LATENCY:
+        await asyncio.sleep(LATENCY)
+    return await call_next(request)
+
+
+def get_or_404(name: str) -> Dict[str, Any]:
+    session = sessions.get(name)
+    if session is None:
+        raise HTTPException(status_code=404, detail="Session not found")
+    return session
+
+
+@app.get("/api/sessions")
+async def list_sessions():
+    return list(sessions.values())
+
+
+@app.post("/api/sessions", status_code=201)
+async def create_session(request: Request):
+    body = await request.json()
+    name = body.get("name") or "default"
+    if name in sessions:
+        raise HTTPException(status_code=422, detail="Session already exists")
+    sessions[name] = {
+        "name": name,
+        "status": "SCAN_QR_CODE" if body.get("start", True) else "STOPPED",
+        "me": None,
+        "config": body.get("config") or {},
+    }
+    return sessions[name]
+
+
+@app.get("/api/sessions/{name}")
+async def get_session(name: str):
+    return get_or_404(name)
+
+
+@app.post("/api/sessions/{name}/start")
+async def start_session(name: str):
+    session = get_or_404(name)
+    if session["status"] in ("STOPPED", "FAILED"):
+        session["status"] = "SCAN_QR_CODE"
+    return session
+
+
+@app.post("/api/sessions/{name}/stop")
+async def stop_session(name: str):
+    session = get_or_404(name)
+    session["status"] = "STOPPED"
+    return session
+
+
+@app.delete("/api/sessions/{name}")
+async def delete_session(name: str):
+    get_or_404(name)
+    del sessions[name]
+    return {"deleted": name}
+
+
+@app.post("/api/{name}/auth/request-code")
+async def request_code(name: str, request: Request):
+    session = get_or_404(name)
+    if session["status"] != "SCAN_QR_CODE":
+        raise HTTPException(status_code=422, detail=f"Session status is {session['status']}")
+    body = await request.json()
+    session["pending_phone"] = body.get("phoneNumber")
+    code = "".join(random.choice("ABCDEFGHJKLMNPQRSTUVWXYZ0123456789") for _ in range(8))
+    return {"code": f"{code[:4]}-{code[4:]}"}
+
+
+@app.post("/api/{name}/stub/pair")
+async def pair(name: str):
+    session = get_or_404(name)
+    phone = session.get("pending_phone") or "10000000000"
+    session["status"] = "WORKING"
+    session["me"] = {"id": f"{phone}@c.us", "pushName": "Stub"}
+    return session
+
+
+@app.post("/api/{name}/logout")
+async def logout(name: str):
+    session = get_or_404(name)
+    session["status"] = "SCAN_QR_CODE"
+    session["me"] = None
+    return session